@@ -1,3 +1,26 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Article, ArticleContent, CrawlJob
+
+
+class ArticleContentInline(admin.StackedInline):
+    model = ArticleContent
+    can_delete = False
+
+
+@admin.register(Article)
+class ArticleAdmin(admin.ModelAdmin):
+    # The changelist reads only the metadata table; bodies are loaded on
+    # the change page through the inline.
+    list_display = ('title', 'source', 'published_date')
+    ordering = ('-published_date', '-id')
+    show_full_result_count = False
+    inlines = [ArticleContentInline]
+
+
+@admin.register(CrawlJob)
+class CrawlJobAdmin(admin.ModelAdmin):
+    list_display = ('url', 'status', 'result', 'attempts', 'leased_by', 'updated_at')
+    list_filter = ('status', 'result')
+    ordering = ('-id',)
+    show_full_result_count = False
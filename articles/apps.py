@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
+
+    def ready(self):
+        from .caching import invalidate
+        from .models import Article, ArticleContent
+
+        for model in (Article, ArticleContent):
+            post_save.connect(invalidate, sender=model, dispatch_uid=f'{model.__name__}_cache_post_save')
+            post_delete.connect(invalidate, sender=model, dispatch_uid=f'{model.__name__}_cache_post_delete')
@@ -0,0 +1,107 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .renderers import FastJSONRenderer
+
+
+# Time of the last change to the article data. Every cached response
+# remembers the version it was rendered at and is stale once it changes.
+VERSION_KEY = 'articles:version'
+RESPONSE_KEY_PREFIX = 'articles:response:'
+DEFAULT_TIMEOUT = 3600
+
+# Headers of the rendered response that are replayed on cache hits.
+CACHED_HEADERS = ('Content-Type', 'Link', 'Vary', 'Allow')
+
+
+def bump_version():
+    """Marks the article data as changed, invalidating cached responses."""
+    cache.set(VERSION_KEY, time.time(), None)
+
+
+def invalidate(sender, using=None, **kwargs):
+    """
+    post_save/post_delete receiver for Article (see ArticlesConfig.ready).
+    The version is bumped once the change is committed: bumped earlier, a
+    request could cache the old row under the new version.
+    """
+    transaction.on_commit(bump_version, using=using)
+
+
+def current_version(cached):
+    version = cached.get(VERSION_KEY)
+    if version is None:
+        # Empty or flushed cache: start a new version; add() keeps a
+        # concurrent bump from being overwritten.
+        cache.add(VERSION_KEY, time.time(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def response_key(request):
+    # Scheme and host too: responses carry absolute URLs (Link headers).
+    parts = [
+        request.scheme, request.get_host(), request.path, sorted(request.GET.lists()),
+        request.META.get('HTTP_ACCEPT', ''),
+    ]
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return RESPONSE_KEY_PREFIX + digest
+
+
+class CachedResponseMixin:
+    """
+    Conditional GET and a server-side cache of rendered responses.
+
+    Successful GET responses rendered as JSON are cached per scheme, host,
+    path, query string and Accept header together with an ETag (hash of the
+    body). Browsable API pages are not cached: they show the logged-in user
+    and a CSRF token. A cache hit costs one cache lookup and no serialization; If-None-Match / If-Modified-Since
+    requests for unchanged data get 304. Last-Modified is the time of the
+    last data change. Hits skip the DRF request cycle (authentication,
+    permissions, throttling), so this is only for public read-only views.
+    """
+
+    cache_timeout = None
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'ARTICLES_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_key(request)
+        cached = cache.get_many([VERSION_KEY, key])
+        version = current_version(cached)
+        entry = cached.get(key)
+        if entry is None or entry['version'] != version:
+            response = super().dispatch(request, *args, **kwargs)
+            renderer = getattr(response, 'accepted_renderer', None)
+            if response.status_code != 200 or not isinstance(renderer, FastJSONRenderer):
+                return response
+            response.render()
+            entry = {
+                'version': version,
+                'content': response.content,
+                'headers': [(name, response[name]) for name in CACHED_HEADERS if name in response],
+                'etag': quote_etag(hashlib.md5(response.content, usedforsecurity=False).hexdigest()),
+            }
+            cache.set(key, entry, self.get_cache_timeout())
+
+        response = HttpResponse(entry['content'])
+        for name, value in entry['headers']:
+            response[name] = value
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(version)
+        return get_conditional_response(
+            request, etag=entry['etag'], last_modified=int(version), response=response
+        )
@@ -0,0 +1,59 @@
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+
+# Query parameters that only track where a visitor came from.
+TRACKING_PARAMS = frozenset(('fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga'))
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Normalized form of `url`, used to recognize the same article under
+    different URLs: lowercased scheme and host, no default port, no
+    fragment, no tracking parameters (utm_*, fbclid, ...), the remaining
+    parameters sorted and no trailing slash except for the root path.
+    """
+    url = (url or '').strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f'[{host}]'
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{host}:{port}'
+    if parts.username or parts.password:
+        netloc = f"{parts.netloc.rsplit('@', 1)[0]}@{netloc}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def page_canonical_url(url, link):
+    """
+    Canonical URL of a page at `url` whose <link rel="canonical"> points
+    at `link` (may be empty or relative). Links that are not http(s) URLs
+    are ignored.
+    """
+    if link:
+        target = urljoin(url, link.strip())
+        if urlsplit(target).scheme in DEFAULT_PORTS and urlsplit(target).hostname:
+            return canonicalize_url(target)
+    return canonicalize_url(url)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .canonical import canonicalize_url
+from .models import CrawlJob
+from .sources import iter_batches
+
+
+DEFAULT_LEASE = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Scraper results (ScrapeJob statuses) after which a job is tried again,
+# until it has been claimed max_attempts times.
+RETRY_RESULTS = frozenset(('download_error', 'save_error'))
+
+
+def enqueue(urls, batch_size=1000):
+    """
+    Adds URLs to the crawl queue, one INSERT ... ON CONFLICT DO NOTHING per
+    batch; URLs whose canonical form is already queued (in any state) are
+    skipped. Returns the number of URLs read.
+    """
+    count = 0
+    for batch in iter_batches(urls, batch_size):
+        CrawlJob.objects.bulk_create(
+            [CrawlJob(url=url, canonical_url=canonicalize_url(url)) for url in batch],
+            ignore_conflicts=True,
+        )
+        count += len(batch)
+    return count
+
+
+def claim(worker, limit, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Claims up to `limit` jobs for `worker` for `lease` seconds: pending jobs
+    and claims whose lease expired (their worker died or stalled), oldest
+    first. Rows locked by a concurrent claim are skipped, not waited for,
+    so any number of workers can claim at once. Expired claims that used
+    up max_attempts are failed instead.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        CrawlJob.objects.filter(
+            status=CrawlJob.CLAIMED, lease_expires_at__lt=now, attempts__gte=max_attempts
+        ).update(status=CrawlJob.FAILED, error='Lease expired', lease_expires_at=None, updated_at=now)
+        ids = list(
+            CrawlJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=CrawlJob.PENDING) | Q(status=CrawlJob.CLAIMED, lease_expires_at__lt=now))
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        CrawlJob.objects.filter(id__in=ids).update(
+            status=CrawlJob.CLAIMED,
+            leased_by=worker,
+            lease_expires_at=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        return list(CrawlJob.objects.filter(id__in=ids).order_by('id'))
+
+
+def renew(worker, ids, lease=DEFAULT_LEASE):
+    """
+    Extends the lease of jobs `worker` still holds to `lease` seconds from
+    now, so a batch that takes long is not taken over by another worker.
+    Returns the number of jobs renewed.
+    """
+    now = timezone.now()
+    return CrawlJob.objects.filter(id__in=ids, status=CrawlJob.CLAIMED, leased_by=worker).update(
+        lease_expires_at=now + timedelta(seconds=lease), updated_at=now,
+    )
+
+
+def complete(worker, crawl_jobs, results, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Records the scraper results ({job id: (ScrapeJob status, error)}) of
+    jobs claimed by `worker`. Errors in RETRY_RESULTS put the job back in
+    the queue until it was tried max_attempts times. Jobs no longer leased
+    by `worker` (the lease expired and another worker took them over) are
+    left alone.
+    """
+    now = timezone.now()
+    updated = []
+    for crawl_job in crawl_jobs:
+        result, error = results[crawl_job.id]
+        if result in RETRY_RESULTS:
+            status = CrawlJob.PENDING if crawl_job.attempts < max_attempts else CrawlJob.FAILED
+        else:
+            status = CrawlJob.DONE
+        crawl_job.status = status
+        crawl_job.result = result
+        crawl_job.error = str(error) if error else ''
+        crawl_job.lease_expires_at = None
+        crawl_job.updated_at = now
+        updated.append(crawl_job)
+    with transaction.atomic():
+        owned = set(
+            CrawlJob.objects.select_for_update()
+            .filter(id__in=[job.id for job in updated], status=CrawlJob.CLAIMED, leased_by=worker)
+            .values_list('id', flat=True)
+        )
+        CrawlJob.objects.bulk_update(
+            [job for job in updated if job.id in owned],
+            ['status', 'result', 'error', 'lease_expires_at', 'updated_at'],
+        )
+    return len(owned)
@@ -0,0 +1,121 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from dateutil import parser
+from django.utils import timezone
+
+
+POLISH_MONTHS = {
+    'stycznia': 1, 'lutego': 2, 'marca': 3, 'kwietnia': 4,
+    'maja': 5, 'czerwca': 6, 'lipca': 7, 'sierpnia': 8,
+    'września': 9, 'października': 10, 'listopada': 11, 'grudnia': 12
+}
+
+ENGLISH_MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+
+RELATIVE_UNITS = {
+    'second': 'seconds', 'minute': 'minutes', 'hour': 'hours', 'day': 'days'
+}
+
+# Text patterns in priority order: the first match of a higher priority
+# pattern wins over any match of a lower one, wherever they are in the text.
+# They run over a lowercased copy of the text instead of using IGNORECASE,
+# which lets the regex engine skip quickly to possible first characters.
+# (One combined alternation is slower: it defeats that optimization.)
+POLISH, ENGLISH, ISO, RELATIVE, YESTERDAY = range(5)
+
+TEXT_PATTERNS = (
+    (POLISH, re.compile(rf"(\d{{1,2}})\s+({'|'.join(POLISH_MONTHS)})\s+(\d{{4}})")),
+    (ENGLISH, re.compile(rf"({'|'.join(ENGLISH_MONTHS)})\s+(\d{{1,2}}),?\s+(\d{{4}})")),
+    (ISO, re.compile(r'(\d{4})-(\d{2})-(\d{2})')),
+    (RELATIVE, re.compile(rf"(\d+)\s+({'|'.join(RELATIVE_UNITS)})s?\s+ago")),
+    (YESTERDAY, re.compile(r'\byesterday\b')),
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_string(date_str):
+    try:
+        return parser.parse(date_str)
+    except Exception:
+        return None
+
+
+def parse_meta_date(date_str):
+    """
+    Parses a date string taken from a meta tag or <time> element.
+    Results are cached, since sites repeat the same strings across pages.
+    """
+    parsed = _parse_date_string(date_str)
+    if parsed is not None and parsed.tzinfo is None:
+        return timezone.make_aware(parsed)
+    return parsed
+
+
+def _to_date(kind, match, now):
+    """Builds the datetime for a match, or None if the date is invalid."""
+    try:
+        if kind == POLISH:
+            day, month, year = match.groups()
+            return timezone.make_aware(datetime(int(year), POLISH_MONTHS[month], int(day)))
+        if kind == ENGLISH:
+            month, day, year = match.groups()
+            return timezone.make_aware(datetime(int(year), ENGLISH_MONTHS[month], int(day)))
+        if kind == ISO:
+            year, month, day = match.groups()
+            return timezone.make_aware(datetime(int(year), int(month), int(day)))
+        if kind == RELATIVE:
+            num, unit = match.groups()
+            return now - timedelta(**{RELATIVE_UNITS[unit]: int(num)})
+        return (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_text_date(text, now=None):
+    """
+    Finds a publication date in free text.
+
+    Polish dates are preferred over English, ISO, relative ("2 days ago")
+    and "yesterday", in that order; for every kind only its first
+    occurrence is considered. Returns None when nothing valid is found.
+    """
+    now = now or timezone.now()
+    lowered = text.lower()
+    for kind, pattern in TEXT_PATTERNS:
+        match = pattern.search(lowered)
+        if match:
+            date = _to_date(kind, match, now)
+            if date is not None:
+                return date
+    return None
+
+
+def parse_meta_dates(date_strings):
+    """The first parseable meta/<time> date string, or None."""
+    for date_str in date_strings:
+        parsed = parse_meta_date(date_str)
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def parse_date(date_strings, text, now=None):
+    """
+    Publication date of a page: the first parseable meta/<time> date string,
+    then a date found in the page text, and today at midnight otherwise.
+    """
+    now = now or timezone.now()
+    parsed = parse_meta_dates(date_strings)
+    if parsed is not None:
+        return parsed
+
+    parsed = parse_text_date(text, now)
+    if parsed is not None:
+        return parsed
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,74 @@
+import codecs
+import re
+
+from requests.compat import chardet
+
+
+HEADER = 'header'
+BOM = 'bom'
+META = 'meta'
+DETECT = 'detect'
+DEFAULT = 'default'
+
+TIERS = (HEADER, BOM, META, DETECT, DEFAULT)
+
+# Longer BOMs first: the UTF-32 LE BOM starts with the UTF-16 LE one.
+# utf-8-sig (like utf-16 and utf-32) drops the BOM when decoding.
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+META_SNIFF_BYTES = 8 * 1024
+DETECT_SAMPLE_BYTES = 64 * 1024
+
+HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?\s*([^\s"\';]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and
+# <meta http-equiv="Content-Type" content="text/html; charset=...">.
+META_CHARSET_RE = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.\-]+)', re.IGNORECASE)
+
+
+def _codec_name(name):
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name.strip()).name
+    except (LookupError, ValueError):
+        return None
+
+
+def resolve_encoding(content, content_type=None):
+    """
+    Returns (encoding, tier) for an HTML body, trying the cheap sources
+    first: the Content-Type charset, a BOM, a <meta> declaration in the first
+    few KB, and only then statistical detection over a bounded sample.
+    """
+    if content_type:
+        match = HEADER_CHARSET_RE.search(content_type)
+        encoding = match and _codec_name(match.group(1))
+        if encoding:
+            return encoding, HEADER
+
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding, BOM
+
+    match = META_CHARSET_RE.search(content, 0, META_SNIFF_BYTES)
+    encoding = match and _codec_name(match.group(1))
+    if encoding:
+        return encoding, META
+
+    if content:
+        encoding = _codec_name(chardet.detect(content[:DETECT_SAMPLE_BYTES])['encoding'] or '')
+        if encoding == 'ascii':
+            # Only the sample was ASCII (inline scripts and styles fill the
+            # first 64 KB of many pages); UTF-8 decodes it the same way and
+            # keeps any non-ASCII text after it.
+            encoding = 'utf-8'
+        if encoding:
+            return encoding, DETECT
+
+    return 'utf-8', DEFAULT
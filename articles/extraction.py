@@ -0,0 +1,224 @@
+from dataclasses import dataclass, field
+
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+DEFAULT_BACKEND = 'html.parser'
+
+# Content element candidates, in the order they are preferred.
+CONTENT_KEYS = ('article', 'div.post-content', 'div.entry-content', 'main')
+
+# Publication date candidates, in the order they are tried.
+DATE_KEYS = ('meta:article:published_time', 'meta:publish-date', 'meta:date', 'time')
+
+# Strings inside these elements are not part of the visible text
+# (bs4 gives them their own string classes and get_text() skips them).
+NON_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    content_html: str
+    content_text: str
+    text: str
+    date_strings: list = field(default_factory=list)
+    # href of <link rel="canonical">, as written in the page.
+    canonical: str = None
+
+
+def available_backends():
+    backends = ['html.parser']
+    if lxml is not None:
+        backends.append('lxml')
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    return backends
+
+
+def date_string(tag):
+    return tag.get('content') or tag.get('datetime') or tag.get_text()
+
+
+def find_date_strings(soup):
+    """Date strings of the publication date candidates found in `soup`."""
+    candidates = [
+        soup.find('meta', property='article:published_time'),
+        soup.find('meta', {'name': 'publish-date'}),
+        soup.find('meta', {'name': 'date'}),
+        soup.find('time')
+    ]
+    return [s for s in (date_string(tag) for tag in candidates if tag) if s]
+
+
+def _candidate_keys(tag):
+    name = tag.name
+    if name in ('title', 'article', 'main', 'time'):
+        return (name,)
+    if name == 'div':
+        classes = tag.get('class') or ()
+        return tuple(f'div.{c}' for c in ('post-content', 'entry-content') if c in classes)
+    if name == 'meta':
+        keys = ()
+        if tag.get('property') == 'article:published_time':
+            keys += ('meta:article:published_time',)
+        if tag.get('name') in ('publish-date', 'date'):
+            keys += (f"meta:{tag.get('name')}",)
+        return keys
+    if name == 'link':
+        if 'canonical' in (rel.lower() for rel in tag.get('rel') or ()):
+            return ('link:canonical',)
+    return ()
+
+
+def _node_after(tag):
+    """First node after the subtree of `tag` in document order."""
+    while tag is not None:
+        if tag.next_sibling is not None:
+            return tag.next_sibling
+        tag = tag.parent
+    return None
+
+
+def _extract_soup(html, features):
+    """
+    Single walk over the parsed document. It collects the first occurrence
+    of every title/content/date candidate and the stripped text strings.
+    Each text-bearing candidate remembers the slice of strings that belongs
+    to its subtree, so the title and content text need no second traversal.
+    """
+    soup = BeautifulSoup(html, features)
+    text_types = soup.interesting_string_types
+    parts = []
+    found = {}
+    spans = {}
+    stops = {}
+
+    node = soup.contents[0] if soup.contents else None
+    while node is not None:
+        keys = stops.pop(id(node), None)
+        if keys:
+            for key in keys:
+                spans[key][1] = len(parts)
+
+        if isinstance(node, Tag):
+            for key in _candidate_keys(node):
+                if key in found:
+                    continue
+                found[key] = node
+                if key == 'title' or key in CONTENT_KEYS:
+                    spans[key] = [len(parts), None]
+                    stop = _node_after(node)
+                    if stop is not None:
+                        stops.setdefault(id(stop), []).append(key)
+        elif type(node) in text_types:
+            stripped = node.strip()
+            if stripped:
+                parts.append(stripped)
+        node = node.next_element
+
+    def span_text(key, separator):
+        start, end = spans[key]
+        return separator.join(parts[start:end])
+
+    text = ' '.join(parts)
+    title = span_text('title', '') if 'title' in found else 'No title'
+
+    content_key = next((key for key in CONTENT_KEYS if key in found), None)
+    if content_key:
+        content_html = str(found[content_key])
+        content_text = span_text(content_key, ' ')
+    else:
+        content_html = html
+        content_text = text
+
+    date_strings = [date_string(found[key]) for key in DATE_KEYS if key in found]
+    return ExtractedPage(
+        title=title,
+        content_html=content_html,
+        content_text=content_text,
+        text=text,
+        date_strings=[s for s in date_strings if s],
+        canonical=found['link:canonical'].get('href') if 'link:canonical' in found else None,
+    )
+
+
+def _lexbor_text(node, separator):
+    parts = []
+    for child in node.traverse(include_text=True):
+        if child.tag == '-text' and child.parent.tag not in NON_TEXT_TAGS:
+            stripped = child.text_content.strip()
+            if stripped:
+                parts.append(stripped)
+    return separator.join(parts)
+
+
+def _lexbor_date_string(node):
+    attributes = node.attributes
+    return attributes.get('content') or attributes.get('datetime') or node.text()
+
+
+def _extract_lexbor(html):
+    tree = LexborHTMLParser(html)
+
+    title_node = tree.css_first('title')
+    title = _lexbor_text(title_node, '') if title_node is not None else 'No title'
+
+    text = _lexbor_text(tree.root, ' ') if tree.root is not None else ''
+
+    for selector in ('article', 'div.post-content', 'div.entry-content', 'main'):
+        content_node = tree.css_first(selector)
+        if content_node is not None:
+            content_html = content_node.html
+            content_text = _lexbor_text(content_node, ' ')
+            break
+    else:
+        content_html = html
+        content_text = text
+
+    date_nodes = [
+        tree.css_first('meta[property="article:published_time"]'),
+        tree.css_first('meta[name="publish-date"]'),
+        tree.css_first('meta[name="date"]'),
+        tree.css_first('time'),
+    ]
+    date_strings = [_lexbor_date_string(node) for node in date_nodes if node is not None]
+    canonical_node = tree.css_first('link[rel~="canonical" i]')
+    return ExtractedPage(
+        title=title,
+        content_html=content_html,
+        content_text=content_text,
+        text=text,
+        date_strings=[s for s in date_strings if s],
+        canonical=canonical_node.attributes.get('href') if canonical_node is not None else None,
+    )
+
+
+def extract(html, backend=DEFAULT_BACKEND):
+    """
+    Extracts title, content, full text, publication date candidates and
+    the canonical link.
+
+    `html.parser` (default) gives the same results as the previous
+    BeautifulSoup code. `lxml` and `selectolax` are faster, but build the
+    tree with their own HTML parsers, so markup errors may be recovered
+    differently and selectolax serializes content_html its own way.
+    """
+    if backend == 'selectolax':
+        if LexborHTMLParser is None:
+            raise ValueError('selectolax is not installed')
+        return _extract_lexbor(html)
+    if backend not in ('html.parser', 'lxml'):
+        raise ValueError(f'Unknown parser backend: {backend}')
+    return _extract_soup(html, backend)
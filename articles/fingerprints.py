@@ -0,0 +1,75 @@
+import hashlib
+import re
+
+
+SIMHASH_BITS = 64
+# The fingerprint is split into BANDS bands of BAND_BITS bits, each stored
+# in its own indexed column. Two fingerprints within MAX_DISTANCE bits of
+# each other agree on at least one whole band (pigeonhole principle), so
+# candidates are found by equality lookups on the bands.
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_DISTANCE = BANDS - 1
+
+# Word shingles hashed into the SimHash; texts with fewer words get only
+# the exact hash, their SimHash would not be meaningful.
+SHINGLE_SIZE = 3
+MIN_WORDS = 8
+
+MASK = (1 << SIMHASH_BITS) - 1
+WORD_RE = re.compile(r'\w+')
+
+
+def content_hash(text):
+    """SHA-256 of the text with whitespace runs collapsed, or None if empty."""
+    normalized = ' '.join(text.split()) if text else ''
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _shingle_hash(shingle):
+    digest = hashlib.blake2b(shingle.encode('utf-8'), digest_size=SIMHASH_BITS // 8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def simhash(text):
+    """
+    64-bit SimHash of the word 3-shingles of the lowercased text, as a
+    signed integer (PostgreSQL bigint), or None for short texts.
+    """
+    words = WORD_RE.findall(text.lower()) if text else []
+    if len(words) < MIN_WORDS:
+        return None
+    hashes = [
+        _shingle_hash(' '.join(words[i:i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    ]
+    # Per-bit majority vote; zip() over the bit strings counts columns in C.
+    threshold = len(hashes) / 2
+    columns = zip(*(format(h, f'0{SIMHASH_BITS}b') for h in hashes))
+    value = int(''.join('1' if column.count('1') > threshold else '0' for column in columns), 2)
+    return value - (1 << SIMHASH_BITS) if value >> (SIMHASH_BITS - 1) else value
+
+
+def bands(value):
+    """The BANDS band values of a SimHash (most significant first)."""
+    value &= MASK
+    return [
+        (value >> (BAND_BITS * (BANDS - 1 - i))) & ((1 << BAND_BITS) - 1)
+        for i in range(BANDS)
+    ]
+
+
+def distance(a, b):
+    """Hamming distance between two SimHashes."""
+    return bin((a ^ b) & MASK).count('1')
+
+
+def fingerprint_fields(text):
+    """Article fingerprint columns for `text` (content_text)."""
+    value = simhash(text)
+    fields = {'content_hash': content_hash(text), 'simhash': value}
+    for i, band in enumerate(bands(value) if value is not None else [None] * BANDS):
+        fields[f'simhash_band{i}'] = band
+    return fields
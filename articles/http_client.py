@@ -0,0 +1,38 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+# urllib3 lists only the codings it can decode here: gzip and deflate
+# always, br when brotli/brotlicffi is installed, zstd with zstandard.
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': '*/*',
+    'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': ACCEPT_ENCODING.replace(',', ', '),
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+DEFAULT_TIMEOUT = 10
+
+
+def build_session(pool_connections=10, pool_maxsize=10, headers=None):
+    """
+    Returns a requests session shared by all download threads.
+
+    `pool_connections` is the number of per-host keep-alive pools kept open,
+    `pool_maxsize` the number of connections kept alive in each of them.
+    Connections (and their TLS sessions) are reused across articles from the
+    same host instead of being opened for every request.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,55 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles import crawl_queue
+from articles.http_client import DEFAULT_TIMEOUT, build_session
+from articles.sources import iter_sitemap, iter_urls_file
+
+
+class Command(BaseCommand):
+    help = 'Adds URLs to the crawl queue processed by scrape_worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls',
+            nargs='*',
+            help='URLs to enqueue'
+        )
+        parser.add_argument(
+            '--urls-file',
+            action='append',
+            default=[],
+            help='File with URLs to enqueue, plain text or JSONL; "-" reads from stdin (repeatable)'
+        )
+        parser.add_argument(
+            '--sitemap',
+            action='append',
+            default=[],
+            help='Sitemap or sitemap index (URL or path, optionally gzipped) to enqueue (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of URLs inserted at once (default: 1000)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=DEFAULT_TIMEOUT,
+            help=f'HTTP timeout in seconds for remote sitemaps (default: {DEFAULT_TIMEOUT})'
+        )
+
+    def handle(self, *args, **options):
+        with build_session() as session:
+            sources = [options['urls']]
+            sources += [iter_urls_file(path) for path in options['urls_file']]
+            sources += [
+                iter_sitemap(location, session=session, timeout=options['timeout'])
+                for location in options['sitemap']
+            ]
+            if not any([options['urls'], options['urls_file'], options['sitemap']]):
+                raise CommandError('Give URLs, --urls-file or --sitemap.')
+            count = crawl_queue.enqueue(chain.from_iterable(sources), max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"Enqueued {count} URLs (already queued URLs are skipped)"))
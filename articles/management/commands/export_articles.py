@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from articles.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_export
+from articles.query import DUPLICATES_MODES, SOURCE_MATCH_LOOKUPS
+
+
+class Command(BaseCommand):
+    help = 'Exports articles as NDJSON or CSV, streaming them from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='ndjson',
+            help='Output format (default: ndjson)'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Output file; "-" writes to stdout (default)'
+        )
+        parser.add_argument(
+            '--fields',
+            help='Comma separated fields to export (default: all)'
+        )
+        parser.add_argument(
+            '--source',
+            help='Export only articles from this source'
+        )
+        parser.add_argument(
+            '--source-match',
+            choices=list(SOURCE_MATCH_LOOKUPS),
+            default='prefix',
+            help='How --source is matched (default: prefix)'
+        )
+        parser.add_argument(
+            '--published-after',
+            help='Export articles published at or after this ISO 8601 date or datetime'
+        )
+        parser.add_argument(
+            '--published-before',
+            help='Export articles published before this ISO 8601 date or datetime'
+        )
+        parser.add_argument(
+            '--duplicates',
+            choices=DUPLICATES_MODES,
+            default='include',
+            help='Whether to export articles marked as duplicates of another one (default: include)'
+        )
+        parser.add_argument(
+            '--since-id',
+            type=int,
+            help='Export only articles with a greater id (incremental export)'
+        )
+        parser.add_argument(
+            '--since',
+            help='Export only articles added to the database at or after this ISO 8601 date or datetime'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows fetched from the server-side cursor at a time (default: {DEFAULT_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chunks = iter_export(options, options['format'], max(1, options['chunk_size']))
+        except ValidationError as e:
+            raise CommandError('; '.join(
+                f"{name}: {' '.join(messages)}" for name, messages in e.detail.items()
+            ))
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(chunks)
@@ -1,181 +1,922 @@
 from django.core.management.base import BaseCommand
-from articles.models import Article
+from django.utils import timezone
+from articles import caching, dates, fingerprints, search
+from articles.canonical import canonicalize_url, page_canonical_url
+from articles.encoding import TIERS, resolve_encoding
+from articles.extraction import DEFAULT_BACKEND, available_backends, extract, find_date_strings
+from articles.http_client import DEFAULT_TIMEOUT, build_session
+from articles.metadata import read_head
+from articles.metrics import ScrapeMetrics, serve as serve_metrics
+from articles.models import Article, ArticleContent
+from articles.politeness import Dispatcher, HostScheduler, host_of
+from articles.retries import CircuitBreaker, RetryPolicy
+from articles.sources import iter_batches, iter_sitemap, iter_urls_file
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from urllib.parse import urlparse
-from django.utils import timezone
-from dateutil import parser
-import re
+from argparse import ArgumentTypeError
+from collections import Counter
+from concurrent.futures import (
+    ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+from contextlib import ExitStack
+from datetime import timedelta
+import cProfile
+import hashlib
+import json
+from itertools import chain
+from multiprocessing import get_context
+import time
+import django
+from django.db import transaction
+from django.db.models import Q
+
+
+class ScrapeJob:
+    """State of a single input URL while its batch goes through the scraper."""
+
+    PENDING = 'pending'
+    EXISTS = 'exists'
+    DUPLICATE = 'duplicate'
+    DOWNLOAD_ERROR = 'download_error'
+    SAVE_ERROR = 'save_error'
+    SAVED = 'saved'
+    # Refresh runs (--refresh): stored articles that were downloaded again.
+    NOT_MODIFIED = 'not_modified'
+    UNCHANGED = 'unchanged'
+    UPDATED = 'updated'
+
+    def __init__(self, idx, url):
+        self.idx = idx
+        self.url = url
+        self.status = self.PENDING
+        self.canonical_url = canonicalize_url(url)
+        self.article = None
+        self.error = None
+        # URL of the article this one duplicates, see mark_duplicates().
+        self.duplicate_of = None
+        # The stored row being refreshed (a dict of REFRESH_COLUMNS).
+        self.stored = None
+        # HTTP validators and body hash of the download, saved with the article.
+        self.fetched = {}
+        # Download retries made so far.
+        self.attempts = 0
+        # Whether the page's markup states its publication date; dates from
+        # the text ("2 days ago") or the fallback (today) shift between runs.
+        self.date_in_markup = False
+
+
+# Stored columns a refresh compares the new download against.
+REFRESH_COLUMNS = (
+    'id', 'url', 'canonical_url', 'etag', 'last_modified', 'page_hash', 'content_hash', 'title',
+    'published_date', 'fetched_at',
+)
+
+# Columns rewritten when a refreshed article has changed.
+REFRESH_UPDATE_FIELDS = (
+    'title', 'published_date', 'etag', 'last_modified', 'page_hash', 'fetched_at',
+    'content_hash', 'simhash', 'simhash_band0', 'simhash_band1', 'simhash_band2', 'simhash_band3',
+)
+
+AGE_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_age(value):
+    """argparse type for ages like "90m", "12h" or "7d" (plain numbers are seconds)."""
+    value = value.strip().lower()
+    unit = value[-1:] if value[-1:] in AGE_UNITS else 's'
+    number = value[:-1] if value[-1:] in AGE_UNITS else value
+    try:
+        age = timedelta(**{AGE_UNITS[unit]: float(number)})
+    except ValueError:
+        raise ArgumentTypeError(f'invalid age: {value!r} (expected e.g. 3600, 90m, 12h, 7d)')
+    if age < timedelta(0):
+        raise ArgumentTypeError(f'invalid age: {value!r} (must not be negative)')
+    return age
+
+
+def parse_page(url, content, encoding, backend):
+    """
+    Entry point of the parse worker processes: decodes the body, extracts
+    the article and returns its fields as a plain dict, with the stage
+    timings for the main process's metrics.
+    """
+    timings = {}
+    html = str(content, encoding, errors='replace')
+    return Command().parse_record(url, html, backend, timings), timings
 
 
 class Command(BaseCommand):
     help = 'Scrapes articles and stores them in the database'
 
-    def parse_date(self, soup, text):
+    default_urls = [
+        "https://galicjaexpress.pl/ford-c-max-jaki-silnik-benzynowy-wybrac-aby-zaoszczedzic-na-paliwie",
+        "https://galicjaexpress.pl/bmw-e9-30-cs-szczegolowe-informacje-o-osiagach-i-historii-modelu",
+        "https://take-group.github.io/example-blog-without-ssr/jak-kroic-piers-z-kurczaka-aby-uniknac-suchych-kawalkow-miesa",
+        "https://take-group.github.io/example-blog-without-ssr/co-mozna-zrobic-ze-schabu-oprocz-kotletow-5-zaskakujacych-przepisow",
+    ]
 
-        now = timezone.now()
-        
-        meta_dates = [
-            soup.find('meta', property='article:published_time'),
-            soup.find('meta', {'name': 'publish-date'}),
-            soup.find('meta', {'name': 'date'}),
-            soup.find('time')
-        ]
-        
-        for meta in meta_dates:
-            if meta:
-                date_str = meta.get('content') or meta.get('datetime') or meta.get_text()
-                if date_str:
-                    try:
-                        parsed = parser.parse(date_str)
-                        if parsed.tzinfo is None:
-                            return timezone.make_aware(parsed)
-                        return parsed
-                    except:
-                        pass
-        
-        polish_months = {
-            'stycznia': '01', 'lutego': '02', 'marca': '03', 'kwietnia': '04',
-            'maja': '05', 'czerwca': '06', 'lipca': '07', 'sierpnia': '08',
-            'września': '09', 'października': '10', 'listopada': '11', 'grudnia': '12'
-        }
-        
-        pattern_pl = r'(\d{1,2})\s+(' + '|'.join(polish_months.keys()) + r')\s+(\d{4})'
-        match_pl = re.search(pattern_pl, text, re.IGNORECASE)
-        if match_pl:
-            day, month_name, year = match_pl.groups()
-            month = polish_months[month_name.lower()]
-            date_str = f"{year}-{month}-{day.zfill(2)}"
-            try:
-                parsed = parser.parse(date_str)
-                return timezone.make_aware(parsed.replace(hour=0, minute=0, second=0))
-            except:
-                pass
-        
-        pattern_en = r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})'
-        match_en = re.search(pattern_en, text, re.IGNORECASE)
-        if match_en:
-            try:
-                date_str = match_en.group()
-                parsed = parser.parse(date_str)
-                return timezone.make_aware(parsed.replace(hour=0, minute=0, second=0))
-            except:
-                pass
-        
-        match_iso = re.search(r'(\d{4})-(\d{2})-(\d{2})', text)
-        if match_iso:
-            try:
-                date_str = match_iso.group()
-                parsed = parser.parse(date_str)
-                return timezone.make_aware(parsed.replace(hour=0, minute=0, second=0))
-            except:
-                pass
-        
-        match_rel = re.search(r'(\d+)\s+(second|minute|hour|day)s?\s+ago', text, re.IGNORECASE)
-        if match_rel:
-            num = int(match_rel.group(1))
-            unit = match_rel.group(2).lower()
-            
-            if unit == 'second':
-                return now - timedelta(seconds=num)
-            elif unit == 'minute':
-                return now - timedelta(minutes=num)
-            elif unit == 'hour':
-                return now - timedelta(hours=num)
-            elif unit == 'day':
-                return now - timedelta(days=num)
-        
-        if re.search(r'\byesterday\b', text, re.IGNORECASE):
-            return (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Seconds between heartbeat() calls while waiting for downloads; None
+    # when no heartbeat is needed.
+    heartbeat_interval = None
+
+    def add_source_arguments(self, parser):
+        """Where the URLs come from; scrape_worker takes them from the crawl queue instead."""
+        parser.add_argument(
+            '--urls-file',
+            action='append',
+            default=[],
+            help='File with URLs to scrape, plain text or JSONL; "-" reads from stdin (repeatable)'
+        )
+        parser.add_argument(
+            '--sitemap',
+            action='append',
+            default=[],
+            help='Sitemap or sitemap index (URL or path, optionally gzipped) to scrape (repeatable)'
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Download stored articles again (conditionally) instead of skipping them, '
+                 'updating the ones that changed; without --urls-file/--sitemap refreshes all stored articles'
+        )
+        parser.add_argument(
+            '--refresh-older-than',
+            type=parse_age,
+            default=None,
+            metavar='AGE',
+            help='With --refresh, only articles last downloaded longer ago than AGE, e.g. 12h or 7d '
+                 '(implies --refresh)'
+        )
+
+    def add_arguments(self, parser):
+        self.add_source_arguments(parser)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of pages downloaded in parallel (default: 1)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of URLs checked against the database and inserted at once (default: 100)'
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=2,
+            help='Retries for connection errors, timeouts, 429 and 5xx responses (default: 2)'
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=0.5,
+            help='Base of the jittered exponential backoff between retries, in seconds (default: 0.5)'
+        )
+        parser.add_argument(
+            '--max-backoff',
+            type=float,
+            default=30.0,
+            help='Longest wait between retries, also caps Retry-After (default: 30)'
+        )
+        parser.add_argument(
+            '--breaker-threshold',
+            type=int,
+            default=5,
+            help='Consecutive failures after which a host is skipped; 0 disables (default: 5)'
+        )
+        parser.add_argument(
+            '--breaker-cooldown',
+            type=float,
+            default=60.0,
+            help='Seconds before a skipped host is probed again (default: 60)'
+        )
+        parser.add_argument(
+            '--host-concurrency',
+            type=int,
+            default=2,
+            help='Maximum concurrent requests to a single host (default: 2)'
+        )
+        parser.add_argument(
+            '--host-rate',
+            type=float,
+            default=None,
+            help='Maximum requests per second to a single host (default: no limit)'
+        )
+        parser.add_argument(
+            '--host-burst',
+            type=int,
+            default=1,
+            help='Requests to a single host allowed at once above --host-rate (default: 1)'
+        )
+        parser.add_argument(
+            '--ignore-robots',
+            action='store_true',
+            help='Do not read Crawl-delay from robots.txt'
+        )
+        parser.add_argument(
+            '--duplicates',
+            choices=['link', 'skip', 'keep'],
+            default='link',
+            help='Articles with the same or nearly the same content as a stored one: '
+                 'save them linked to the original, skip them, or keep them unmarked (default: link)'
+        )
+        parser.add_argument(
+            '--near-duplicate-distance',
+            type=int,
+            default=fingerprints.MAX_DISTANCE,
+            help=f'Maximum SimHash bit difference of near-duplicates, 0 to {fingerprints.MAX_DISTANCE}; '
+                 f'0 matches identical fingerprints only (default: {fingerprints.MAX_DISTANCE})'
+        )
+        parser.add_argument(
+            '--parse-workers',
+            type=int,
+            default=0,
+            help='Number of processes parsing pages; 0 parses in the main process (default: 0)'
+        )
+        parser.add_argument(
+            '--parser',
+            choices=available_backends(),
+            default=DEFAULT_BACKEND,
+            help=f'HTML parser backend (default: {DEFAULT_BACKEND})'
+        )
+        parser.add_argument(
+            '--profile',
+            metavar='PATH',
+            help='Profile the run with cProfile and write the stats to PATH (read with pstats or snakeviz)'
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            default=None,
+            help='Serve the run\'s metrics in the Prometheus text format on this port'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=DEFAULT_TIMEOUT,
+            help=f'HTTP timeout in seconds (default: {DEFAULT_TIMEOUT})'
+        )
+        parser.add_argument(
+            '--pool-connections',
+            type=int,
+            default=10,
+            help='Number of per-host keep-alive connection pools (default: 10)'
+        )
+        parser.add_argument(
+            '--pool-maxsize',
+            type=int,
+            default=None,
+            help='Connections kept alive per host (default: same as --concurrency)'
+        )
+
+    def parse_date(self, soup, text):
+        return dates.parse_date(find_date_strings(soup), text)
 
     def clean_text(self, text):
         if not text:
             return ""
         return text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
 
-    def handle(self, *args, **options):
-        urls = [
-            "https://galicjaexpress.pl/ford-c-max-jaki-silnik-benzynowy-wybrac-aby-zaoszczedzic-na-paliwie",
-            "https://galicjaexpress.pl/bmw-e9-30-cs-szczegolowe-informacje-o-osiagach-i-historii-modelu",
-            "https://take-group.github.io/example-blog-without-ssr/jak-kroic-piers-z-kurczaka-aby-uniknac-suchych-kawalkow-miesa",
-            "https://take-group.github.io/example-blog-without-ssr/co-mozna-zrobic-ze-schabu-oprocz-kotletow-5-zaskakujacych-przepisow",
+    def download(self, url, headers=None):
+        """
+        Downloads a page once the host's scheduler slot has been taken (see
+        politeness.Dispatcher). Transient failures count towards the host's
+        circuit breaker; once it opens, further URLs of that host fail at
+        once instead of waiting on timeouts. Retries are queued again by the
+        dispatcher (see retry_delay()), so no download thread sleeps through
+        a backoff.
+        `headers` are extra request headers (conditional requests).
+        """
+        host = host_of(url)
+        self.breaker.check(host)
+        self.scheduler.prepare(url)
+        try:
+            started = time.perf_counter()
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            self.metrics.stage_seconds.observe(time.perf_counter() - started, stage='download')
+            response.raise_for_status()
+        except Exception as e:
+            if self.retry_policy.is_transient(e):
+                self.breaker.record_failure(host)
+            else:
+                self.breaker.record_success(host)
+            raise
+        self.breaker.record_success(host)
+
+        elapsed = getattr(response, 'elapsed', None)
+        if isinstance(elapsed, timedelta):
+            self.metrics.stage_seconds.observe(elapsed.total_seconds(), stage='response')
+        if response.status_code == 304:
+            return response, None
+        self.metrics.downloaded_bytes.inc(len(response.content))
+        with self.metrics.stage_seconds.time(stage='encoding'):
+            response.encoding, tier = resolve_encoding(response.content, response.headers.get('Content-Type'))
+        return response, tier
+
+    def parse_record(self, url, html, backend=DEFAULT_BACKEND, timings=None):
+        """
+        Article fields of a page; stage durations go to `timings` if given.
+        Title, date and canonical link come from the <head> metadata when
+        it has them; the date candidates of the whole document and the
+        page text are only looked at when it has no parseable date. When
+        the end of <head> was never found the head parser may have missed
+        tags, so the whole document's candidates go first.
+        """
+        start = time.perf_counter()
+        head = read_head(html)
+        read = time.perf_counter()
+        page = extract(html, backend)
+        parsed = time.perf_counter()
+        if head.complete:
+            markup_date = (
+                dates.parse_meta_dates(head.date_strings) or dates.parse_meta_dates(page.date_strings)
+            )
+        else:
+            markup_date = dates.parse_meta_dates(list(dict.fromkeys(page.date_strings + head.date_strings)))
+        published_date = markup_date or dates.parse_date((), page.text)
+        if timings is not None:
+            timings['metadata'] = read - start
+            timings['parse'] = parsed - read
+            timings['dates'] = time.perf_counter() - parsed
+
+        return {
+            'title': self.clean_text(head.best_title() or page.title),
+            'content_html': self.clean_text(page.content_html),
+            'content_text': self.clean_text(page.content_text),
+            'url': url,
+            'canonical_url': page_canonical_url(url, head.canonical or page.canonical),
+            'source': urlparse(url).netloc,
+            'published_date': published_date,
+            'date_in_markup': markup_date is not None,
+        }
+
+    def build_article(self, job, record):
+        """
+        Unsaved Article from a parse_record() dict and the job's download
+        metadata, with its derived fields. A refreshed article keeps the id
+        and canonical URL of its stored row.
+        """
+        record = dict(record)
+        job.date_in_markup = record.pop('date_in_markup')
+        article = Article(**record, **job.fetched)
+        if job.stored is not None:
+            article.pk = job.stored['id']
+            article.canonical_url = job.stored['canonical_url']
+        article.set_derived_fields()
+        return article
+
+    def mark_existing(self, jobs):
+        """
+        Marks jobs whose URL or canonical URL is already stored (one query
+        for the whole batch) or repeated earlier in the same batch, so URL
+        variants (tracking parameters, fragments, ...) are not downloaded.
+        In refresh runs stored articles stay pending, with their stored row
+        attached, unless they were downloaded after the --refresh-older-than
+        cutoff.
+        """
+        rows = Article.objects.filter(
+            Q(url__in={job.url for job in jobs})
+            | Q(canonical_url__in={job.canonical_url for job in jobs})
+        )
+        if self.refresh:
+            rows = list(rows.values(*REFRESH_COLUMNS))
+        else:
+            rows = [dict(url=url, canonical_url=canonical) for url, canonical in rows.values_list('url', 'canonical_url')]
+        by_url = {}
+        for row in rows:
+            by_url.setdefault(row['url'], row)
+            by_url.setdefault(row['canonical_url'], row)
+
+        seen = set()
+        for job in jobs:
+            row = by_url.get(job.url) or by_url.get(job.canonical_url)
+            if job.url in seen or job.canonical_url in seen:
+                job.status = ScrapeJob.EXISTS
+            elif row is not None and (not self.refresh or self.is_fresh(row)):
+                job.status = ScrapeJob.EXISTS
+            else:
+                job.stored = row
+            seen.update((job.url, job.canonical_url))
+
+    def is_fresh(self, row):
+        """True if a stored row was downloaded after the refresh cutoff."""
+        return (
+            self.refresh_cutoff is not None and row['fetched_at'] is not None
+            and row['fetched_at'] >= self.refresh_cutoff
+        )
+
+    def conditional_headers(self, job):
+        """If-None-Match / If-Modified-Since for refreshing a stored article."""
+        headers = {}
+        if job.stored is not None:
+            if job.stored['etag']:
+                headers['If-None-Match'] = job.stored['etag']
+            if job.stored['last_modified']:
+                headers['If-Modified-Since'] = job.stored['last_modified']
+        return headers or None
+
+    def mark_existing_canonical(self, jobs):
+        """
+        Marks downloaded pages whose rel="canonical" link names an article
+        that is already stored or parsed earlier in the batch. The database
+        is queried only for links that differ from the job's own URL.
+        """
+        parsed = [
+            job for job in jobs
+            if job.status == ScrapeJob.PENDING and job.article is not None and job.stored is None
         ]
-        
-        total = len(urls)
-        
-        for idx, url in enumerate(urls, start=1):
-            self.stdout.write(f"\nScraping article {idx}/{total}: {url}")
-            
-            if Article.objects.filter(url=url).exists():
-                self.stdout.write(self.style.WARNING("Article already exists in database. Skipping."))
+        linked = {job.article.canonical_url for job in parsed} - {job.canonical_url for job in parsed}
+        stored = set()
+        if linked:
+            stored = set(Article.objects.filter(canonical_url__in=linked).values_list('canonical_url', flat=True))
+        for job in parsed:
+            if job.article.canonical_url in stored:
+                job.status = ScrapeJob.EXISTS
+                job.article = None
+            else:
+                stored.add(job.article.canonical_url)
+
+    def retry_delay(self, job, error):
+        """Backoff before retrying a failed download, or None if it is not retried."""
+        if not self.retry_policy.is_transient(error) or job.attempts >= self.retry_policy.retries:
+            return None
+        delay = self.retry_policy.delay(job.attempts, getattr(error, 'response', None))
+        job.attempts += 1
+        return delay
+
+    def start_batch(self, jobs):
+        """
+        Marks the stored articles of a batch and queues its downloads. They
+        start at once, while the previous batch is still being parsed and
+        saved, so the download threads do not wait for the database. (A URL
+        repeated in the previous batch is therefore downloaded again; its
+        insert is then skipped as a conflict and reported as existing.)
+        """
+        with self.metrics.stage_seconds.time(stage='existing'):
+            self.mark_existing(jobs)
+        for job in jobs:
+            if job.status == ScrapeJob.PENDING:
+                self.downloading.add(job)
+                self.dispatcher.submit(job.url, job)
+
+    def fetch_and_parse(self, jobs):
+        """
+        Waits for the downloads of a batch and parses pages as they arrive,
+        also those of the next batch that finish in the meantime.
+        The dispatcher thread hands a job to the download threads (at most
+        --concurrency at a time) only when its host has a free slot and a
+        token, round-robin across hosts, and failed attempts wait out their
+        backoff in its queue. A host held back by its politeness limits
+        never ties up a download thread, so it does not slow down the others.
+        Without parse workers pages are parsed in this thread. With them, the
+        bodies go to the process pool, at most 2 * --parse-workers at a time:
+        when that many are queued, the next body waits for a parse result.
+        """
+        remaining = self.downloading.intersection(jobs)
+        parsing = {}
+        while remaining:
+            finished = self.dispatcher.get(timeout=self.heartbeat_interval)
+            if self.heartbeat_interval is not None:
+                self.heartbeat()
+            if finished is None:
                 continue
-            
+            job, future = finished
+            self.downloading.discard(job)
+            remaining.discard(job)
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0',
-                    'Accept': '*/*',
-                    'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
-                    'Accept-Encoding': '*/*',
-                    'DNT': '1',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1'
-                }
-                response = requests.get(url, timeout=10, headers=headers)
-                response.raise_for_status()
-                response.encoding = response.apparent_encoding
+                response, tier = future.result()
             except Exception as e:
-                self.stderr.write(self.style.ERROR(f"Download error: {e}"))
+                job.status = ScrapeJob.DOWNLOAD_ERROR
+                job.error = e
                 continue
+            self.handle_download(job, response, tier, parsing)
+        self.collect_parsed(parsing, ALL_COMPLETED)
+
+    def handle_download(self, job, response, tier, parsing):
+        """Records a finished download and parses its page (see fetch_and_parse())."""
+        job.fetched = {'fetched_at': timezone.now()}
+        if tier is None:
+            # 304 Not Modified: nothing to parse.
+            job.status = ScrapeJob.NOT_MODIFIED
+            return
+        self.encoding_tiers[tier] += 1
+        job.fetched.update(
+            etag=response.headers.get('ETag') or '',
+            last_modified=response.headers.get('Last-Modified') or '',
+            page_hash=hashlib.sha256(response.content).hexdigest(),
+        )
+        if job.stored is not None and job.fetched['page_hash'] == job.stored['page_hash']:
+            job.status = ScrapeJob.UNCHANGED
+            return
+
+        if self.parse_pool is None:
+            timings = {}
+            record = self.parse_record(job.url, response.text, self.parser_backend, timings)
+            self.observe_timings(timings)
+            job.article = self.build_article(job, record)
+            return
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+        if len(parsing) >= self.parse_window:
+            self.collect_parsed(parsing, FIRST_COMPLETED)
+        parse_future = self.parse_pool.submit(
+            parse_page, job.url, response.content, response.encoding, self.parser_backend
+        )
+        parsing[parse_future] = job
 
-            title_tag = soup.find('title')
-            title = title_tag.get_text(strip=True) if title_tag else 'No title'
-            title = self.clean_text(title)
+    def collect_parsed(self, parsing, return_when):
+        if not parsing:
+            return
+        done, _ = wait(parsing, return_when=return_when)
+        for future in done:
+            job = parsing.pop(future)
+            record, timings = future.result()
+            self.observe_timings(timings)
+            job.article = self.build_article(job, record)
 
-            content_elem = (
-                soup.find('article') or
-                soup.find('div', class_='post-content') or
-                soup.find('div', class_='entry-content') or
-                soup.find('main')
+    def observe_timings(self, timings):
+        for stage, seconds in timings.items():
+            self.metrics.stage_seconds.observe(seconds, stage=stage)
+
+    def mark_duplicates(self, jobs):
+        """
+        Finds parsed articles whose content repeats a stored article or an
+        earlier one of the batch: the same content hash, or a SimHash at most
+        --near-duplicate-distance bits away. Such a SimHash shares at least
+        one band with the article's, so stored matches come from the indexed
+        hash and band columns, with the distances checked by the database
+        (see ArticleQuerySet.near_duplicates()). Duplicates point at the
+        original, never at another duplicate.
+        """
+        parsed = [
+            job for job in jobs
+            if job.article is not None and job.stored is None and job.article.content_hash
+        ]
+        if self.duplicates == 'keep' or not parsed:
+            return
+
+        # Two queries rather than one with OR, which would keep PostgreSQL
+        # from using the indexes.
+        simhashes = {job.article.simhash for job in parsed} - {None}
+        queries = [Article.objects.filter(content_hash__in={job.article.content_hash for job in parsed})]
+        if simhashes:
+            queries.append(Article.objects.near_duplicates(simhashes, self.max_distance))
+        candidates = {
+            row['id']: row
+            for queryset in queries
+            for row in queryset.values(
+                'id', 'url', 'content_hash', 'simhash', 'duplicate_of_id', 'duplicate_of__url'
             )
-            
-            if content_elem:
-                content_html = str(content_elem)
-                content_text = content_elem.get_text(separator=' ', strip=True)
+        }
+
+        # Originals by hash and by (band number, band value); an original
+        # is a stored Article or a ScrapeJob of this batch.
+        by_hash = {}
+        by_band = {}
+
+        def add_original(content_hash, value, original):
+            by_hash.setdefault(content_hash, original)
+            if value is not None:
+                for key in enumerate(fingerprints.bands(value)):
+                    by_band.setdefault(key, []).append((value, original))
+
+        def find_original(article):
+            if article.content_hash in by_hash:
+                return by_hash[article.content_hash]
+            if article.simhash is None:
+                return None
+            for key in enumerate(fingerprints.bands(article.simhash)):
+                for value, original in by_band.get(key, ()):
+                    if fingerprints.distance(value, article.simhash) <= self.max_distance:
+                        return original
+            return None
+
+        for _, row in sorted(candidates.items()):
+            if row['duplicate_of_id'] is not None:
+                original = Article(id=row['duplicate_of_id'], url=row['duplicate_of__url'])
             else:
-                content_html = response.text
-                content_text = soup.get_text(separator=' ', strip=True)
+                original = Article(id=row['id'], url=row['url'])
+            add_original(row['content_hash'], row['simhash'], original)
+        for job in parsed:
+            original = find_original(job.article)
+            if original is None:
+                add_original(job.article.content_hash, job.article.simhash, job)
+                continue
+            job.duplicate_of = original.url
+            if self.duplicates == 'skip':
+                job.status = ScrapeJob.DUPLICATE
+            elif isinstance(original, Article):
+                job.article.duplicate_of = original
+            # Originals from this batch are linked in insert_articles().
+
+    def save_articles(self, jobs):
+        """
+        Inserts the new articles of a batch with a single bulk_create and
+        writes the results of refresh downloads (see save_refreshed()).
+        If a batch write fails, rows are retried one by one in savepoints
+        so the error can be reported against the URL that caused it.
+        """
+        self.save_refreshed(jobs)
+        self.write_batch(
+            [job for job in jobs if job.status == ScrapeJob.PENDING and job.article is not None],
+            self.insert_articles,
+        )
+        # bulk_create() and bulk_update() send no post_save signals, so the
+        # API response cache is invalidated here, once per batch.
+        if any(job.status in (ScrapeJob.SAVED, ScrapeJob.UPDATED) for job in jobs):
+            caching.bump_version()
 
-            content_html = self.clean_text(content_html)
-            content_text = self.clean_text(content_text)
+    def write_batch(self, jobs, write):
+        if not jobs:
+            return
+        try:
+            with transaction.atomic():
+                write(jobs)
+        except Exception:
+            with transaction.atomic():
+                for job in jobs:
+                    try:
+                        with transaction.atomic():
+                            write([job])
+                    except Exception as e:
+                        job.status = ScrapeJob.SAVE_ERROR
+                        job.error = e
 
-            text = soup.get_text(separator=' ', strip=True)
-            published_date = self.parse_date(soup, text)
+    def save_refreshed(self, jobs):
+        """
+        Refreshed articles whose title, publication date or text changed are
+        rewritten by update_articles(). For the others (304 responses, an
+        identical body, or a new body with the same extracted title, date and
+        text) only the download metadata is updated, with one bulk_update for
+        the batch. A date counts only when the markup states it: with the
+        same text, any other date differs only because time has passed.
+        """
+        refreshed = [job for job in jobs if job.stored is not None and job.fetched]
+        for job in refreshed:
+            article = job.article
+            if (job.status == ScrapeJob.PENDING and article is not None
+                    and article.title == job.stored['title']
+                    and (article.published_date == job.stored['published_date'] or not job.date_in_markup)
+                    and article.content_hash == job.stored['content_hash']):
+                job.status = ScrapeJob.UNCHANGED
+        touched = [job for job in refreshed if job.status in (ScrapeJob.NOT_MODIFIED, ScrapeJob.UNCHANGED)]
+        if touched:
+            fields = ('etag', 'last_modified', 'page_hash', 'fetched_at')
+            Article.objects.bulk_update([
+                Article(id=job.stored['id'], **{name: job.fetched.get(name, job.stored.get(name)) for name in fields})
+                for job in touched
+            ], fields)
+        self.write_batch(
+            [job for job in refreshed if job.status == ScrapeJob.PENDING and job.article is not None],
+            self.update_articles,
+        )
 
-            source = urlparse(url).netloc
+    def update_articles(self, jobs):
+        """Rewrites changed articles, their content rows and search vectors."""
+        Article.objects.bulk_update([job.article for job in jobs], REFRESH_UPDATE_FIELDS)
+        ArticleContent.objects.bulk_update([
+            ArticleContent(
+                article_id=job.article.pk,
+                content_html=job.article.content_html,
+                content_text=job.article.content_text,
+            )
+            for job in jobs
+        ], ['content_html', 'content_text'])
+        search.update_search_vectors(Article.objects.filter(id__in=[job.article.pk for job in jobs]))
+        for job in jobs:
+            job.status = ScrapeJob.UPDATED
+
+    def insert_articles(self, jobs):
+        """
+        bulk_create() skips save(), so the content rows and search vectors
+        of the new articles are written here: the ids of the inserted rows
+        (not returned with ignore_conflicts) are looked up by URL, then the
+        contents go in with one more bulk_create and the vectors with one
+        UPDATE. Duplicates of articles inserted in the same batch get their
+        duplicate_of link once the original's id is known. Rows skipped as
+        conflicts (the URL or canonical URL was stored in the meantime) are
+        reported as existing.
+        """
+        Article.objects.bulk_create([job.article for job in jobs], ignore_conflicts=True)
+        urls = [job.url for job in jobs]
+        ids = dict(
+            Article.objects.filter(url__in=urls, content__isnull=True).values_list('url', 'id')
+        )
+        ArticleContent.objects.bulk_create([
+            ArticleContent(
+                article_id=ids[job.url],
+                content_html=job.article.content_html,
+                content_text=job.article.content_text,
+            )
+            for job in jobs if job.url in ids
+        ])
+        search.update_search_vectors(Article.objects.filter(id__in=list(ids.values())))
+
+        linked = [
+            job for job in jobs
+            if job.url in ids and job.duplicate_of and job.article.duplicate_of_id is None
+        ]
+        if linked:
+            originals = dict(ids)
+            missing = {job.duplicate_of for job in linked} - originals.keys()
+            if missing:
+                # Originals saved by an earlier insert_articles() call.
+                originals.update(Article.objects.filter(url__in=missing).values_list('url', 'id'))
+            Article.objects.bulk_update([
+                Article(id=ids[job.url], duplicate_of_id=originals[job.duplicate_of])
+                for job in linked if job.duplicate_of in originals
+            ], ['duplicate_of'])
+
+        for job in jobs:
+            job.status = ScrapeJob.SAVED if job.url in ids else ScrapeJob.EXISTS
+
+    def report(self, job, total):
+        position = f"{job.idx}/{total}" if total is not None else job.idx
+        self.stdout.write(f"\nScraping article {position}: {job.url}")
+
+        if job.status == ScrapeJob.EXISTS:
+            self.stdout.write(self.style.WARNING("Article already exists in database. Skipping."))
+        elif job.status == ScrapeJob.NOT_MODIFIED:
+            self.stdout.write(self.style.WARNING("Article not modified since the last download. Skipping."))
+        elif job.status == ScrapeJob.UNCHANGED:
+            self.stdout.write(self.style.WARNING("Article unchanged. Skipping."))
+        elif job.status == ScrapeJob.DUPLICATE:
+            self.stdout.write(self.style.WARNING(f"Duplicate of {job.duplicate_of}. Skipping."))
+        elif job.status == ScrapeJob.DOWNLOAD_ERROR:
+            self.stderr.write(self.style.ERROR(f"Download error: {job.error}"))
+        elif job.status == ScrapeJob.SAVE_ERROR:
+            self.stderr.write(self.style.ERROR(f"Database save error: {job.error}"))
+        elif job.status in (ScrapeJob.SAVED, ScrapeJob.UPDATED):
+            article = job.article
+            date_formatted = article.published_date.strftime('%d.%m.%Y %H:%M:%S')
+            action = "updated" if job.status == ScrapeJob.UPDATED else "saved"
+            self.stdout.write(self.style.SUCCESS(f"Successfully {action} article"))
+            self.stdout.write(f"  Title: {article.title[:60]}...")
+            self.stdout.write(f"  Date: {date_formatted}")
+            self.stdout.write(f"  Source: {article.source}")
+            if job.duplicate_of:
+                self.stdout.write(f"  Duplicate of: {job.duplicate_of}")
+
+    def get_urls(self, options):
+        """
+        Returns the URLs to scrape and their count. File, stdin and sitemap
+        sources are chained lazily, so their count is unknown (None).
+        A refresh without sources goes over the stored articles, streamed
+        from a server-side cursor.
+        """
+        sources = [iter_urls_file(path) for path in options.get('urls_file') or []]
+        sources += [
+            iter_sitemap(location, session=self.session, timeout=self.timeout)
+            for location in options.get('sitemap') or []
+        ]
+        if not sources and self.refresh:
+            stored = Article.objects.order_by('id')
+            if self.refresh_cutoff is not None:
+                stored = stored.filter(Q(fetched_at__isnull=True) | Q(fetched_at__lt=self.refresh_cutoff))
+            return stored.values_list('url', flat=True).iterator(chunk_size=2000), stored.count()
+        if not sources:
+            return self.default_urls, len(self.default_urls)
+        return chain.from_iterable(sources), None
+
+    def iter_jobs(self, options, batch_size):
+        """Batches of ScrapeJobs to process; scrape_worker claims them from the crawl queue instead."""
+        urls, self.total = self.get_urls(options)
+        for batch in iter_batches(enumerate(urls, start=1), batch_size):
+            yield [ScrapeJob(idx, url) for idx, url in batch]
+
+    def process_batch(self, jobs):
+        """Finishes a batch queued by start_batch(): parses, saves and reports it."""
+        stage = self.metrics.stage_seconds.time
+        self.fetch_and_parse(jobs)
+        with stage(stage='existing'):
+            self.mark_existing_canonical(jobs)
+        with stage(stage='duplicates'):
+            self.mark_duplicates(jobs)
+        with stage(stage='save'):
+            self.save_articles(jobs)
+        for job in jobs:
+            self.metrics.pages.inc(status=job.status)
+            if job.status == ScrapeJob.DOWNLOAD_ERROR:
+                self.metrics.errors.inc(host=host_of(job.url), stage='download')
+            elif job.status == ScrapeJob.SAVE_ERROR:
+                self.metrics.errors.inc(host=host_of(job.url), stage='save')
+            self.report(job, self.total)
+        self.batch_done(jobs)
+
+    def batch_done(self, jobs):
+        """Called when a batch is saved and reported; scrape_worker records its results."""
+
+    def heartbeat(self):
+        """
+        Called from the main thread at least every heartbeat_interval seconds
+        while it waits for downloads; scrape_worker renews its leases.
+        """
+
+    def handle(self, *args, **options):
+        """
+        Runs the scraper; with --profile the main thread runs under cProfile
+        (download threads and parse workers are not profiled).
+        """
+        self.metrics = ScrapeMetrics()
+        metrics_server = None
+        if options.get('metrics_port'):
+            metrics_server = serve_metrics(self.metrics, options['metrics_port'])
+        profiler = cProfile.Profile() if options.get('profile') else None
+        try:
+            if profiler is not None:
+                profiler.runcall(self.run, options)
+            else:
+                self.run(options)
+        finally:
+            if profiler is not None:
+                profiler.dump_stats(options['profile'])
+                self.stderr.write(f"Profile written to {options['profile']}")
+            if metrics_server is not None:
+                metrics_server.shutdown()
+                metrics_server.server_close()
+
+    def run(self, options):
+        concurrency = max(1, options.get('concurrency') or 1)
+        batch_size = max(1, options.get('batch_size') or 100)
+        self.timeout = options.get('timeout') or DEFAULT_TIMEOUT
+        self.parser_backend = options.get('parser') or DEFAULT_BACKEND
+        self.session = build_session(
+            pool_connections=options.get('pool_connections') or 10,
+            pool_maxsize=options.get('pool_maxsize') or concurrency,
+        )
+        self.scheduler = HostScheduler(
+            session=self.session,
+            rate=options.get('host_rate'),
+            burst=max(1, options.get('host_burst') or 1),
+            max_in_flight=max(1, options.get('host_concurrency') or 2),
+            respect_robots=not options.get('ignore_robots'),
+            user_agent=self.session.headers['User-Agent'],
+            timeout=self.timeout,
+        )
+        self.retry_policy = RetryPolicy(
+            retries=max(0, options['retries']),
+            backoff=options['backoff'],
+            max_backoff=options['max_backoff'],
+        )
+        self.breaker = CircuitBreaker(
+            threshold=max(0, options['breaker_threshold']),
+            cooldown=options['breaker_cooldown'],
+        )
+        parse_workers = max(0, options.get('parse_workers') or 0)
+        refresh_age = options.get('refresh_older_than')
+        self.refresh = bool(options.get('refresh')) or refresh_age is not None
+        self.refresh_cutoff = timezone.now() - refresh_age if refresh_age is not None else None
+        self.duplicates = options.get('duplicates') or 'link'
+        distance = options.get('near_duplicate_distance')
+        self.max_distance = min(max(0, fingerprints.MAX_DISTANCE if distance is None else distance), fingerprints.MAX_DISTANCE)
+        self.encoding_tiers = Counter()
+
+        with ExitStack() as stack:
+            stack.enter_context(self.session)
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=concurrency))
+            self.parse_pool = None
+            if parse_workers:
+                # spawn, not fork: the download threads are already running.
+                self.parse_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=parse_workers,
+                    mp_context=get_context('spawn'),
+                    initializer=django.setup,
+                ))
+                self.parse_window = parse_workers * 2
+
+            self.dispatcher = Dispatcher(
+                self.scheduler, executor,
+                fetch=lambda job: self.download(job.url, self.conditional_headers(job)),
+                retry_delay=self.retry_delay,
+                limit=concurrency,
+            )
+            stack.callback(self.dispatcher.close)
+            self.downloading = set()
+
+            # One batch ahead: the next batch downloads while this one is
+            # parsed and saved.
+            batches = self.iter_jobs(options, batch_size)
+            jobs = next(batches, None)
+            if jobs is not None:
+                self.start_batch(jobs)
+            while jobs is not None:
+                upcoming = next(batches, None)
+                if upcoming is not None:
+                    self.start_batch(upcoming)
+                if jobs:
+                    self.process_batch(jobs)
+                jobs = upcoming
 
-            try:
-                article = Article.objects.create(
-                    title=title,
-                    content_html=content_html,
-                    content_text=content_text,
-                    url=url,
-                    source=source,
-                    published_date=published_date
-                )
-
-                date_formatted = published_date.strftime('%d.%m.%Y %H:%M:%S')
-                self.stdout.write(self.style.SUCCESS(f"Successfully saved article"))
-                self.stdout.write(f"  Title: {title[:60]}...")
-                self.stdout.write(f"  Date: {date_formatted}")
-                self.stdout.write(f"  Source: {source}")
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(f"Database save error: {e}"))
-        
         self.stdout.write(self.style.SUCCESS(f"\n{'='*60}"))
         self.stdout.write(self.style.SUCCESS(f"Scraping completed!"))
-        self.stdout.write(self.style.SUCCESS(f"Total articles in database: {Article.objects.count()}"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"Total articles in database: {Article.objects.count()}"))
+        if self.encoding_tiers:
+            tiers = ', '.join(f"{tier}={self.encoding_tiers[tier]}" for tier in TIERS if self.encoding_tiers[tier])
+            self.stdout.write(f"Encoding resolved by: {tiers}")
+        if self.refresh:
+            refreshed = (ScrapeJob.UPDATED, ScrapeJob.UNCHANGED, ScrapeJob.NOT_MODIFIED)
+            self.stdout.write("Refreshed: " + ', '.join(f"{status}={self.metrics.pages.get(status=status)}" for status in refreshed))
+        summary = self.metrics.summary()
+        summary['encoding_tiers'] = dict(self.encoding_tiers)
+        self.stdout.write(json.dumps(summary))
@@ -0,0 +1,114 @@
+import os
+import signal
+import socket
+import time
+from collections import deque
+
+from articles import crawl_queue
+from articles.management.commands.scrape_articles import Command as ScrapeCommand, ScrapeJob
+
+
+class Command(ScrapeCommand):
+    help = (
+        'Scrapes URLs from the crawl queue (see enqueue_urls). Any number of '
+        'workers can run at once; each claims its own batches.'
+    )
+
+    def add_source_arguments(self, parser):
+        # The crawl queue is the only source; --urls-file, --sitemap and
+        # --refresh are not accepted.
+        pass
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--worker-id',
+            default=None,
+            help='Name recorded on claimed jobs (default: host name and process id)'
+        )
+        parser.add_argument(
+            '--lease',
+            type=float,
+            default=crawl_queue.DEFAULT_LEASE,
+            help=f'Seconds a claimed batch is reserved before other workers may take it over; '
+                 f'renewed while the batch is in progress (default: {crawl_queue.DEFAULT_LEASE})'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=crawl_queue.DEFAULT_MAX_ATTEMPTS,
+            help=f'Claims of a job before it is marked failed (default: {crawl_queue.DEFAULT_MAX_ATTEMPTS})'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=5.0,
+            help='Seconds to wait before polling an empty queue again (default: 5)'
+        )
+        parser.add_argument(
+            '--exit-when-empty',
+            action='store_true',
+            help='Stop when there is nothing to claim instead of waiting for new jobs'
+        )
+
+    def iter_jobs(self, options, batch_size):
+        """
+        Claims batches from the crawl queue until it is empty (with
+        --exit-when-empty) or the process gets SIGTERM/SIGINT; the claimed
+        batches are always finished and their results recorded first (by
+        batch_done(): run() asks for the next batch before it processes the
+        current one). An empty batch lets the current one be processed
+        before waiting for new jobs.
+        """
+        self.worker = options.get('worker_id') or f'{socket.gethostname()}:{os.getpid()}'
+        self.lease = max(1.0, options['lease'])
+        self.heartbeat_interval = self.lease / 3
+        self.max_attempts = max(1, options['max_attempts'])
+        self.claimed = deque()
+        self.renewed_at = time.monotonic()
+        self.total = None
+        while not self.stopping:
+            if not self.claimed:
+                self.renewed_at = time.monotonic()
+            crawl_jobs = crawl_queue.claim(self.worker, batch_size, lease=self.lease, max_attempts=self.max_attempts)
+            if not crawl_jobs:
+                if options['exit_when_empty']:
+                    return
+                yield []
+                time.sleep(options['idle_sleep'])
+                continue
+            jobs = [ScrapeJob(crawl_job.id, crawl_job.url) for crawl_job in crawl_jobs]
+            self.claimed.append(crawl_jobs)
+            yield jobs
+
+    def batch_done(self, jobs):
+        crawl_jobs = self.claimed.popleft()
+        crawl_queue.complete(
+            self.worker, crawl_jobs, {job.idx: (job.status, job.error) for job in jobs},
+            max_attempts=self.max_attempts,
+        )
+
+    def heartbeat(self):
+        """
+        Renews the leases of the claimed batches (the current one and the
+        one downloading ahead of it) once a third of the lease has passed
+        since the last renewal, so a slow batch is never taken over by
+        another worker while this one is still working on it.
+        """
+        if time.monotonic() - self.renewed_at < self.lease / 3:
+            return
+        ids = [crawl_job.id for crawl_jobs in self.claimed for crawl_job in crawl_jobs]
+        crawl_queue.renew(self.worker, ids, lease=self.lease)
+        self.renewed_at = time.monotonic()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        handlers = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            super().handle(*args, **options)
+        finally:
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
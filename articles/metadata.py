@@ -0,0 +1,200 @@
+import json
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+
+# The document is fed to the parser in chunks of this size, so a page is
+# read only up to a chunk past the end of its <head>.
+CHUNK_SIZE = 8192
+
+# Elements allowed in <head>; any other start tag means the body started
+# (also when the page omits </head> and <body>).
+HEAD_TAGS = frozenset((
+    'html', 'head', 'title', 'base', 'link', 'meta', 'style', 'script', 'noscript', 'template',
+))
+
+# Head elements whose content is skipped.
+FALLBACK_TAGS = frozenset(('noscript', 'template'))
+
+# Publication date <meta> tags, by (attribute, lowercased value), in the
+# order they are preferred. JSON-LD datePublished comes right after the
+# first one.
+DATE_META = (
+    ('property', 'article:published_time'),
+    ('property', 'og:published_time'),
+    ('name', 'publish-date'),
+    ('name', 'date'),
+    ('name', 'pubdate'),
+    ('itemprop', 'datepublished'),
+)
+
+# JSON-LD @types describing the page's article. A WebPage object is used
+# only when there is no article object.
+ARTICLE_TYPES = frozenset((
+    'Article', 'NewsArticle', 'BlogPosting', 'Report', 'ScholarlyArticle', 'TechArticle',
+    'AnalysisNewsArticle', 'OpinionNewsArticle', 'ReviewNewsArticle', 'LiveBlogPosting',
+))
+PAGE_TYPES = frozenset(('WebPage', 'ItemPage'))
+
+
+@dataclass
+class HeadMetadata:
+    # <title>, og:title and the JSON-LD headline; None when missing.
+    title: str = None
+    og_title: str = None
+    headline: str = None
+    # Publication date candidates in the order they are preferred.
+    date_strings: list = field(default_factory=list)
+    # href of <link rel="canonical">, as written in the page.
+    canonical: str = None
+    # Whether the end of <head> was reached; when not, the page was
+    # malformed and the body may hold further metadata.
+    complete: bool = False
+
+    def best_title(self):
+        return self.title or self.og_title or self.headline
+
+
+class _EndOfHead(Exception):
+    pass
+
+
+class HeadParser(HTMLParser):
+    """Collects metadata from <head> and stops at its end."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts = None
+        self.title = None
+        self.meta = {}
+        self.canonical = None
+        self.json_ld_parts = None
+        self.json_ld = []
+        self.fallback_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.title_parts is not None:
+            # Markup inside <title> is text to browsers.
+            return
+        if self.fallback_depth:
+            # <noscript> and <template> content (tracking pixels and the
+            # like) is not metadata.
+            self.fallback_depth += tag in FALLBACK_TAGS
+            return
+        if tag not in HEAD_TAGS:
+            raise _EndOfHead
+        attrs = dict(attrs)
+        if tag in FALLBACK_TAGS:
+            self.fallback_depth = 1
+        elif tag == 'title' and self.title is None:
+            self.title_parts = []
+        elif tag == 'meta':
+            content = attrs.get('content')
+            if content:
+                for name in ('property', 'name', 'itemprop'):
+                    value = (attrs.get(name) or '').strip().lower()
+                    if value:
+                        self.meta.setdefault((name, value), content.strip())
+        elif tag == 'link':
+            rel = (attrs.get('rel') or '').lower().split()
+            if 'canonical' in rel and self.canonical is None:
+                self.canonical = attrs.get('href')
+        elif tag == 'script' and (attrs.get('type') or '').strip().lower() == 'application/ld+json':
+            self.json_ld_parts = []
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in FALLBACK_TAGS and self.fallback_depth:
+            self.fallback_depth -= 1
+
+    def handle_endtag(self, tag):
+        if self.fallback_depth:
+            self.fallback_depth -= tag in FALLBACK_TAGS
+            return
+        if tag == 'head':
+            raise _EndOfHead
+        if tag == 'title' and self.title_parts is not None:
+            self.title = ''.join(self.title_parts).strip()
+            self.title_parts = None
+        elif tag == 'script' and self.json_ld_parts is not None:
+            self.json_ld.append(''.join(self.json_ld_parts))
+            self.json_ld_parts = None
+
+    def handle_data(self, data):
+        if self.title_parts is not None:
+            self.title_parts.append(data)
+        elif self.json_ld_parts is not None:
+            self.json_ld_parts.append(data)
+
+
+def _json_ld_objects(value):
+    """All JSON objects in a JSON-LD document, @graph members included."""
+    if isinstance(value, list):
+        for item in value:
+            yield from _json_ld_objects(item)
+    elif isinstance(value, dict):
+        yield value
+        for key in ('@graph', 'mainEntity'):
+            if key in value:
+                yield from _json_ld_objects(value[key])
+
+
+def _types(obj):
+    types = obj.get('@type')
+    return set(t for t in (types if isinstance(types, list) else [types]) if isinstance(t, str))
+
+
+def json_ld_article(scripts):
+    """(datePublished, headline) of the first article object in the JSON-LD scripts."""
+    page = None
+    for script in scripts:
+        try:
+            document = json.loads(script)
+        except ValueError:
+            continue
+        for obj in _json_ld_objects(document):
+            types = _types(obj)
+            if not (types & ARTICLE_TYPES or types & PAGE_TYPES):
+                continue
+            date, headline = obj.get('datePublished'), obj.get('headline')
+            found = (
+                date.strip() if isinstance(date, str) and date.strip() else None,
+                headline.strip() if isinstance(headline, str) and headline.strip() else None,
+            )
+            if found == (None, None):
+                continue
+            if types & ARTICLE_TYPES:
+                return found
+            page = page or found
+    return page or (None, None)
+
+
+def read_head(html):
+    """
+    Title, publication date candidates and canonical link from the <head>
+    of `html` (<title>, OpenGraph and article <meta> tags, JSON-LD).
+    Parsing stops at </head> or the first body element, so the cost does
+    not depend on the length of the article.
+    """
+    parser = HeadParser()
+    complete = False
+    try:
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+    except _EndOfHead:
+        complete = True
+    if parser.title is None and parser.title_parts is not None:
+        parser.title = ''.join(parser.title_parts).strip()
+
+    json_ld_date, headline = json_ld_article(parser.json_ld)
+    date_strings = [parser.meta.get(DATE_META[0])]
+    date_strings.append(json_ld_date)
+    date_strings.extend(parser.meta.get(key) for key in DATE_META[1:])
+    return HeadMetadata(
+        title=parser.title or None,
+        og_title=parser.meta.get(('property', 'og:title')) or None,
+        headline=headline or None,
+        date_strings=[s for s in date_strings if s],
+        canonical=parser.canonical,
+        complete=complete,
+    )
@@ -0,0 +1,274 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.http import HttpResponse
+
+
+# Upper bounds (seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A metric with a fixed set of label names; safe to update from several threads."""
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(Metric):
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self.key(labels), 0)
+
+    def render(self):
+        lines = self.header()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+    def snapshot(self):
+        with self.lock:
+            if not self.labelnames:
+                return self.values.get((), 0)
+            return {','.join(key): value for key, value in sorted(self.values.items())}
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram as in the Prometheus exposition format."""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'max': 0.0}
+            state['counts'][index] += 1
+            state['sum'] += value
+            state['max'] = max(state['max'], value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q, counts):
+        """Estimate of the q-quantile from bucket counts (linear within a bucket)."""
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            if count and seen + count >= rank:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return lower
+
+    def render(self):
+        lines = self.header()
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                labels = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), state['counts']):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels + [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(state["sum"])}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+    def snapshot(self):
+        summary = {}
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                count = sum(state['counts'])
+                # Interpolating within a bucket may overshoot the largest
+                # value seen (e.g. with a single observation).
+                p50, p95 = (min(self.quantile(q, state['counts']), state['max']) for q in (0.5, 0.95))
+                summary[','.join(key)] = {
+                    'count': count,
+                    'sum': round(state['sum'], 6),
+                    'mean': round(state['sum'] / count, 6),
+                    'p50': round(p50, 6),
+                    'p95': round(p95, 6),
+                    'max': round(state['max'], 6),
+                }
+        return summary
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Prometheus text exposition of all metrics."""
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+class ScrapeMetrics(Registry):
+    """Metrics of one scrape_articles / scrape_worker run."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = time.perf_counter()
+        self.stage_seconds = self.histogram(
+            'scrape_stage_seconds',
+            'Time spent in each scraper stage: response (connection and time to the '
+            'response headers), download (whole request), encoding, metadata, parse, dates, '
+            'per batch: existing, duplicates, save.',
+            ['stage'],
+        )
+        self.downloaded_bytes = self.counter('scrape_downloaded_bytes_total', 'Bytes of downloaded pages.')
+        self.pages = self.counter('scrape_pages_total', 'Processed URLs by result.', ['status'])
+        self.errors = self.counter('scrape_errors_total', 'Download and save errors by host.', ['host', 'stage'])
+
+    def summary(self):
+        """Machine-readable summary of the run (printed as JSON by the scraper)."""
+        elapsed = time.perf_counter() - self.started
+        pages = self.pages.snapshot()
+        total = sum(pages.values())
+        errors = {}
+        for key, count in self.errors.snapshot().items():
+            host, stage = key.rsplit(',', 1)
+            errors.setdefault(host, {})[stage] = count
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'pages': total,
+            'pages_per_second': round(total / elapsed, 3) if elapsed else 0.0,
+            'statuses': pages,
+            'downloaded_bytes': self.downloaded_bytes.snapshot(),
+            'stages': self.stage_seconds.snapshot(),
+            'errors_by_host': errors,
+        }
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    registry = None
+
+    def do_GET(self):
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(registry, port, host='0.0.0.0'):
+    """
+    Serves `registry` over HTTP from a daemon thread, for long-running
+    scrape workers whose metrics are not in the web process. Returns the
+    server; call shutdown() to stop it.
+    """
+    handler = type('Handler', (MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Metrics of the web process.
+API_REGISTRY = Registry()
+API_REQUEST_SECONDS = API_REGISTRY.histogram(
+    'articles_api_request_seconds', 'Time to answer API requests, by view.',
+    ['view', 'method', 'status'],
+)
+API_STAGE_SECONDS = API_REGISTRY.histogram(
+    'articles_api_stage_seconds',
+    'Time spent in API view stages: query (fetching the rows) and format (building the response data).',
+    ['view', 'stage'],
+)
+
+
+class MetricsMiddleware:
+    """Times every request routed to a named view of the articles API."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.url_name and match.url_name.startswith('article'):
+            API_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                view=match.url_name, method=request.method, status=response.status_code,
+            )
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(API_REGISTRY.render(), content_type=CONTENT_TYPE)
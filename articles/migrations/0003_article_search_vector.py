@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+from articles.search import search_config
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Batched by id ranges, so no single UPDATE rewrites the whole table.
+    Article = apps.get_model('articles', 'Article')
+    config = search_config(schema_editor.connection)
+    # The expression as of this migration (content_text was on Article).
+    vector = (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('content_text', weight='B', config=config)
+    )
+    queryset = Article.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        queryset.filter(id__gte=ids[0], id__lte=ids[-1]).update(search_vector=vector)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_article_published_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+    ]
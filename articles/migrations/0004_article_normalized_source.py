@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:48
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Lower, Trim
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_normalized_source(apps, schema_editor):
+    # Same result as articles.models.normalize_source(), computed in SQL
+    # and batched by id ranges like the search vector backfill.
+    Article = apps.get_model('articles', 'Article')
+    normalized = models.Func(
+        Lower(Trim('source')), Value(r'^www\.'), Value(''),
+        function='regexp_replace', output_field=models.CharField(),
+    )
+    queryset = Article.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        queryset.filter(id__gte=ids[0], id__lte=ids[-1]).update(normalized_source=normalized)
+        last_id = ids[-1]
+
+
+def create_trigram_index(apps, schema_editor):
+    # Optional: substring (?source_match=contains) searches use this index
+    # when the pg_trgm extension is available, and scan the table otherwise.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS article_source_trgm_idx '
+        'ON articles_article USING gin (normalized_source gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS article_source_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='normalized_source',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_normalized_source, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['normalized_source'], name='article_source_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
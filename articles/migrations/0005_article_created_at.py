@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_article_normalized_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:56
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+
+BATCH_SIZE = 1000
+
+
+def id_ranges(queryset):
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last_id = ids[-1]
+
+
+def copy_content(apps, schema_editor, sql):
+    # Each batch is one INSERT ... SELECT / UPDATE ... FROM in its own
+    # transaction (the migration is not atomic), so the bodies never pass
+    # through Python and locks are held only for one batch at a time.
+    Article = apps.get_model('articles', 'Article')
+    ArticleContent = apps.get_model('articles', 'ArticleContent')
+    connection = schema_editor.connection
+    sql = sql.format(
+        article=connection.ops.quote_name(Article._meta.db_table),
+        content=connection.ops.quote_name(ArticleContent._meta.db_table),
+    )
+    for first, last in id_ranges(Article.objects.using(connection.alias)):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(sql, [first, last])
+
+
+def move_content(apps, schema_editor):
+    copy_content(apps, schema_editor, """
+        INSERT INTO {content} (article_id, content_html, content_text)
+        SELECT id, content_html, content_text FROM {article}
+        WHERE id BETWEEN %s AND %s
+        ON CONFLICT (article_id) DO NOTHING
+    """)
+
+
+def restore_content(apps, schema_editor):
+    copy_content(apps, schema_editor, """
+        UPDATE {article} AS a SET content_html = c.content_html, content_text = c.content_text
+        FROM {content} AS c
+        WHERE c.article_id = a.id AND a.id BETWEEN %s AND %s
+    """)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('articles', '0005_article_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleContent',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='articles.article')),
+                ('content_html', models.TextField()),
+                ('content_text', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(move_content, restore_content),
+    ]
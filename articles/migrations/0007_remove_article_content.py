@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_articlecontent'),
+    ]
+
+    operations = [
+        # The defaults only make the removal reversible: re-added columns
+        # start empty and 0006 copies the content back.
+        migrations.AlterField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='content_text',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='content_html',
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='content_text',
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:59
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+from articles.fingerprints import fingerprint_fields
+
+
+BATCH_SIZE = 500
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # SimHash has no SQL equivalent, so the bodies are read in id batches
+    # and the fingerprints written back with one bulk_update per batch,
+    # each in its own transaction (the migration is not atomic).
+    Article = apps.get_model('articles', 'Article')
+    ArticleContent = apps.get_model('articles', 'ArticleContent')
+    alias = schema_editor.connection.alias
+    contents = ArticleContent.objects.using(alias).order_by('article_id')
+    fields = list(fingerprint_fields(''))
+    last_id = 0
+    while True:
+        batch = list(contents.filter(article_id__gt=last_id).values_list('article_id', 'content_text')[:BATCH_SIZE])
+        if not batch:
+            return
+        articles = [Article(id=article_id, **fingerprint_fields(text)) for article_id, text in batch]
+        with transaction.atomic(using=alias):
+            Article.objects.using(alias).bulk_update(articles, fields)
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('articles', '0007_remove_article_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='articles.article'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash_band0',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash_band1',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash_band2',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash_band3',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
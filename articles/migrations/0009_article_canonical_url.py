@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models, transaction
+
+from articles.canonical import canonicalize_url
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_canonical_urls(apps, schema_editor):
+    # Rows are canonicalized in id order, one batch per transaction (the
+    # migration is not atomic). When several existing rows share a
+    # canonical URL, the oldest keeps it and the others stay empty, so the
+    # unique constraint can be added afterwards.
+    Article = apps.get_model('articles', 'Article')
+    queryset = Article.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', 'url')[:BATCH_SIZE])
+        if not batch:
+            return
+        canonical = {article_id: canonicalize_url(url) for article_id, url in batch}
+        taken = set(queryset.filter(canonical_url__in=set(canonical.values())).values_list('canonical_url', flat=True))
+        articles = []
+        for article_id, url in canonical.items():
+            if url not in taken:
+                taken.add(url)
+                articles.append(Article(id=article_id, canonical_url=url))
+        with transaction.atomic(using=schema_editor.connection.alias):
+            queryset.bulk_update(articles, ['canonical_url'])
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('articles', '0008_article_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='canonical_url',
+            field=models.URLField(editable=False, max_length=2000, null=True),
+        ),
+        migrations.RunPython(backfill_canonical_urls, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='article',
+            name='canonical_url',
+            field=models.URLField(editable=False, max_length=2000, null=True, unique=True),
+        ),
+    ]
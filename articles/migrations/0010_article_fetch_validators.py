@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_canonical_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='etag',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='fetched_at',
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='page_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
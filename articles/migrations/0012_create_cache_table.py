@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:40
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # The API response cache defaults to DatabaseCache, which the scraper
+    # writes to after every saved batch; `migrate` alone has to be enough.
+    # Does nothing for other cache backends or when the table exists.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_crawljob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
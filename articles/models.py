@@ -1,12 +1,219 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
+
+from .canonical import canonicalize_url
+from .fingerprints import BAND_BITS, BANDS, fingerprint_fields
+from .search import update_search_vectors
+
+
+# Article fields stored in ArticleContent.
+CONTENT_FIELDS = ('content_html', 'content_text')
+
+
+def normalize_source(source):
+    """Lowercased source without a leading "www.", as used for filtering."""
+    source = (source or '').strip().lower()
+    return source[4:] if source.startswith('www.') else source
+
+
+class ArticleQuerySet(models.QuerySet):
+
+    def values_for(self, *names):
+        """values() that also accepts the content fields (read through a join)."""
+        plain = [name for name in names if name not in CONTENT_FIELDS]
+        content = {name: models.F(f'content__{name}') for name in names if name in CONTENT_FIELDS}
+        return self.values(*plain, **content)
+
+    def near_duplicates(self, simhashes, max_distance):
+        """
+        Articles whose SimHash is at most `max_distance` bits away from one
+        of `simhashes`. Every SimHash is joined to the rows sharing one of
+        its bands through the band indexes and the distance is checked by
+        the database; the ids of the matches are read right away, so the
+        returned queryset looks rows up by primary key only.
+        """
+        mask = (1 << BAND_BITS) - 1
+        shared_band = ' OR '.join(
+            f'a.simhash_band{i} = (t.simhash >> {BAND_BITS * (BANDS - 1 - i)}) & {mask}'
+            for i in range(BANDS)
+        )
+        sql = (
+            f'SELECT DISTINCT a.id FROM unnest(%s::bigint[]) AS t(simhash) '
+            f'JOIN {self.model._meta.db_table} a ON ({shared_band}) '
+            f'WHERE bit_count((a.simhash # t.simhash)::bit(64)) <= %s'
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [list(simhashes), max_distance])
+            ids = [row[0] for row in cursor.fetchall()]
+        return self.filter(id__in=ids)
+
 
 class Article(models.Model):
     title = models.CharField(max_length=255)
-    content_html = models.TextField()
-    content_text = models.TextField()
     url = models.URLField(unique=True)
+    # canonicalize_url() of the page's rel="canonical" link or of `url`;
+    # one row per canonical URL. Empty only for rows that repeated another
+    # row's canonical URL when the column was added.
+    canonical_url = models.URLField(max_length=2000, unique=True, null=True, editable=False)
     source = models.CharField(max_length=100)
+    # normalize_source(source), indexed for exact and prefix matches.
+    normalized_source = models.CharField(max_length=100, default='', editable=False)
     published_date = models.DateTimeField()
+    # Weighted title and body lexemes, maintained by save() and the scraper
+    # (see articles.search).
+    search_vector = SearchVectorField(null=True, editable=False)
+    # When the row was inserted (empty for rows older than the column);
+    # used by incremental exports.
+    created_at = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
+    # Fingerprints of content_text (see articles.fingerprints): the exact
+    # hash and the SimHash, whose bands are indexed for near-duplicate
+    # lookups. Empty for texts too short to fingerprint.
+    content_hash = models.CharField(max_length=64, null=True, editable=False, db_index=True)
+    simhash = models.BigIntegerField(null=True, editable=False)
+    simhash_band0 = models.IntegerField(null=True, editable=False, db_index=True)
+    simhash_band1 = models.IntegerField(null=True, editable=False, db_index=True)
+    simhash_band2 = models.IntegerField(null=True, editable=False, db_index=True)
+    simhash_band3 = models.IntegerField(null=True, editable=False, db_index=True)
+    # HTTP validators and SHA-256 of the raw body from the last download,
+    # used by refresh runs (scrape_articles --refresh) to skip unchanged
+    # pages; fetched_at is empty for rows never refreshed.
+    etag = models.CharField(max_length=255, blank=True, default='', editable=False)
+    last_modified = models.CharField(max_length=64, blank=True, default='', editable=False)
+    page_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    fetched_at = models.DateTimeField(null=True, editable=False, db_index=True)
+    # The first stored article with the same or nearly the same content.
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['published_date', 'id'], name='article_published_id_idx'),
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+            # varchar_pattern_ops serves both "=" and LIKE 'prefix%'.
+            models.Index(
+                fields=['normalized_source'], name='article_source_pattern_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    # content_html and content_text live in ArticleContent, so queries on
+    # the metadata never read the large bodies. They are still available as
+    # attributes (and constructor arguments); the first access loads the
+    # content row, unless select_related('content') was used.
+
+    def get_content(self):
+        try:
+            return self.content
+        except ArticleContent.DoesNotExist:
+            self.content = ArticleContent(article=self)
+            return self.content
+
+    @property
+    def content_html(self):
+        return self.get_content().content_html
+
+    @content_html.setter
+    def content_html(self, value):
+        self.get_content().content_html = value
+
+    @property
+    def content_text(self):
+        return self.get_content().content_text
+
+    @content_text.setter
+    def content_text(self, value):
+        self.get_content().content_text = value
+
+    def set_derived_fields(self):
+        """Fills the columns computed from other fields; bulk inserts call it too."""
+        self.normalized_source = normalize_source(self.source)
+        self.canonical_url = canonicalize_url(self.canonical_url or self.url)
+        # Fingerprints only when the content was loaded (and so may have changed).
+        if 'content' in self._state.fields_cache:
+            for name, value in fingerprint_fields(self.content_text).items():
+                setattr(self, name, value)
+
+    def simhash_bands(self):
+        return [getattr(self, f'simhash_band{i}') for i in range(BANDS)]
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        super().save(*args, **kwargs)
+        content = self._state.fields_cache.get('content')
+        if content is not None:
+            content.article = self
+            content.save()
+        else:
+            update_search_vectors(Article.objects.filter(pk=self.pk))
+
+
+class ArticleContent(models.Model):
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name='content'
+    )
+    content_html = models.TextField()
+    content_text = models.TextField()
+
+    def __str__(self):
+        return str(self.article_id)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        article = Article.objects.filter(pk=self.article_id)
+        article.update(**fingerprint_fields(self.content_text))
+        update_search_vectors(article)
+
+
+class CrawlJob(models.Model):
+    """
+    A URL in the shared crawl queue. scrape_worker processes claim pending
+    jobs (and jobs whose lease expired) with SELECT ... FOR UPDATE SKIP
+    LOCKED, see articles.crawl_queue.
+    """
+
+    PENDING = 'pending'
+    CLAIMED = 'claimed'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (CLAIMED, 'Claimed'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    url = models.URLField(max_length=2000)
+    # canonicalize_url(url): a URL is queued once, whatever its variant.
+    canonical_url = models.URLField(max_length=2000, unique=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    # How the scraper finished the job (a ScrapeJob status) and its error.
+    result = models.CharField(max_length=32, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    leased_by = models.CharField(max_length=255, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Claims scan pending jobs in id order and expired claims.
+            models.Index(
+                fields=['id'], name='crawljob_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+            models.Index(
+                fields=['lease_expires_at'], name='crawljob_claimed_lease_idx',
+                condition=models.Q(status='claimed'),
+            ),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.url
@@ -0,0 +1,120 @@
+import base64
+import json
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the view's `keyset_ordering`.
+
+    A page is fetched with a "WHERE (key) > (cursor) ORDER BY key LIMIT n"
+    query, which an index on the ordering columns serves directly, so the
+    cost of a page does not depend on how deep it is (no OFFSET). The body
+    stays a plain list; the next page is announced in the Link header:
+
+        Link: <http://host/articles/?cursor=...>; rel="next"
+
+    Pages may be model instances or .values() dicts that include the
+    ordering columns. The ordering must end with a unique column (id) to
+    make it total.
+    Fields prefixed with "-" are descending; all fields must share the
+    same direction for the leading range condition to be valid.
+    """
+
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('published_date', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return getattr(view, 'keyset_ordering', None) or self.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, values):
+        # isoformat() keeps microseconds, which DjangoJSONEncoder would cut
+        # to milliseconds and so skip rows sharing the truncated timestamp.
+        data = json.dumps(values, default=lambda value: value.isoformat(), separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, queryset, fields):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [self.to_python(queryset, name, value) for name, value in zip(fields, values)]
+        except (BinasciiError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, queryset, name, value):
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations (e.g. a search rank) are stored as plain JSON values.
+            return value
+        return field.to_python(value)
+
+    def keyset_filter(self, fields, values, descending):
+        after = 'lt' if descending else 'gt'
+        condition = Q()
+        for i, name in enumerate(fields):
+            equal = {fields[j]: values[j] for j in range(i)}
+            condition |= Q(**equal, **{f'{name}__{after}': values[i]})
+        # Redundant bound on the first column, so the index scan can start
+        # at the cursor instead of filtering from the beginning.
+        first = {f"{fields[0]}__{after}e": values[0]}
+        return Q(**first) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(view)
+        fields = [name.lstrip('-') for name in ordering]
+        descending = ordering[0].startswith('-')
+        self.request = request
+        self.fields = fields
+        self.page_size_value = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset, fields)
+            queryset = queryset.filter(self.keyset_filter(fields, values, descending))
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        if isinstance(last, dict):
+            values = [last[name] for name in self.fields]
+        else:
+            values = [getattr(last, name) for name in self.fields]
+        cursor = self.encode_cursor(values)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers['Link'] = f'<{next_link}>; rel="next"'
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
@@ -0,0 +1,342 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class TokenBucket:
+    """
+    Token bucket with `rate` tokens per second and room for `burst` tokens.
+    reserve() always takes a token and returns how long the caller has to
+    wait for it, so waiting happens outside of any lock; delay() tells how
+    long that would be without taking one.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        self.refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self):
+        self.refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostState:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.bucket = None
+        self.crawl_delay = None
+        self.robots_loading = False
+        self.robots_loaded = False
+
+
+class HostScheduler:
+    """
+    Per-host politeness limits for the download threads.
+
+    Every host gets at most `max_in_flight` concurrent requests and, when a
+    rate is set or robots.txt declares a Crawl-delay, a token bucket; the
+    stricter of `rate` and 1 / Crawl-delay wins. robots.txt is fetched once
+    per host per run, by the first request to it (see prepare()). Nothing
+    here blocks: try_acquire() tells a dispatcher when a host may be
+    requested (see DownloadQueue).
+    """
+
+    def __init__(self, session=None, rate=None, burst=1, max_in_flight=2, respect_robots=True,
+                 user_agent='*', timeout=10):
+        self.session = session
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.respect_robots = respect_robots and session is not None
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def state(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostState()
+            return self.hosts[host]
+
+    def crawl_delay(self, url):
+        parsed = urlparse(url)
+        robots = RobotFileParser()
+        try:
+            response = self.session.get(
+                f'{parsed.scheme}://{parsed.netloc}/robots.txt', timeout=self.timeout
+            )
+            if response.status_code != 200:
+                return None
+            robots.parse(response.text.splitlines())
+        except Exception:
+            return None
+
+        delay = robots.crawl_delay(self.user_agent)
+        request_rate = robots.request_rate(self.user_agent)
+        if request_rate and request_rate.requests:
+            delay = max(delay or 0, request_rate.seconds / request_rate.requests)
+        return float(delay) if delay else None
+
+    def setup(self, state, crawl_delay):
+        state.crawl_delay = crawl_delay
+        rates = [rate for rate in (self.rate, state.crawl_delay and 1 / state.crawl_delay) if rate]
+        if rates:
+            burst = 1 if state.crawl_delay else self.burst
+            state.bucket = TokenBucket(min(rates), burst)
+        state.robots_loaded = True
+
+    def try_acquire(self, url):
+        """
+        Takes a slot (and a token) without blocking and returns 0 when the
+        host may be requested now. Otherwise takes nothing and returns the
+        seconds until the host's next token, or None when the host is at its
+        in-flight limit and only a release() frees it. Until its robots.txt
+        is loaded a host gets one request, which has to call prepare() first.
+        """
+        state = self.state(host_of(url))
+        with state.lock:
+            if state.in_flight >= (self.max_in_flight if state.robots_loaded else 1):
+                return None
+            if state.bucket is not None:
+                wait = state.bucket.delay()
+                if wait:
+                    return wait
+                state.bucket.reserve()
+            state.in_flight += 1
+            return 0.0
+
+    def prepare(self, url):
+        """
+        Loads robots.txt for a slot taken by try_acquire(), if not loaded yet.
+        The fetch runs outside the host's lock, so try_acquire() never waits
+        for it; the host keeps its one request until the bucket is set up.
+        """
+        state = self.state(host_of(url))
+        with state.lock:
+            if state.robots_loaded or state.robots_loading:
+                return
+            state.robots_loading = True
+        # crawl_delay() swallows its errors: a broken robots.txt means none.
+        crawl_delay = self.crawl_delay(url) if self.respect_robots else None
+        with state.lock:
+            state.robots_loading = False
+            self.setup(state, crawl_delay)
+            if state.bucket is not None:
+                # A new bucket is full: the first request does not wait.
+                state.bucket.reserve()
+
+    def release(self, url):
+        state = self.state(host_of(url))
+        with state.lock:
+            state.in_flight -= 1
+
+
+class DownloadQueue:
+    """
+    Items (with their URLs) waiting for a HostScheduler slot, for a
+    dispatcher that must never block on one host. pop_ready() returns the
+    items whose host may be requested now, round-robin across hosts. A host
+    at its in-flight limit waits for release(); one waiting for its token is
+    put aside, ordered by the time it is ready, so throttled hosts hold up
+    neither the dispatcher nor the download threads. Not thread-safe: a
+    single dispatcher thread owns the queue.
+    """
+
+    def __init__(self, scheduler, clock=time.monotonic):
+        self.scheduler = scheduler
+        self.clock = clock
+        # Every host with queued items is in exactly one of `ready`,
+        # `blocked` (at its in-flight limit) and `timers` (waiting for a
+        # token, as (ready at, sequence, host)).
+        self.queues = {}
+        self.ready = deque()
+        self.blocked = set()
+        self.timers = []
+        # Items pushed with a delay, as (due at, sequence, url, item).
+        self.delayed = []
+        self.sequence = itertools.count()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, url, item, delay=None):
+        """
+        Queues `item` after the other items of its host. With a delay (a
+        retry's backoff) it is queued after that many seconds instead, ahead
+        of them, so a retried URL keeps its place.
+        """
+        self.size += 1
+        if delay is None:
+            self.enqueue(url, item)
+        else:
+            heapq.heappush(self.delayed, (self.clock() + delay, next(self.sequence), url, item))
+
+    def enqueue(self, url, item, first=False):
+        host = host_of(url)
+        if host not in self.queues:
+            self.queues[host] = deque()
+            self.ready.append(host)
+        if first:
+            self.queues[host].appendleft((url, item))
+        else:
+            self.queues[host].append((url, item))
+
+    def pop_ready(self, limit):
+        """Up to `limit` items whose slots were taken; release() each one's URL when done."""
+        now = self.clock()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, url, item = heapq.heappop(self.delayed)
+            self.enqueue(url, item, first=True)
+        while self.timers and self.timers[0][0] <= now:
+            self.ready.append(heapq.heappop(self.timers)[2])
+
+        items = []
+        while self.ready and len(items) < limit:
+            host = self.ready.popleft()
+            queue = self.queues[host]
+            wait = self.scheduler.try_acquire(queue[0][0])
+            if wait is None:
+                self.blocked.add(host)
+            elif wait:
+                heapq.heappush(self.timers, (now + wait, next(self.sequence), host))
+            else:
+                items.append(queue.popleft()[1])
+                self.size -= 1
+                if queue:
+                    self.ready.append(host)
+                else:
+                    del self.queues[host]
+        return items
+
+    def release(self, url):
+        self.scheduler.release(url)
+        host = host_of(url)
+        if host in self.blocked:
+            self.blocked.remove(host)
+            self.ready.append(host)
+
+    def next_ready(self):
+        """Seconds until pop_ready() may return more items, or None if only a release() can change that."""
+        if self.ready:
+            return 0.0
+        due = [heap[0][0] for heap in (self.timers, self.delayed) if heap]
+        return max(0.0, min(due) - self.clock()) if due else None
+
+
+class Dispatcher:
+    """
+    Runs downloads from a DownloadQueue on `executor`, at most `limit` at a
+    time, from a thread of its own, so they go on while the caller parses
+    and saves. `fetch(item)` makes one attempt; when it raises,
+    `retry_delay(item, error)` returns the backoff before the next attempt,
+    or None to give up. Finished items come out of get().
+    """
+
+    def __init__(self, scheduler, executor, fetch, retry_delay, limit, clock=time.monotonic):
+        self.queue = DownloadQueue(scheduler, clock)
+        self.executor = executor
+        self.fetch = fetch
+        self.retry_delay = retry_delay
+        self.limit = limit
+        self.condition = threading.Condition()
+        self.incoming = []
+        self.finished = []
+        self.closed = False
+        self.error = None
+        self.results = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name='download-dispatcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, url, item):
+        with self.condition:
+            self.incoming.append((url, item))
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """
+        The next finished (item, future), or None if none finished within
+        `timeout` seconds; future.result() returns the download or raises
+        its error.
+        """
+        try:
+            result = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if result is self:
+            raise RuntimeError('download dispatcher failed') from self.error
+        return result
+
+    def close(self):
+        """Stops dispatching; waits for the running downloads, queued ones are dropped."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def done(self, future):
+        with self.condition:
+            self.finished.append(future)
+            self.condition.notify()
+
+    def run(self):
+        running = {}
+        try:
+            with self.condition:
+                while True:
+                    for url, item in self.incoming:
+                        self.queue.push(url, (url, item))
+                    self.incoming.clear()
+                    finished, self.finished = self.finished, []
+                    for future in finished:
+                        url, item = running.pop(future)
+                        self.queue.release(url)
+                        error = future.exception()
+                        delay = None if error is None else self.retry_delay(item, error)
+                        if delay is None:
+                            self.results.put((item, future))
+                        else:
+                            self.queue.push(url, (url, item), delay)
+                    if self.closed:
+                        if not running:
+                            return
+                        self.condition.wait()
+                        continue
+
+                    for url, item in self.queue.pop_ready(self.limit - len(running)):
+                        future = self.executor.submit(self.fetch, item)
+                        running[future] = (url, item)
+                        future.add_done_callback(self.done)
+                    if not (self.incoming or self.finished):
+                        full = len(running) >= self.limit
+                        self.condition.wait(None if full else self.queue.next_ready())
+        except Exception as e:
+            self.error = e
+            self.results.put(self)
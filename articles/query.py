@@ -0,0 +1,102 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import normalize_source
+from .serializers import ArticleSerializer
+
+# Query parameters shared by the API views and the export command.
+# `params` is any mapping: request.query_params or command options.
+
+# ?source_match= modes and their lookups on Article.normalized_source.
+SOURCE_MATCH_LOOKUPS = {
+    'prefix': 'startswith',
+    'exact': 'exact',
+    'contains': 'contains',
+}
+
+# ?duplicates= modes: all articles, or only originals (duplicate_of empty).
+DUPLICATES_MODES = ('include', 'exclude')
+
+
+def parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ['Expected an ISO 8601 date or datetime.']})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: ['Expected an integer.']})
+
+
+def parse_fields(params, default):
+    """Fields listed in ?fields=a,b,... in ArticleSerializer order, or `default`."""
+    value = params.get('fields')
+    if not value:
+        return list(default)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(ArticleSerializer.Meta.fields))
+    if unknown or not fields:
+        raise ValidationError({
+            'fields': [f"Unknown fields: {', '.join(unknown)}." if unknown else 'No fields given.']
+        })
+    return [name for name in ArticleSerializer.Meta.fields if name in fields]
+
+
+def filter_articles(queryset, params):
+    """Source, publication date and duplicate filters of the article list."""
+    source = params.get('source')
+    if source:
+        match = params.get('source_match') or 'prefix'
+        if match not in SOURCE_MATCH_LOOKUPS:
+            raise ValidationError({
+                'source_match': [f"Expected one of: {', '.join(SOURCE_MATCH_LOOKUPS)}."]
+            })
+        lookup = f'normalized_source__{SOURCE_MATCH_LOOKUPS[match]}'
+        queryset = queryset.filter(**{lookup: normalize_source(source)})
+    published_after = parse_date_param(params, 'published_after')
+    if published_after:
+        queryset = queryset.filter(published_date__gte=published_after)
+    published_before = parse_date_param(params, 'published_before')
+    if published_before:
+        queryset = queryset.filter(published_date__lt=published_before)
+    duplicates = params.get('duplicates') or 'include'
+    if duplicates not in DUPLICATES_MODES:
+        raise ValidationError({'duplicates': [f"Expected one of: {', '.join(DUPLICATES_MODES)}."]})
+    if duplicates == 'exclude':
+        queryset = queryset.filter(duplicate_of__isnull=True)
+    return queryset
+
+
+def filter_since(queryset, params):
+    """
+    Incremental export filters: articles with an id above `since_id` and
+    articles added to the database at or after `since`.
+    """
+    since_id = parse_int_param(params, 'since_id')
+    if since_id is not None:
+        queryset = queryset.filter(id__gt=since_id)
+    since = parse_date_param(params, 'since')
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    return queryset
@@ -0,0 +1,36 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    For plain data (dicts, lists, strings, numbers, booleans, None) orjson
+    produces the same bytes as JSONRenderer with its default settings
+    (compact, non-ASCII characters unescaped), once U+2028 and U+2029 are
+    escaped the same way. Datetimes, Decimals and other types orjson does
+    not handle like DRF's encoder, indented output and non-default settings
+    go through JSONRenderer unchanged. Floats are not checked (orjson writes
+    NaN as null and formats some exponents differently), so this renderer
+    is only for views whose data contains no floats.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.is_default_output(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def is_default_output(self, accepted_media_type, renderer_context):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return indent is None and self.compact and self.strict and not self.ensure_ascii
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.utils import timezone
+
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class RetryPolicy:
+    """
+    Which download errors are worth retrying and how long to wait between
+    attempts: connection errors, timeouts, 429 and 5xx responses are retried
+    with "full jitter" exponential backoff, unless the response carries a
+    Retry-After header, which is honored (up to `max_backoff`).
+    """
+
+    def __init__(self, retries=2, backoff=0.5, max_backoff=30.0, random=random.random):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.random = random
+
+    def is_transient(self, error):
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in RETRY_STATUSES
+
+    def retry_after(self, response):
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def delay(self, attempt, response=None):
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return self.random() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. After `threshold` consecutive failures a host
+    is skipped (check() raises CircuitOpenError) for `cooldown` seconds.
+    Then a single probe request is let through: success closes the circuit,
+    failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold=5, cooldown=60.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.opened_at = {}
+        self.probing = set()
+
+    def check(self, host):
+        if not self.threshold:
+            return
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return
+            if host not in self.probing and self.clock() - opened_at >= self.cooldown:
+                self.probing.add(host)
+                return
+            # Read under the lock: record_success() may drop the count.
+            failures = self.failures[host]
+        raise CircuitOpenError(f"Circuit open for {host} after {failures} consecutive failures")
+
+    def record_success(self, host):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+            self.probing.discard(host)
+
+    def record_failure(self, host):
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if host in self.probing or (self.threshold and self.failures[host] >= self.threshold):
+                self.opened_at[host] = self.clock()
+            self.probing.discard(host)
@@ -0,0 +1,64 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+
+# Text search configuration used when the server has no Polish one
+# (stock PostgreSQL ships "polish" only with an installed dictionary).
+FALLBACK_CONFIG = 'simple'
+PREFERRED_CONFIG = 'polish'
+
+_configs = {}
+
+
+def search_config(using=connection):
+    """
+    Text search configuration for article vectors and queries: the
+    ARTICLES_SEARCH_CONFIG setting, otherwise "polish" when the server
+    has it and "simple" when it does not. Looked up once per database.
+    """
+    configured = getattr(settings, 'ARTICLES_SEARCH_CONFIG', None)
+    if configured:
+        return configured
+    alias = using.alias
+    if alias not in _configs:
+        with using.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s', [PREFERRED_CONFIG])
+            _configs[alias] = PREFERRED_CONFIG if cursor.fetchone() else FALLBACK_CONFIG
+    return _configs[alias]
+
+
+def article_vector(config=None):
+    """
+    Stored search vector expression: the title outweighs the body. The body
+    is read from ArticleContent with a subquery, as UPDATE allows no joins.
+    """
+    config = config or search_config()
+    ArticleContent = apps.get_model('articles', 'ArticleContent')
+    body = ArticleContent.objects.filter(article=OuterRef('pk')).values('content_text')[:1]
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(Subquery(body), weight='B', config=config)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recomputes the stored vectors of `queryset` with one UPDATE."""
+    return queryset.update(search_vector=article_vector())
+
+
+def search(queryset, text):
+    """
+    Filters `queryset` to articles matching `text` (web search syntax:
+    quoted phrases, "or", leading "-" to exclude) and annotates `rank`.
+    The match uses the GIN index on the stored vector.
+    """
+    query = SearchQuery(text, config=search_config(), search_type='websearch')
+    # ts_rank() returns real, which the driver rounds to its shortest text
+    # form; as double precision the value survives the round trip through
+    # a pagination cursor exactly.
+    rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(rank=rank)
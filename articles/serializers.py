@@ -1,10 +1,51 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Article
 
+# Compact representation returned by the list endpoint unless ?fields= asks
+# for more; the large content columns are only sent on request.
+LIST_FIELDS = ['id', 'title', 'url', 'source', 'published_date']
+
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
 class ArticleSerializer(serializers.ModelSerializer):
     
-    published_date = serializers.DateTimeField(format="%d.%m.%Y %H:%M:%S")
+    published_date = serializers.DateTimeField(format=DATE_FORMAT)
     
     class Meta:
         model = Article
         fields = ['id', 'title', 'content_html', 'content_text', 'url', 'source', 'published_date']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def format_date(value, tz):
+    """DATE_FORMAT in `tz`, without going through strftime()."""
+    value = value.astimezone(tz)
+    return '%02d.%02d.%d %02d:%02d:%02d' % (
+        value.day, value.month, value.year, value.hour, value.minute, value.second
+    )
+
+
+def article_rows(rows, fields):
+    """
+    Fast read path: the same data as ArticleSerializer(..., fields=fields),
+    built from .values() rows instead of model instances and serializer
+    fields. Dates are converted to the current time zone like DRF does.
+    """
+    tz = timezone.get_current_timezone()
+    plain = [name for name in fields if name != 'published_date']
+    if 'published_date' not in fields:
+        return [{name: row[name] for name in plain} for row in rows]
+
+    data = []
+    for row in rows:
+        item = {}
+        for name in fields:
+            item[name] = format_date(row[name], tz) if name == 'published_date' else row[name]
+        data.append(item)
+    return data
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+import sys
+from itertools import islice
+from xml.etree.ElementTree import iterparse
+
+import requests
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_lines(lines):
+    """
+    Yields URLs from plain text (one URL per line) or JSONL lines
+    ({"url": ...} objects). Blank lines and # comments are ignored.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            url = json.loads(line).get('url')
+            if url:
+                yield url.strip()
+        else:
+            yield line
+
+
+def iter_urls_file(path):
+    if path == '-':
+        yield from iter_lines(sys.stdin)
+        return
+    with open(path, encoding='utf-8') as f:
+        yield from iter_lines(f)
+
+
+def open_sitemap(location, session=None, timeout=10):
+    if location.startswith(('http://', 'https://')):
+        response = (session or requests).get(location, timeout=timeout, stream=True)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = io.BufferedReader(response.raw)
+    else:
+        stream = open(location, 'rb')
+
+    # .xml.gz sitemaps are usually served without Content-Encoding,
+    # so gzip is detected from the payload itself.
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_sitemap(location, session=None, timeout=10):
+    """
+    Yields page URLs from a sitemap or sitemap index (plain or gzipped,
+    local path or URL). Documents are parsed incrementally and processed
+    entries are dropped from the tree, so memory stays flat for sitemaps
+    of any size. Nested sitemaps are read lazily, one at a time.
+    """
+    with open_sitemap(location, session=session, timeout=timeout) as stream:
+        root = None
+        is_index = False
+        for event, elem in iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = elem
+                is_index = _local_name(elem.tag) == 'sitemapindex'
+                continue
+            if event != 'end':
+                continue
+
+            name = _local_name(elem.tag)
+            if name == 'loc' and elem.text:
+                loc = elem.text.strip()
+                if is_index:
+                    yield from iter_sitemap(loc, session=session, timeout=timeout)
+                else:
+                    yield loc
+            elif name in ('url', 'sitemap'):
+                root.clear()
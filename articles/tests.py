@@ -1,15 +1,20 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 from rest_framework import status
 from .models import Article
-from .serializers import ArticleSerializer
+from .serializers import LIST_FIELDS, ArticleSerializer
 from articles.management.commands.scrape_articles import Command
 import requests
 
 
+def article_queries(queries):
+    """SQL zapytań do tabeli artykułów (bez zapytań cache)"""
+    return [query['sql'] for query in queries.captured_queries if '"articles_article"' in query['sql']]
+
+
 class ArticleModelTest(TestCase):
     """Testy modelu Article"""
 
@@ -56,6 +61,70 @@ class ArticleModelTest(TestCase):
         self.assertIsNotNone(self.article.published_date)
 
 
+class ArticleContentTest(TestCase):
+    """Testy treści przechowywanej w osobnej tabeli"""
+
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="Split Article",
+            content_html="<p>Heavy body</p>",
+            content_text="Heavy body",
+            url="https://example.com/split",
+            source="example.com",
+            published_date=timezone.now()
+        )
+
+    def test_content_is_loaded_lazily(self):
+        """Test leniwego wczytywania treści"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            article = Article.objects.get(pk=self.article.pk)
+        self.assertNotIn('articlecontent', queries.captured_queries[0]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(article.content_text, "Heavy body")
+            self.assertEqual(article.content_html, "<p>Heavy body</p>")
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_content_update(self):
+        """Test zmiany treści przez atrybuty artykułu"""
+        from .search import search
+
+        self.article.content_text = "Nowa treść o rowerach"
+        self.article.save()
+
+        article = Article.objects.select_related('content').get(pk=self.article.pk)
+        self.assertEqual(article.content_text, "Nowa treść o rowerach")
+        self.assertEqual(article.content_html, "<p>Heavy body</p>")
+        self.assertEqual(list(search(Article.objects.all(), 'rowerach')), [self.article])
+
+    def test_list_reads_content_only_on_request(self):
+        """Test listy bez złączenia z tabelą treści"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('article-list'))
+        self.assertNotIn('articlecontent', article_queries(queries)[0])
+
+        response = self.client.get(reverse('article-list') + '?fields=id,content_text')
+        self.assertEqual(response.json(), [{'id': self.article.pk, 'content_text': "Heavy body"}])
+
+    def test_admin_changelist(self):
+        """Test listy artykułów w panelu administracyjnym"""
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:articles_article_changelist'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "Split Article")
+
+        response = self.client.get(reverse('admin:articles_article_change', args=[self.article.pk]))
+        self.assertContains(response, "Heavy body")
+
+
 class ArticleSerializerTest(TestCase):
     """Testy serializera Article"""
 
@@ -119,7 +188,7 @@ class ArticleAPITest(TestCase):
         """Test pobierania wszystkich artykułów"""
         response = self.client.get(reverse('article-list'))
         articles = Article.objects.all()
-        serializer = ArticleSerializer(articles, many=True)
+        serializer = ArticleSerializer(articles, many=True, fields=LIST_FIELDS)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.json()), 2)
@@ -172,6 +241,552 @@ class ArticleAPITest(TestCase):
         self.assertEqual(len(response.json()), 0)
 
 
+class SourceFilterTest(TestCase):
+    """Testy filtrowania po znormalizowanym źródle"""
+
+    def setUp(self):
+        self.client = Client()
+        for i, source in enumerate(["WWW.Example.com", "example.org", "blog.example.com"]):
+            Article.objects.create(
+                title=source,
+                content_html="<p>Content</p>",
+                content_text="Content",
+                url=f"https://example.com/source-{i}",
+                source=source,
+                published_date=timezone.now()
+            )
+
+    def titles(self, query):
+        response = self.client.get(reverse('article-list') + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item['title'] for item in response.json())
+
+    def test_normalized_source(self):
+        """Test normalizacji źródła przy zapisie"""
+        self.assertEqual(
+            Article.objects.get(source="WWW.Example.com").normalized_source, "example.com"
+        )
+
+    def test_source_match_modes(self):
+        """Test trybów dopasowania źródła"""
+        self.assertEqual(self.titles('?source=Example'), ["WWW.Example.com", "example.org"])
+        self.assertEqual(self.titles('?source=www.example.com&source_match=exact'), ["WWW.Example.com"])
+        self.assertEqual(
+            self.titles('?source=example.com&source_match=contains'),
+            ["WWW.Example.com", "blog.example.com"]
+        )
+
+    def test_prefix_query_uses_normalized_column(self):
+        """Test zapytania bez UPPER(...) LIKE '%...%'"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('article-list') + '?source=example')
+        sql = article_queries(queries)[0]
+        self.assertIn('"normalized_source"::text LIKE \'example%\'', sql)
+        self.assertNotIn('UPPER', sql)
+
+    def test_invalid_source_match(self):
+        """Test niepoprawnego trybu dopasowania"""
+        response = self.client.get(reverse('article-list') + '?source=example&source_match=regex')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('source_match', response.json())
+
+
+class SparseFieldsTest(TestCase):
+    """Testy wyboru zwracanych pól"""
+
+    def setUp(self):
+        self.client = Client()
+        self.article = Article.objects.create(
+            title="Sparse Article",
+            content_html="<p>" + "Long content " * 100 + "</p>",
+            content_text="Long content " * 100,
+            url="https://example.com/sparse",
+            source="example.com",
+            published_date=timezone.now()
+        )
+
+    def test_list_is_compact_by_default(self):
+        """Test domyślnej zwięzłej reprezentacji listy"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('article-list'))
+
+        self.assertEqual(list(response.json()[0]), LIST_FIELDS)
+        self.assertNotIn('content_html', article_queries(queries)[0])
+        self.assertNotIn('content_text', article_queries(queries)[0])
+
+    def test_list_fields_parameter(self):
+        """Test parametru fields na liście"""
+        response = self.client.get(reverse('article-list') + '?fields=title,content_text')
+        self.assertEqual(response.json(), [
+            {'title': self.article.title, 'content_text': self.article.content_text}
+        ])
+
+    def test_detail_returns_full_content(self):
+        """Test pełnej treści w widoku szczegółów i parametru fields"""
+        url = reverse('article-detail', kwargs={'pk': self.article.pk})
+        self.assertEqual(set(self.client.get(url).json()), set(ArticleSerializer.Meta.fields))
+        self.assertEqual(self.client.get(url + '?fields=id,url').json(), {
+            'id': self.article.pk, 'url': self.article.url
+        })
+
+    def test_unknown_field(self):
+        """Test nieznanego pola"""
+        response = self.client.get(reverse('article-list') + '?fields=title,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json()['fields'][0])
+
+
+class FastSerializationTest(TestCase):
+    """Testy szybkiej ścieżki serializacji"""
+
+    def setUp(self):
+        self.client = Client()
+        texts = ["Zażółć gęślą jaźń", "Line\u2028sep\u2029 \"quoted\" \\ \x01\x1f\x7f", "emoji \U0001f600 <b>&</b>"]
+        base = timezone.make_aware(datetime(2025, 3, 30, 0, 30, 15, 999999))
+        for i, text in enumerate(texts):
+            Article.objects.create(
+                title=text,
+                content_html=f"<p>{text}</p>",
+                content_text=text,
+                url=f"https://example.com/fast-{i}",
+                source="example.com",
+                published_date=base + timedelta(hours=i)
+            )
+
+    def expected(self, queryset, many=True):
+        from rest_framework.renderers import JSONRenderer
+
+        data = ArticleSerializer(queryset, many=many).data
+        return JSONRenderer().render(data)
+
+    def test_list_matches_serializer_output(self):
+        """Test zgodności bajtowej listy z ArticleSerializer"""
+        from django.test import override_settings
+
+        fields = ','.join(ArticleSerializer.Meta.fields)
+        # Warsaw switches to summer time within the test data.
+        with override_settings(TIME_ZONE='Europe/Warsaw'):
+            response = self.client.get(reverse('article-list') + f'?fields={fields}')
+            expected = self.expected(Article.objects.order_by('published_date', 'id'))
+        self.assertEqual(response.content, expected)
+
+    def test_detail_matches_serializer_output(self):
+        """Test zgodności bajtowej szczegółów z ArticleSerializer"""
+        article = Article.objects.get(url="https://example.com/fast-1")
+        response = self.client.get(reverse('article-detail', kwargs={'pk': article.pk}))
+        self.assertEqual(response.content, self.expected(article, many=False))
+
+    def test_renderer_falls_back_for_other_data(self):
+        """Test renderera dla danych, których orjson nie obsłuży tak samo"""
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import FastJSONRenderer
+
+        data = {'date': timezone.now(), 'amount': Decimal('1.10'), 'text': 'ż\u2028'}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+
+class ArticlePaginationTest(TestCase):
+    """Testy stronicowania kursorowego i filtrów dat"""
+
+    def setUp(self):
+        self.client = Client()
+        base = timezone.make_aware(datetime(2025, 10, 1, 12, 0, 0, 123456))
+        offsets = [3, 1, 1, 0, 2, 4]
+        self.articles = [
+            Article.objects.create(
+                title=f"Article {i}",
+                content_html=f"<p>{i}</p>",
+                content_text=str(i),
+                url=f"https://example.com/article-{i}",
+                source="example.com",
+                published_date=base + timedelta(days=offset)
+            )
+            for i, offset in enumerate(offsets)
+        ]
+
+    def fetch_all(self, url):
+        import re
+
+        titles = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles += [item['title'] for item in response.json()]
+            pages += 1
+            match = re.match(r'<([^>]+)>; rel="next"', response.get('Link', ''))
+            url = match.group(1) if match else None
+        return titles, pages
+
+    def test_pages_follow_published_date_and_id(self):
+        """Test kolejnych stron w kolejności (published_date, id)"""
+        titles, pages = self.fetch_all(reverse('article-list') + '?page_size=2')
+
+        expected = [
+            a.title for a in sorted(self.articles, key=lambda a: (a.published_date, a.id))
+        ]
+        self.assertEqual(titles, expected)
+        self.assertEqual(pages, 3)
+
+    def test_page_query_has_no_offset(self):
+        """Test braku OFFSET w zapytaniu o kolejną stronę"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        response = self.client.get(reverse('article-list') + '?page_size=2')
+        next_url = response['Link'][1:response['Link'].index('>')]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(next_url)
+
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(article_queries(queries)), 1)
+        self.assertNotIn('OFFSET', article_queries(queries)[0])
+
+    def test_published_date_filters(self):
+        """Test filtrów published_after i published_before"""
+        response = self.client.get(
+            reverse('article-list') + '?published_after=2025-10-02&published_before=2025-10-04T12:00:00Z'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(item['title'] for item in response.json()),
+            ['Article 1', 'Article 2', 'Article 4']
+        )
+
+    def test_invalid_parameters(self):
+        """Test niepoprawnej daty i kursora"""
+        response = self.client.get(reverse('article-list') + '?published_after=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('published_after', response.json())
+
+        response = self.client.get(reverse('article-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ResponseCacheTest(TestCase):
+    """Testy warunkowego GET i cache odpowiedzi"""
+
+    def setUp(self):
+        self.client = Client()
+        self.article = Article.objects.create(
+            title="Cached Article",
+            content_html="<p>Content</p>",
+            content_text="Content",
+            url="https://example.com/cached",
+            source="example.com",
+            published_date=timezone.now()
+        )
+
+    def test_repeated_request_is_served_from_cache(self):
+        """Test odpowiedzi z cache bez zapytań do tabeli artykułów"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        first = self.client.get(reverse('article-list'))
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse('article-list'))
+
+        self.assertEqual(article_queries(queries), [])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('Last-Modified', second)
+
+    def test_conditional_get(self):
+        """Test odpowiedzi 304 dla niezmienionych danych"""
+        url = reverse('article-detail', kwargs={'pk': self.article.pk})
+        response = self.client.get(url)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, status.HTTP_200_OK)
+
+    def test_cache_key_includes_query(self):
+        """Test osobnych wpisów cache dla różnych parametrów"""
+        self.assertEqual(len(self.client.get(reverse('article-list')).json()), 1)
+        self.assertEqual(len(self.client.get(reverse('article-list') + '?source=other').json()), 0)
+
+    def test_cache_key_includes_host_and_scheme(self):
+        """Test osobnych wpisów cache dla hostów i schematów (bezwzględne adresy w Link)"""
+        from django.test import override_settings
+
+        Article.objects.create(
+            title="Second", content_html="", content_text="", source="example.com",
+            url="https://example.com/second", published_date=timezone.now()
+        )
+        url = reverse('article-list') + '?page_size=1'
+        with override_settings(ALLOWED_HOSTS=['a.example', 'b.example']):
+            links = [
+                self.client.get(url, HTTP_HOST='a.example')['Link'],
+                self.client.get(url, HTTP_HOST='b.example')['Link'],
+                self.client.get(url, HTTP_HOST='a.example', secure=True)['Link'],
+            ]
+        self.assertTrue(links[0].startswith('<http://a.example/'))
+        self.assertTrue(links[1].startswith('<http://b.example/'))
+        self.assertTrue(links[2].startswith('<https://a.example/'))
+
+    def test_browsable_api_is_not_cached(self):
+        """Test braku cache dla stron przeglądarkowego API z danymi zalogowanego użytkownika"""
+        from django.contrib.auth.models import User
+
+        User.objects.create_superuser('redaktor', 'redaktor@example.com', 'haslo-testowe')
+        admin = Client()
+        admin.login(username='redaktor', password='haslo-testowe')
+        url = reverse('article-list')
+        page = admin.get(url, HTTP_ACCEPT='text/html')
+        self.assertContains(page, 'redaktor')
+
+        anonymous = Client().get(url, HTTP_ACCEPT='text/html')
+        self.assertEqual(anonymous.status_code, status.HTTP_200_OK)
+        self.assertNotContains(anonymous, 'redaktor')
+        self.assertNotContains(anonymous, 'csrfmiddlewaretoken')
+
+    def test_save_invalidates_cache(self):
+        """Test unieważnienia cache po zapisie artykułu"""
+        url = reverse('article-detail', kwargs={'pk': self.article.pk})
+        etag = self.client.get(url)['ETag']
+
+        self.article.title = "Changed Title"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.article.save()
+            # Not committed yet: the version is not bumped, so nothing can
+            # be cached under it before the change is visible.
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], "Changed Title")
+
+    def test_migrations_create_cache_table(self):
+        """Test tworzenia tabeli cache przez migracje"""
+        from importlib import import_module
+        from django.db import connection
+
+        migration = import_module('articles.migrations.0012_create_cache_table')
+        with connection.schema_editor() as schema_editor:
+            schema_editor.execute('DROP TABLE django_cache')
+            migration.create_cache_table(None, schema_editor)
+        self.assertIn('django_cache', connection.introspection.table_names())
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scraping_invalidates_cache(self, mock_get):
+        """Test unieważnienia cache po zapisie artykułów przez scraper"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        mock_response = Mock()
+        mock_response.text = '<html><meta charset="utf-8"><title>Scraped</title></html>'
+        mock_response.content = mock_response.text.encode()
+        mock_response.headers = {'Content-Type': 'text/html'}
+        mock_get.return_value = mock_response
+
+        self.assertEqual(len(self.client.get(reverse('article-list')).json()), 1)
+        call_command('scrape_articles', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(len(self.client.get(reverse('article-list')).json()), 5)
+
+
+class ArticleSearchTest(TestCase):
+    """Testy wyszukiwania pełnotekstowego"""
+
+    def setUp(self):
+        self.client = Client()
+        now = timezone.now()
+        self.in_title = Article.objects.create(
+            title="Elektryczne samochody tanieją",
+            content_html="<p>Ceny spadają.</p>",
+            content_text="Ceny spadają.",
+            url="https://example.com/title",
+            source="example.com",
+            published_date=now
+        )
+        self.in_body = Article.objects.create(
+            title="Przegląd tygodnia",
+            content_html="<p>Rynek samochody elektryczne.</p>",
+            content_text="Na rynku: samochody i rowery.",
+            url="https://example.com/body",
+            source="example.com",
+            published_date=now
+        )
+        Article.objects.create(
+            title="Pogoda",
+            content_html="<p>Deszcz.</p>",
+            content_text="Jutro deszcz.",
+            url="https://example.com/other",
+            source="example.com",
+            published_date=now
+        )
+
+    def search(self, query, **params):
+        from urllib.parse import urlencode
+
+        return self.client.get(reverse('article-list') + '?' + urlencode({'q': query, **params}))
+
+    def test_search_ranks_title_above_body(self):
+        """Test kolejności wyników według trafności"""
+        response = self.search('samochody')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.json()], [self.in_title.id, self.in_body.id]
+        )
+
+    def test_search_syntax_and_no_results(self):
+        """Test składni zapytań i braku wyników"""
+        response = self.search('samochody -rowery')
+        self.assertEqual([item['id'] for item in response.json()], [self.in_title.id])
+        self.assertEqual(self.search('nieistniejące').json(), [])
+
+    def test_search_pages(self):
+        """Test stronicowania wyników wyszukiwania"""
+        response = self.search('samochody', page_size=1)
+        self.assertEqual([item['id'] for item in response.json()], [self.in_title.id])
+        next_url = response['Link'][1:response['Link'].index('>')]
+
+        response = self.client.get(next_url)
+        self.assertEqual([item['id'] for item in response.json()], [self.in_body.id])
+        self.assertNotIn('Link', response)
+
+    def test_vector_updated_on_save(self):
+        """Test aktualizacji wektora po zmianie tytułu"""
+        self.in_body.title = "Pogoda na weekend"
+        self.in_body.save()
+        self.assertEqual(
+            [item['id'] for item in self.search('weekend').json()], [self.in_body.id]
+        )
+
+
+class ArticleExportTest(TestCase):
+    """Testy strumieniowego eksportu artykułów"""
+
+    def setUp(self):
+        self.client = Client()
+        base = timezone.make_aware(datetime(2025, 10, 1, 12, 0, 0))
+        self.articles = [
+            Article.objects.create(
+                title=f"Export {i}",
+                content_html=f"<p>Line one\nLine \"{i}\", two</p>",
+                content_text=f"Line one\nLine \"{i}\", two",
+                url=f"https://{source}/export-{i}",
+                source=source,
+                published_date=base + timedelta(days=i)
+            )
+            for i, source in enumerate(["example.com", "test.com", "example.com"])
+        ]
+
+    def export(self, query=''):
+        response = self.client.get(reverse('article-export') + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        """Test eksportu NDJSON w reprezentacji API"""
+        import json
+
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        expected = ArticleSerializer(sorted(self.articles, key=lambda a: a.id), many=True).data
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
+    def test_csv_export(self):
+        """Test eksportu CSV z nagłówkiem"""
+        import csv
+        import io
+
+        response, body = self.export('?format=csv&fields=id,title,content_text')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.reader(io.StringIO(body, newline='')))
+        self.assertEqual(rows[0], ['id', 'title', 'content_text'])
+        self.assertEqual(
+            rows[1:], [[str(a.id), a.title, a.content_text] for a in self.articles]
+        )
+
+    def test_export_filters_and_since(self):
+        """Test filtrów i eksportu przyrostowego"""
+        import json
+
+        def ids(query):
+            return [json.loads(line)['id'] for line in self.export(query)[1].splitlines()]
+
+        self.assertEqual(ids('?source=example.com'), [self.articles[0].id, self.articles[2].id])
+        self.assertEqual(ids(f'?since_id={self.articles[0].id}'), [self.articles[1].id, self.articles[2].id])
+        self.assertEqual(ids('?published_after=2025-10-02&published_before=2025-10-03'), [self.articles[1].id])
+
+        Article.objects.filter(pk=self.articles[2].pk).update(
+            created_at=timezone.now() + timedelta(hours=1)
+        )
+        since = (timezone.now() + timedelta(minutes=30)).isoformat()
+        self.assertEqual(ids('?since=' + since.replace('+', '%2B')), [self.articles[2].id])
+
+    def test_invalid_parameters(self):
+        """Test błędnych parametrów eksportu"""
+        response = self.client.get(reverse('article-export') + '?format=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('format', response.json())
+        response = self.client.get(reverse('article-export') + '?since_id=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        """Test komendy export_articles"""
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        out = StringIO()
+        call_command('export_articles', since_id=self.articles[1].id, chunk_size=1, stdout=out)
+        self.assertEqual([json.loads(line)['id'] for line in out.getvalue().splitlines()], [self.articles[2].id])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'articles.csv')
+            call_command('export_articles', format='csv', fields='id,url', output=path)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines()[0], 'id,url')
+
+        with self.assertRaises(CommandError):
+            call_command('export_articles', published_after='yesterday', stdout=StringIO())
+
+
+class ExportCursorTest(TransactionTestCase):
+    """Test kursora eksportu poza transakcją testu"""
+
+    def test_export_cursor_is_not_holdable(self):
+        """Test odczytu eksportu kursorem bez WITH HOLD"""
+        from django.db import connection
+        from articles.export import iter_export
+
+        for i in range(3):
+            Article.objects.create(
+                title=f"Cursor {i}", content_html="<p>x</p>", content_text="x",
+                url=f"https://example.com/cursor-{i}", source="example.com", published_date=timezone.now(),
+            )
+        chunks = iter_export({}, chunk_size=1)
+        self.assertEqual(next(chunks).count('\n'), 1)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT is_holdable FROM pg_cursors WHERE name LIKE '_django_curs_%%'")
+            self.assertEqual(cursor.fetchall(), [(False,)])
+        self.assertEqual(sum(chunk.count('\n') for chunk in chunks), 2)
+        self.assertFalse(connection.in_atomic_block)
+
+
 class ScraperCommandTest(TestCase):
     """Testy komendy scrape_articles"""
 
@@ -315,6 +930,1340 @@ class ScraperCommandTest(TestCase):
         self.assertEqual(Article.objects.count(), initial_count)
 
 
+    @patch('articles.http_client.requests.Session.get')
+    def test_concurrent_scraping_keeps_input_order(self, mock_get):
+        """Test równoległego pobierania z zachowaniem kolejności raportu"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        def fake_get(url, **kwargs):
+            response = Mock()
+            response.text = f"<html><title>{url.rsplit('/', 1)[-1]}</title><article>2025-10-28</article></html>"
+            response.content = response.text.encode()
+            response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+            return response
+
+        mock_get.side_effect = fake_get
+        out = StringIO()
+        call_command('scrape_articles', concurrency=4, stdout=out, stderr=StringIO())
+
+        output = out.getvalue()
+        positions = [output.index(f"Scraping article {idx}/4") for idx in range(1, 5)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(Article.objects.count(), 4)
+        fetched = [c.args[0] for c in mock_get.call_args_list if not c.args[0].endswith('/robots.txt')]
+        self.assertEqual(len(fetched), 4)
+
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_next_batch_downloads_while_saving(self, mock_get):
+        """Test pobierania kolejnej partii w trakcie zapisu bieżącej"""
+        import threading
+        from io import StringIO
+        from django.core.management import call_command
+        from articles.management.commands.scrape_articles import Command
+
+        last_url = Command.default_urls[-1]
+        last_requested = threading.Event()
+
+        def fake_get(url, **kwargs):
+            if url == last_url:
+                last_requested.set()
+            response = Mock()
+            response.content = f'<html><meta charset="utf-8"><title>{url}</title></html>'.encode()
+            response.text = response.content.decode()
+            response.headers = {'Content-Type': 'text/html'}
+            return response
+
+        save_articles = Command.save_articles
+        overlapped = []
+
+        def save_first_batch(command, jobs):
+            if jobs[0].idx == 1:
+                overlapped.append(last_requested.wait(timeout=5))
+            save_articles(command, jobs)
+
+        mock_get.side_effect = fake_get
+        with patch.object(Command, 'save_articles', save_first_batch):
+            call_command(
+                'scrape_articles', batch_size=2, ignore_robots=True, stdout=StringIO(), stderr=StringIO()
+            )
+
+        self.assertEqual(overlapped, [True])
+        self.assertEqual(Article.objects.count(), 4)
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scraping_with_parse_workers(self, mock_get):
+        """Test parsowania stron w osobnych procesach"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        def fake_get(url, **kwargs):
+            response = Mock()
+            response.content = (
+                f"<html><title>Zażółć {url.rsplit('/', 1)[-1][:10]}</title>"
+                f"<article>28 października 2025</article></html>"
+            ).encode('iso-8859-2')
+            response.headers = {'Content-Type': 'text/html; charset=iso-8859-2'}
+            return response
+
+        mock_get.side_effect = fake_get
+        call_command('scrape_articles', concurrency=2, parse_workers=2, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Article.objects.count(), 4)
+        for article in Article.objects.all():
+            self.assertTrue(article.title.startswith('Zażółć '))
+            self.assertEqual(article.content_text, '28 października 2025')
+            self.assertEqual(article.published_date.date().isoformat(), '2025-10-28')
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_batched_scraping_uses_bulk_queries(self, mock_get):
+        """Test wsadowego sprawdzania duplikatów i zapisu artykułów"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Article.objects.create(
+            title="Existing Article",
+            content_html="<p>Content</p>",
+            content_text="Content",
+            url="https://galicjaexpress.pl/ford-c-max-jaki-silnik-benzynowy-wybrac-aby-zaoszczedzic-na-paliwie",
+            source="galicjaexpress.pl",
+            published_date=timezone.now()
+        )
+        mock_response = Mock()
+        mock_response.text = "<html><title>New Article</title><article>2025-10-28</article></html>"
+        mock_response.content = b'<html><meta charset="utf-8"><title>New Article</title></html>'
+        mock_response.headers = {'Content-Type': 'text/html'}
+        mock_get.return_value = mock_response
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('scrape_articles', batch_size=10, stdout=out, stderr=StringIO())
+
+        statements = article_queries(queries)
+        # One INSERT each for articles and their content, one duplicate
+        # check and one id lookup by URL, one search vector UPDATE and one
+        # UPDATE linking the identical pages to the first of them.
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT')]), 1)
+        self.assertEqual(
+            len([sql for sql in queries.captured_queries if sql['sql'].startswith('INSERT INTO "articles_articlecontent"')]), 1
+        )
+        self.assertEqual(
+            len([sql for sql in statements if sql.startswith('SELECT') and '"url" IN' in sql]), 2
+        )
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE')]), 2)
+        self.assertEqual(Article.objects.filter(duplicate_of__isnull=False).count(), 2)
+        fetched = [c.args[0] for c in mock_get.call_args_list if not c.args[0].endswith('/robots.txt')]
+        self.assertEqual(len(fetched), 3)
+        self.assertEqual(Article.objects.count(), 4)
+        self.assertIn("Article already exists in database. Skipping.", out.getvalue())
+        self.assertIn("Encoding resolved by: meta=3", out.getvalue())
+        self.assertFalse(Article.objects.filter(search_vector__isnull=True).exists())
+
+
+class FingerprintTest(TestCase):
+    """Testy wykrywania duplikatów treści"""
+
+    body = ' '.join(
+        f"Akapit {i} opisuje zużycie paliwa silnika w wersji {i * 7 % 13} przy prędkości {i * 3} km/h."
+        for i in range(60)
+    )
+    other = ' '.join(
+        f"Krok {i}: pierś z kurczaka kroimy na plastry o grubości {i % 4} cm i smażymy {i} minut."
+        for i in range(60)
+    )
+
+    def test_content_hash_and_simhash(self):
+        """Test skrótu dokładnego i odległości SimHash"""
+        from .fingerprints import bands, content_hash, distance, simhash
+
+        self.assertEqual(content_hash(self.body), content_hash("  " + self.body.replace(" ", "\n ")))
+        self.assertIsNone(content_hash("  "))
+        self.assertIsNone(simhash("za krótki tekst"))
+
+        edited = self.body.replace("Akapit 30 ", "Akapit trzydziesty ") + " Redakcja."
+        self.assertNotEqual(content_hash(edited), content_hash(self.body))
+        self.assertLessEqual(distance(simhash(edited), simhash(self.body)), 3)
+        self.assertGreater(distance(simhash(self.other), simhash(self.body)), 3)
+
+        value = simhash(self.body)
+        self.assertTrue(-2 ** 63 <= value < 2 ** 63)
+        self.assertEqual(len(bands(value)), 4)
+
+    def test_fingerprints_saved_with_article(self):
+        """Test zapisu skrótów przy zapisie artykułu i zmianie treści"""
+        from .fingerprints import content_hash, simhash
+
+        article = Article.objects.create(
+            title="Ford", content_html="", content_text=self.body,
+            url="https://example.com/ford", source="example.com", published_date=timezone.now()
+        )
+        article = Article.objects.get(pk=article.pk)
+        self.assertEqual(article.content_hash, content_hash(self.body))
+        self.assertEqual(article.simhash, simhash(self.body))
+        self.assertIsNotNone(article.simhash_band3)
+
+        article.content.content_text = "Krótko."
+        article.content.save()
+        article.refresh_from_db()
+        self.assertEqual(article.content_hash, content_hash("Krótko."))
+        self.assertIsNone(article.simhash)
+        self.assertIsNone(article.simhash_band0)
+
+    def test_near_duplicates_query(self):
+        """Test wyszukiwania bliskich duplikatów z odległością liczoną w bazie"""
+        from .fingerprints import MASK, bands, simhash
+
+        def flip(value, *bits):
+            value = (value & MASK) ^ sum(1 << bit for bit in bits)
+            return value - (1 << 64) if value >> 63 else value
+
+        base = simhash(self.body)
+        values = {
+            'three': flip(base, 0, 1, 2),
+            'sign': flip(base, 63, 40, 20),
+            'four': flip(base, 0, 1, 2, 3),
+            'none': None,
+        }
+        for name, value in values.items():
+            article = Article.objects.create(
+                title=name, content_html="", content_text="",
+                url=f"https://example.com/{name}", source="example.com", published_date=timezone.now()
+            )
+            fields = {f'simhash_band{i}': None for i in range(4)}
+            if value is not None:
+                fields.update((f'simhash_band{i}', band) for i, band in enumerate(bands(value)))
+            Article.objects.filter(pk=article.pk).update(simhash=value, **fields)
+
+        titles = Article.objects.near_duplicates([base], 3).values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['sign', 'three'])
+        self.assertEqual(list(Article.objects.near_duplicates([base], 0)), [])
+
+    def run_scraper(self, pages, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        def fake_get(url, **kwargs):
+            response = Mock()
+            response.content = (
+                f"<html><meta charset=\"utf-8\"><title>{url}</title>"
+                f"<article>{pages.get(url, '')}</article></html>"
+            ).encode()
+            response.text = response.content.decode()
+            response.headers = {'Content-Type': 'text/html'}
+            return response
+
+        out = StringIO()
+        with patch('articles.http_client.requests.Session.get', side_effect=fake_get), \
+                patch.object(Command, 'default_urls', list(pages)):
+            call_command('scrape_articles', stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_scraping_links_duplicates(self):
+        """Test łączenia duplikatów z oryginałem w bazie i w tej samej partii"""
+        original = Article.objects.create(
+            title="Ford", content_html="", content_text=self.body,
+            url="https://example.com/ford", source="example.com", published_date=timezone.now()
+        )
+        copy = Article.objects.create(
+            title="Ford (kopia)", content_html="", content_text=self.body, duplicate_of=original,
+            url="https://example.com/ford-kopia", source="example.com", published_date=timezone.now()
+        )
+        output = self.run_scraper({
+            "https://mirror.example.org/ford": self.body + " Źródło: example.com.",
+            "https://example.org/kurczak": self.other,
+            "https://example.net/kurczak": self.other,
+        })
+
+        self.assertEqual(Article.objects.get(url="https://mirror.example.org/ford").duplicate_of, original)
+        kurczak = Article.objects.get(url="https://example.org/kurczak")
+        self.assertIsNone(kurczak.duplicate_of)
+        self.assertEqual(Article.objects.get(url="https://example.net/kurczak").duplicate_of, kurczak)
+        self.assertIn("Duplicate of: https://example.com/ford\n", output)
+        self.assertFalse(copy.duplicates.exists())
+
+        response = self.client.get(reverse('article-list') + '?duplicates=exclude&fields=url')
+        self.assertEqual(
+            sorted(row['url'] for row in response.json()),
+            ["https://example.com/ford", "https://example.org/kurczak"],
+        )
+        response = self.client.get(reverse('article-list') + '?duplicates=maybe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_scraping_skips_duplicates(self):
+        """Test pomijania duplikatów i wyłączenia wykrywania"""
+        pages = {
+            "https://example.com/ford": self.body,
+            "https://example.com/ford/print": self.body.replace("Akapit 30 ", "Akapit trzydziesty "),
+        }
+        output = self.run_scraper(pages, duplicates='skip')
+        self.assertEqual(list(Article.objects.values_list('url', flat=True)), ["https://example.com/ford"])
+        self.assertIn("Duplicate of https://example.com/ford. Skipping.", output)
+
+        Article.objects.all().delete()
+        self.run_scraper(pages, duplicates='skip', near_duplicate_distance=0)
+        self.assertEqual(Article.objects.count(), 2)
+
+        Article.objects.all().delete()
+        pages["https://example.com/ford/amp"] = self.body
+        self.run_scraper(pages, duplicates='keep')
+        self.assertEqual(Article.objects.filter(duplicate_of__isnull=True).count(), 3)
+
+
+class CanonicalUrlTest(TestCase):
+    """Testy normalizacji adresów URL"""
+
+    def test_canonicalize_url(self):
+        """Test usuwania parametrów śledzących, fragmentu i końcowego ukośnika"""
+        from .canonical import canonicalize_url, page_canonical_url
+
+        self.assertEqual(
+            canonicalize_url("HTTPS://Example.COM:443/Artykul/?utm_source=fb&b=2&fbclid=x&a=1#komentarze"),
+            "https://example.com/Artykul?a=1&b=2",
+        )
+        self.assertEqual(canonicalize_url("https://example.com"), "https://example.com/")
+        self.assertEqual(canonicalize_url("http://example.com:8080/a/"), "http://example.com:8080/a")
+        self.assertEqual(page_canonical_url("https://m.example.com/a/b?x=1", "../c/"), "https://m.example.com/c")
+        self.assertEqual(page_canonical_url("https://example.com/a?utm_medium=x", "javascript:void(0)"), "https://example.com/a")
+
+    def test_canonical_url_saved_with_article(self):
+        """Test unikalności kanonicznego adresu przy zapisie"""
+        from django.db import IntegrityError, transaction
+
+        article = Article.objects.create(
+            title="A", content_html="", content_text="", source="example.com",
+            url="https://Example.com/a/?utm_source=x", published_date=timezone.now()
+        )
+        self.assertEqual(article.canonical_url, "https://example.com/a")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Article.objects.create(
+                title="A", content_html="", content_text="", source="example.com",
+                url="https://example.com/a#top", published_date=timezone.now()
+            )
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scraping_skips_url_variants(self, mock_get):
+        """Test pomijania wariantów URL przed pobraniem i według rel=canonical"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        Article.objects.create(
+            title="Stored", content_html="", content_text="", source="example.com",
+            url="https://example.com/stored", published_date=timezone.now()
+        )
+
+        def fake_get(url, **kwargs):
+            response = Mock()
+            canonical = '<link rel="canonical" href="https://example.com/stored">' if '/amp/' in url else ''
+            response.content = f'<html><meta charset="utf-8"><title>{url}</title>{canonical}</html>'.encode()
+            response.text = response.content.decode()
+            response.headers = {'Content-Type': 'text/html'}
+            return response
+
+        mock_get.side_effect = fake_get
+        urls = [
+            "https://example.com/stored/?utm_source=newsletter",
+            "https://example.com/new",
+            "https://EXAMPLE.com/new#comments",
+            "https://example.com/amp/stored",
+        ]
+        out = StringIO()
+        with patch.object(Command, 'default_urls', urls):
+            call_command('scrape_articles', stdout=out, stderr=StringIO())
+
+        fetched = [c.args[0] for c in mock_get.call_args_list if not c.args[0].endswith('/robots.txt')]
+        self.assertEqual(fetched, ["https://example.com/new", "https://example.com/amp/stored"])
+        self.assertEqual(
+            sorted(Article.objects.values_list('canonical_url', flat=True)),
+            ["https://example.com/new", "https://example.com/stored"],
+        )
+        self.assertEqual(out.getvalue().count("Article already exists in database. Skipping."), 3)
+
+
+class RefreshTest(TestCase):
+    """Testy odświeżania zapisanych artykułów"""
+
+    urls = [
+        "https://example.com/etag",
+        "https://example.com/same",
+        "https://example.com/changed",
+        "https://example.com/markup",
+    ]
+
+    def setUp(self):
+        self.pages = {url: f"<title>{url}</title><article>Treść {url}</article>" for url in self.urls}
+        self.requests = []
+
+    def fake_get(self, url, headers=None, **kwargs):
+        response = Mock()
+        if url.endswith('/robots.txt'):
+            response.status_code = 404
+            response.text = response.content = ''
+            return response
+        self.requests.append((url, headers))
+        if url.endswith('/etag') and (headers or {}).get('If-None-Match') == '"v1"':
+            response.status_code = 304
+            response.content = b''
+            response.headers = {}
+            return response
+        response.status_code = 200
+        response.content = f'<html><meta charset="utf-8">{self.pages[url]}</html>'.encode()
+        response.text = response.content.decode()
+        response.headers = {'Content-Type': 'text/html', 'ETag': '"v1"', 'Last-Modified': 'Tue, 28 Oct 2025 10:00:00 GMT'}
+        return response
+
+    def scrape(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        self.requests = []
+        out = StringIO()
+        with patch('articles.http_client.requests.Session.get', side_effect=self.fake_get), \
+                patch.object(Command, 'default_urls', self.urls):
+            call_command('scrape_articles', stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_parse_age(self):
+        """Test formatu wieku dla --refresh-older-than"""
+        from argparse import ArgumentTypeError
+        from articles.management.commands.scrape_articles import parse_age
+
+        self.assertEqual(parse_age('90m'), timedelta(minutes=90))
+        self.assertEqual(parse_age('7d'), timedelta(days=7))
+        self.assertEqual(parse_age('3600'), timedelta(hours=1))
+        for value in ('tydzień', '-1h'):
+            with self.assertRaises(ArgumentTypeError):
+                parse_age(value)
+
+    def test_refresh(self):
+        """Test warunkowych żądań i zapisu tylko zmienionych artykułów"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .search import search
+
+        self.scrape()
+        stored = Article.objects.get(url="https://example.com/same")
+        self.assertEqual(stored.etag, '"v1"')
+        self.assertEqual(stored.last_modified, 'Tue, 28 Oct 2025 10:00:00 GMT')
+        self.assertEqual(len(stored.page_hash), 64)
+        self.assertIsNotNone(stored.fetched_at)
+        self.assertIn("Article already exists in database. Skipping.", self.scrape())
+
+        self.pages["https://example.com/changed"] = "<title>Nowy tytuł</title><article>Zmieniona treść o rowerach</article>"
+        self.pages["https://example.com/markup"] = self.pages["https://example.com/markup"].replace(
+            "<article>", "<!-- reklama --><article>"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            output = self.scrape(refresh=True)
+
+        self.assertIn(('https://example.com/etag', {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 28 Oct 2025 10:00:00 GMT'
+        }), self.requests)
+        self.assertIn("Article not modified since the last download. Skipping.", output)
+        self.assertEqual(output.count("Article unchanged. Skipping."), 2)
+        self.assertIn("Successfully updated article", output)
+        self.assertIn("Refreshed: updated=1, unchanged=2, not_modified=1", output)
+
+        changed = Article.objects.get(url="https://example.com/changed")
+        self.assertEqual(changed.title, "Nowy tytuł")
+        self.assertEqual(changed.content_text, "Zmieniona treść o rowerach")
+        self.assertEqual(list(search(Article.objects.all(), 'rowerach')), [changed])
+        self.assertEqual(Article.objects.count(), 4)
+        # Only the changed article's content is written.
+        content_updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "articles_articlecontent"')
+        ]
+        self.assertEqual(len(content_updates), 1)
+        self.assertNotIn('/markup', ' '.join(content_updates))
+
+        output = self.scrape(refresh_older_than=timedelta(hours=1))
+        self.assertEqual(self.requests, [])
+        self.assertIn("Refreshed: updated=0, unchanged=0, not_modified=0", output)
+
+    def test_refresh_updates_changed_date(self):
+        """Test zapisu zmienionej daty publikacji przy niezmienionej treści"""
+        dated = "https://example.com/same"
+        self.pages[dated] = (
+            '<head><title>Artykuł</title><meta property="article:published_time" content="2025-10-01T08:00:00+00:00">'
+            '</head><article>Treść bez zmian</article>'
+        )
+        self.scrape()
+        # A page without a date in its markup, scraped on an earlier day.
+        undated = Article.objects.filter(url="https://example.com/markup")
+        undated.update(published_date=timezone.now() - timedelta(days=3))
+        undated_date = undated.get().published_date
+
+        self.pages[dated] = self.pages[dated].replace('2025-10-01', '2025-10-02')
+        self.pages["https://example.com/markup"] += "<!-- reklama -->"
+        output = self.scrape(refresh=True)
+
+        self.assertIn("Refreshed: updated=1, unchanged=2, not_modified=1", output)
+        self.assertEqual(Article.objects.get(url=dated).published_date.isoformat(), '2025-10-02T08:00:00+00:00')
+        self.assertEqual(undated.get().published_date, undated_date)
+
+
+class CrawlQueueTest(TestCase):
+    """Testy kolejki zadań scrapowania"""
+
+    def test_enqueue_skips_queued_urls(self):
+        """Test pomijania adresów już obecnych w kolejce"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import CrawlJob
+
+        out = StringIO()
+        call_command('enqueue_urls', 'https://example.com/a', 'https://example.com/a/?utm_source=x',
+                     'https://example.com/b', stdout=out)
+        call_command('enqueue_urls', 'https://example.com/b#top', stdout=StringIO())
+
+        self.assertIn("Enqueued 3 URLs", out.getvalue())
+        self.assertEqual(
+            list(CrawlJob.objects.order_by('id').values_list('url', 'status')),
+            [('https://example.com/a', 'pending'), ('https://example.com/b', 'pending')],
+        )
+
+    def test_claim_lease_and_complete(self):
+        """Test przydzielania partii, wygasania dzierżawy i limitu prób"""
+        from . import crawl_queue
+        from .models import CrawlJob
+
+        crawl_queue.enqueue([f'https://example.com/{i}' for i in range(5)])
+        first = crawl_queue.claim('w1', 2, lease=60)
+        second = crawl_queue.claim('w2', 10, lease=60)
+        self.assertEqual([job.url for job in first], ['https://example.com/0', 'https://example.com/1'])
+        self.assertEqual(len(second), 3)
+        self.assertEqual(crawl_queue.claim('w3', 10), [])
+
+        # w1 stalls: its lease expires and w3 takes the jobs over.
+        CrawlJob.objects.filter(leased_by='w1').update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        taken_over = crawl_queue.claim('w3', 10, lease=60)
+        self.assertEqual([job.id for job in taken_over], [job.id for job in first])
+        self.assertEqual(crawl_queue.complete('w1', first, {job.id: ('saved', None) for job in first}), 0)
+
+        results = {taken_over[0].id: ('saved', None), taken_over[1].id: ('download_error', 'Timeout')}
+        self.assertEqual(crawl_queue.complete('w3', taken_over, results, max_attempts=3), 2)
+        done, retried = CrawlJob.objects.filter(id__in=results).order_by('id')
+        self.assertEqual((done.status, done.result, done.attempts), ('done', 'saved', 2))
+        self.assertEqual((retried.status, retried.error), ('pending', 'Timeout'))
+
+        # Out of attempts: an expired claim is failed, not handed out again.
+        CrawlJob.objects.filter(pk=retried.pk).update(
+            status='claimed', attempts=3, lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(crawl_queue.claim('w4', 10), [])
+        retried.refresh_from_db()
+        self.assertEqual((retried.status, retried.error), ('failed', 'Lease expired'))
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scrape_worker(self, mock_get):
+        """Test przetwarzania kolejki przez worker"""
+        from io import StringIO
+        from django.core.management import call_command
+        from . import crawl_queue
+        from .models import CrawlJob
+
+        Article.objects.create(
+            title="Stored", content_html="", content_text="", source="example.com",
+            url="https://example.com/stored", published_date=timezone.now()
+        )
+
+        def fake_get(url, **kwargs):
+            if url.endswith('/broken'):
+                raise requests.exceptions.ConnectionError("Connection refused")
+            response = Mock()
+            response.content = f'<html><meta charset="utf-8"><title>{url}</title></html>'.encode()
+            response.text = response.content.decode()
+            response.headers = {'Content-Type': 'text/html'}
+            return response
+
+        mock_get.side_effect = fake_get
+        crawl_queue.enqueue([
+            'https://example.com/stored', 'https://example.com/new', 'https://example.org/broken',
+        ])
+        for _ in range(2):
+            call_command(
+                'scrape_worker', worker_id='test', exit_when_empty=True, batch_size=2,
+                retries=0, max_attempts=2, stdout=StringIO(), stderr=StringIO(),
+            )
+
+        self.assertEqual(
+            list(CrawlJob.objects.order_by('id').values_list('status', 'result', 'attempts')),
+            [('done', 'exists', 1), ('done', 'saved', 1), ('failed', 'download_error', 2)],
+        )
+        self.assertEqual(Article.objects.filter(url='https://example.com/new').count(), 1)
+
+    def test_scrape_worker_rejects_url_sources(self):
+        """Test odrzucania przez worker opcji źródeł URL-i"""
+        from django.core.management.base import CommandError
+        from articles.management.commands.scrape_worker import Command as WorkerCommand
+
+        parser = WorkerCommand().create_parser('manage.py', 'scrape_worker')
+        for args in (['--urls-file', 'urls.txt'], ['--sitemap', 'sitemap.xml'], ['--refresh'],
+                     ['--refresh-older-than', '7d']):
+            with self.assertRaises(CommandError):
+                parser.parse_args(args)
+
+    def test_scrape_worker_renews_leases(self):
+        """Test przedłużania rezerwacji partii w trakcie jej przetwarzania"""
+        import time
+        from collections import deque
+        from articles.management.commands.scrape_worker import Command as WorkerCommand
+        from . import crawl_queue
+        from .models import CrawlJob
+
+        crawl_queue.enqueue(['https://example.com/a', 'https://example.com/b'])
+        claimed = crawl_queue.claim('w1', 10, lease=30)
+        CrawlJob.objects.filter(url='https://example.com/b').update(leased_by='w2')
+        expires = dict(CrawlJob.objects.values_list('url', 'lease_expires_at'))
+
+        worker = WorkerCommand()
+        worker.worker, worker.lease, worker.claimed = 'w1', 300, deque([claimed])
+        worker.renewed_at = time.monotonic()
+        worker.heartbeat()
+        self.assertEqual(dict(CrawlJob.objects.values_list('url', 'lease_expires_at')), expires)
+
+        worker.renewed_at -= 100
+        worker.heartbeat()
+        renewed = dict(CrawlJob.objects.values_list('url', 'lease_expires_at'))
+        self.assertGreater(renewed['https://example.com/a'], expires['https://example.com/a'] + timedelta(seconds=200))
+        # Taken over by another worker: left alone.
+        self.assertEqual(renewed['https://example.com/b'], expires['https://example.com/b'])
+
+
+class SkipLockedClaimTest(TransactionTestCase):
+    """Test równoległego przydzielania zadań"""
+
+    def test_locked_jobs_are_skipped(self):
+        """Test pomijania zadań zablokowanych przez inny worker bez czekania"""
+        import threading
+        from django.db import connection, transaction
+        from . import crawl_queue
+        from .models import CrawlJob
+
+        crawl_queue.enqueue([f'https://example.com/{i}' for i in range(4)])
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.extend(job.url for job in crawl_queue.claim('other', 10))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            # This worker holds row locks on the first two jobs.
+            list(CrawlJob.objects.select_for_update().order_by('id')[:2])
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(claimed, ['https://example.com/2', 'https://example.com/3'])
+
+
+class MetricsTest(TestCase):
+    """Testy metryk scrapera i API"""
+
+    def test_histogram_and_counter_exposition(self):
+        """Test formatu tekstowego Prometheus i kwantyli"""
+        from .metrics import Registry
+
+        registry = Registry()
+        histogram = registry.histogram('test_seconds', 'Test.', ['stage'], buckets=(0.1, 1.0))
+        counter = registry.counter('test_errors_total', 'Test.', ['host'])
+        for value in (0.05, 0.05, 0.5, 2.0):
+            histogram.observe(value, stage='parse')
+        counter.inc(host='a"b')
+
+        text = registry.render()
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{stage="parse",le="0.1"} 2', text)
+        self.assertIn('test_seconds_bucket{stage="parse",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_count{stage="parse"} 4', text)
+        self.assertIn('test_errors_total{host="a\\"b"} 1', text)
+
+        summary = histogram.snapshot()['parse']
+        self.assertEqual((summary['count'], summary['max']), (4, 2.0))
+        self.assertAlmostEqual(summary['p50'], 0.1)
+
+    def test_quantiles_do_not_exceed_max(self):
+        """Test kwantyli pojedynczej obserwacji nieprzekraczających maksimum"""
+        from .metrics import Registry
+
+        histogram = Registry().histogram('test_seconds', 'Test.', ['stage'], buckets=(0.5, 1.0))
+        histogram.observe(0.546, stage='save')
+        summary = histogram.snapshot()['save']
+        self.assertEqual((summary['p50'], summary['p95'], summary['max']), (0.546, 0.546, 0.546))
+
+    def test_metrics_endpoint(self):
+        """Test endpointu /metrics z czasami odpowiedzi API"""
+        Article.objects.create(
+            title="A", content_html="", content_text="", source="example.com",
+            url="https://example.com/a", published_date=timezone.now()
+        )
+        self.client.get(reverse('article-list'))
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('articles_api_request_seconds_count{view="article-list",method="GET",status="200"}', text)
+        self.assertIn('articles_api_stage_seconds_count{view="article-list",stage="query"}', text)
+        self.assertIn('articles_api_stage_seconds_count{view="article-list",stage="format"}', text)
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scrape_summary_and_profile(self, mock_get):
+        """Test podsumowania JSON, liczników błędów i profilu cProfile"""
+        import json
+        import os
+        import pstats
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        def fake_get(url, **kwargs):
+            if 'take-group' in url:
+                raise requests.exceptions.ConnectionError("Connection refused")
+            response = Mock()
+            response.content = f'<html><meta charset="utf-8"><title>{url}</title><time>2025-10-28</time></html>'.encode()
+            response.text = response.content.decode()
+            response.headers = {'Content-Type': 'text/html'}
+            return response
+
+        mock_get.side_effect = fake_get
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scrape.prof')
+            call_command('scrape_articles', retries=0, profile=path, stdout=out, stderr=StringIO())
+            stats = pstats.Stats(path)
+        self.assertTrue(any(name == 'process_batch' for _, _, name in stats.stats))
+
+        summary = json.loads(out.getvalue().strip().splitlines()[-1])
+        self.assertEqual(summary['pages'], 4)
+        self.assertEqual(summary['statuses'], {'download_error': 2, 'saved': 2})
+        self.assertEqual(summary['errors_by_host'], {'take-group.github.io': {'download': 2}})
+        self.assertGreater(summary['downloaded_bytes'], 0)
+        self.assertEqual(summary['encoding_tiers'], {'meta': 2})
+        for stage in ('download', 'encoding', 'parse', 'dates', 'existing', 'duplicates', 'save'):
+            self.assertIn(stage, summary['stages'])
+        self.assertEqual(summary['stages']['parse']['count'], 2)
+        self.assertGreater(summary['pages_per_second'], 0)
+
+    def test_metrics_server(self):
+        """Test serwowania metryk workera przez HTTP"""
+        from urllib.request import urlopen
+        from .metrics import ScrapeMetrics, serve
+
+        metrics = ScrapeMetrics()
+        metrics.pages.inc(status='saved')
+        server = serve(metrics, 0, host='127.0.0.1')
+        try:
+            with urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics', timeout=5) as response:
+                text = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('scrape_pages_total{status="saved"} 1', text)
+
+
+class HttpClientTest(TestCase):
+    """Testy wspólnej sesji HTTP"""
+
+    def test_session_negotiates_compression(self):
+        """Test nagłówka Accept-Encoding z poprawną listą kodowań"""
+        from articles.http_client import build_session
+
+        session = build_session()
+        codings = [c.strip() for c in session.headers['Accept-Encoding'].split(',')]
+        self.assertIn('gzip', codings)
+        self.assertIn('deflate', codings)
+        self.assertNotIn('*/*', codings)
+
+    def test_session_pool_sizes(self):
+        """Test konfiguracji pul połączeń keep-alive"""
+        from articles.http_client import build_session
+
+        session = build_session(pool_connections=4, pool_maxsize=32)
+        adapter = session.get_adapter('https://galicjaexpress.pl/')
+        self.assertEqual(adapter._pool_connections, 4)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertIs(adapter, session.get_adapter('http://take-group.github.io/'))
+
+
+class PolitenessTest(TestCase):
+    """Testy harmonogramu pobierania z limitami na host"""
+
+    def test_download_queue_interleaves_hosts(self):
+        """Test przeplatania URL-i między hostami"""
+        from articles.politeness import DownloadQueue, HostScheduler
+
+        scheduler = HostScheduler(max_in_flight=10)
+        queue = DownloadQueue(scheduler)
+        urls = [
+            'https://a.pl/1', 'https://a.pl/2', 'https://a.pl/3',
+            'https://b.pl/1', 'https://B.pl/2', 'https://c.pl/1',
+        ]
+        for url in urls:
+            queue.push(url, url)
+            scheduler.prepare(url)
+        self.assertEqual(queue.pop_ready(10), [
+            'https://a.pl/1', 'https://b.pl/1', 'https://c.pl/1',
+            'https://a.pl/2', 'https://B.pl/2', 'https://a.pl/3',
+        ])
+
+    def test_token_bucket(self):
+        """Test kubełka tokenów"""
+        from articles.politeness import TokenBucket
+
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+        now[0] = 10.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_robots_crawl_delay_fetched_once_per_host(self):
+        """Test odczytu Crawl-delay z robots.txt raz na host"""
+        from articles.politeness import HostScheduler
+
+        session = Mock()
+        session.get.return_value = Mock(status_code=200, text="User-agent: *\nCrawl-delay: 5\n")
+        scheduler = HostScheduler(session=session)
+        url = 'https://galicjaexpress.pl/article'
+
+        self.assertEqual(scheduler.try_acquire(url), 0)
+        scheduler.prepare(url)
+        scheduler.release(url)
+        waits = []
+        for _ in range(2):
+            waits.append(scheduler.try_acquire(url))
+            scheduler.prepare(url)
+
+        session.get.assert_called_once_with('https://galicjaexpress.pl/robots.txt', timeout=10)
+        self.assertTrue(all(4.9 < wait <= 5 for wait in waits))
+        self.assertEqual(scheduler.state('galicjaexpress.pl').in_flight, 0)
+
+    def test_max_in_flight_per_host(self):
+        """Test limitu równoczesnych żądań do jednego hosta"""
+        from articles.politeness import HostScheduler
+
+        scheduler = HostScheduler(max_in_flight=2)
+        for host in ('a.pl', 'b.pl'):
+            scheduler.prepare(f'https://{host}/')
+        self.assertEqual([scheduler.try_acquire('https://a.pl/1') for _ in range(3)], [0, 0, None])
+        self.assertEqual(scheduler.try_acquire('https://b.pl/1'), 0)
+        scheduler.release('https://a.pl/1')
+        self.assertEqual(scheduler.try_acquire('https://a.pl/2'), 0)
+        self.assertIsNone(scheduler.try_acquire('https://a.pl/3'))
+
+    def test_download_queue_defers_throttled_host(self):
+        """Test odkładania URL-i hosta czekającego na Crawl-delay bez blokowania pozostałych"""
+        from articles.politeness import DownloadQueue, HostScheduler
+
+        session = Mock()
+        session.get.side_effect = lambda url, **kwargs: (
+            Mock(status_code=200, text="User-agent: *\nCrawl-delay: 5\n") if 'slow.pl' in url
+            else Mock(status_code=404)
+        )
+        scheduler = HostScheduler(session=session, max_in_flight=2)
+        queue = DownloadQueue(scheduler)
+        for i in range(3):
+            queue.push(f'https://slow.pl/{i}', f'slow{i}')
+        for i in range(4):
+            queue.push(f'https://fast.pl/{i}', f'fast{i}')
+
+        # Until robots.txt is read, one request per host.
+        self.assertEqual(queue.pop_ready(10), ['slow0', 'fast0'])
+        self.assertEqual(queue.pop_ready(10), [])
+        for url in ('https://slow.pl/0', 'https://fast.pl/0'):
+            scheduler.prepare(url)
+            queue.release(url)
+
+        # slow.pl waits for its token without taking a slot; fast.pl gets
+        # its two slots, then waits for a release.
+        self.assertEqual(queue.pop_ready(10), ['fast1', 'fast2'])
+        self.assertTrue(4 < queue.next_ready() <= 5)
+        self.assertEqual(scheduler.state('slow.pl').in_flight, 0)
+        queue.release('https://fast.pl/1')
+        self.assertEqual(queue.pop_ready(10), ['fast3'])
+        self.assertEqual(len(queue), 2)
+
+    def test_slow_robots_does_not_block_other_hosts(self):
+        """Test pobierania robots.txt poza blokadą hosta"""
+        import threading
+        from articles.politeness import DownloadQueue, HostScheduler
+
+        fetching = threading.Event()
+        unblock = threading.Event()
+
+        def get(url, **kwargs):
+            if 'slow.pl' in url:
+                fetching.set()
+                unblock.wait(5)
+            return Mock(status_code=404)
+
+        scheduler = HostScheduler(session=Mock(get=get))
+        queue = DownloadQueue(scheduler)
+        for url in ('https://slow.pl/1', 'https://slow.pl/2', 'https://fast.pl/1'):
+            queue.push(url, url)
+        self.assertEqual(queue.pop_ready(10), ['https://slow.pl/1', 'https://fast.pl/1'])
+
+        loader = threading.Thread(target=scheduler.prepare, args=('https://slow.pl/1',))
+        loader.start()
+        try:
+            self.assertTrue(fetching.wait(5))
+            # While slow.pl's robots.txt is being fetched neither host waits
+            # on its lock: slow.pl keeps its one request, fast.pl goes on.
+            scheduler.prepare('https://fast.pl/1')
+            queue.release('https://fast.pl/1')
+            queue.push('https://fast.pl/2', 'https://fast.pl/2')
+            self.assertEqual(queue.pop_ready(10), ['https://fast.pl/2'])
+            self.assertIsNone(scheduler.try_acquire('https://slow.pl/2'))
+            self.assertTrue(scheduler.state('slow.pl').robots_loading)
+        finally:
+            unblock.set()
+            loader.join()
+
+        self.assertTrue(scheduler.state('slow.pl').robots_loaded)
+        queue.release('https://slow.pl/1')
+        self.assertEqual(queue.pop_ready(10), ['https://slow.pl/2'])
+
+    def test_download_queue_delayed_retry(self):
+        """Test ponowienia pobrania dopiero po opóźnieniu"""
+        from articles.politeness import DownloadQueue, HostScheduler
+
+        now = [0.0]
+        scheduler = HostScheduler()
+        queue = DownloadQueue(scheduler, clock=lambda: now[0])
+        queue.push('https://a.pl/2', 'next')
+        queue.push('https://a.pl/1', 'retry', delay=2)
+        self.assertEqual(queue.pop_ready(1), ['next'])
+        scheduler.prepare('https://a.pl/2')
+        queue.release('https://a.pl/2')
+        queue.push('https://a.pl/3', 'new')
+        self.assertEqual(queue.next_ready(), 0)
+        now[0] = 2.0
+        self.assertEqual(queue.pop_ready(10), ['retry', 'new'])
+        self.assertEqual(len(queue), 0)
+
+
+class RetryTest(TestCase):
+    """Testy ponawiania pobrań i bezpiecznika dla hostów"""
+
+    def error_response(self, status_code, headers=None):
+        response = Mock(status_code=status_code, headers=headers or {})
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+        return response
+
+    def test_transient_errors(self):
+        """Test klasyfikacji błędów przejściowych"""
+        from articles.retries import RetryPolicy
+
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_transient(requests.ConnectionError()))
+        self.assertTrue(policy.is_transient(requests.Timeout()))
+        self.assertTrue(policy.is_transient(requests.HTTPError(response=Mock(status_code=503))))
+        self.assertTrue(policy.is_transient(requests.HTTPError(response=Mock(status_code=429))))
+        self.assertFalse(policy.is_transient(requests.HTTPError(response=Mock(status_code=404))))
+        self.assertFalse(policy.is_transient(ValueError()))
+
+    def test_backoff_delay(self):
+        """Test opóźnień z losowym rozrzutem i nagłówkiem Retry-After"""
+        from email.utils import format_datetime
+        from articles.retries import RetryPolicy
+
+        policy = RetryPolicy(backoff=1, max_backoff=5, random=lambda: 1.0)
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [1, 2, 4, 5])
+        self.assertEqual(policy.delay(0, Mock(headers={'Retry-After': '3'})), 3)
+        self.assertEqual(policy.delay(0, Mock(headers={'Retry-After': '120'})), 5)
+
+        retry_at = format_datetime(timezone.now() + timedelta(seconds=2), usegmt=True)
+        self.assertTrue(0 < policy.delay(0, Mock(headers={'Retry-After': retry_at})) <= 2)
+
+        policy = RetryPolicy(backoff=1, random=lambda: 0.25)
+        self.assertEqual(policy.delay(3), 2)
+
+    def test_circuit_breaker(self):
+        """Test otwierania i ponownego sprawdzania hosta przez bezpiecznik"""
+        from articles.retries import CircuitBreaker, CircuitOpenError
+
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: now[0])
+        breaker.record_failure('dead.pl')
+        breaker.check('dead.pl')
+        breaker.record_failure('dead.pl')
+        with self.assertRaises(CircuitOpenError):
+            breaker.check('dead.pl')
+        breaker.check('alive.pl')
+
+        now[0] = 10.0
+        breaker.check('dead.pl')
+        with self.assertRaises(CircuitOpenError):
+            breaker.check('dead.pl')
+        breaker.record_failure('dead.pl')
+        with self.assertRaises(CircuitOpenError):
+            breaker.check('dead.pl')
+
+        now[0] = 20.0
+        breaker.check('dead.pl')
+        breaker.record_success('dead.pl')
+        breaker.check('dead.pl')
+        breaker.check('dead.pl')
+
+    def test_circuit_breaker_message_survives_success(self):
+        """Test komunikatu bezpiecznika, gdy inny wątek zamknie obwód tuż po sprawdzeniu"""
+        from articles.retries import CircuitBreaker, CircuitOpenError
+
+        breaker = CircuitBreaker(threshold=1)
+        breaker.record_failure('dead.pl')
+        lock = breaker.lock
+
+        class SuccessOnRelease:
+            def __enter__(self):
+                return lock.__enter__()
+
+            def __exit__(self, *exc_info):
+                lock.__exit__(*exc_info)
+                breaker.lock = lock
+                breaker.record_success('dead.pl')
+
+        breaker.lock = SuccessOnRelease()
+        with self.assertRaisesMessage(CircuitOpenError, 'after 1 consecutive failures'):
+            breaker.check('dead.pl')
+
+    @patch('articles.http_client.requests.Session.get')
+    def test_scraping_retries_and_skips_dead_hosts(self, mock_get):
+        """Test ponawiania błędów 503 i pomijania niedziałającego hosta"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        ok = Mock(status_code=200, headers={'Content-Type': 'text/html; charset=utf-8'})
+        ok.content = b'<html><title>Recovered</title><article>2025-10-28</article></html>'
+        ok.text = ok.content.decode()
+        attempts = {}
+
+        def fake_get(url, **kwargs):
+            if 'galicjaexpress.pl' in url:
+                raise requests.ConnectionError("Connection refused")
+            attempts[url] = attempts.get(url, 0) + 1
+            return self.error_response(503) if attempts[url] == 1 else ok
+
+        mock_get.side_effect = fake_get
+        out, err = StringIO(), StringIO()
+        call_command(
+            'scrape_articles', retries=2, backoff=0, breaker_threshold=2,
+            ignore_robots=True, stdout=out, stderr=err
+        )
+
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertEqual(set(attempts.values()), {2})
+        galicja_calls = [c for c in mock_get.call_args_list if 'galicjaexpress.pl' in c.args[0]]
+        self.assertEqual(len(galicja_calls), 2)
+        self.assertIn("Circuit open for galicjaexpress.pl", err.getvalue())
+
+
+class EncodingResolverTest(TestCase):
+    """Testy wielopoziomowego wykrywania kodowania stron"""
+
+    def test_content_type_charset(self):
+        """Test kodowania z nagłówka Content-Type"""
+        from articles.encoding import resolve_encoding
+
+        content = '<meta charset="utf-8"><p>zażółć</p>'.encode('iso-8859-2')
+        self.assertEqual(
+            resolve_encoding(content, 'text/html; charset="ISO-8859-2"'),
+            ('iso8859-2', 'header')
+        )
+
+    def test_bom(self):
+        """Test kodowania z BOM"""
+        from articles.encoding import resolve_encoding
+
+        content = '\ufeff<p>zażółć</p>'.encode('utf-16')
+        self.assertEqual(resolve_encoding(content, 'text/html'), ('utf-16', 'bom'))
+
+        content = '\ufeff<p>zażółć</p>'.encode('utf-8')
+        encoding, tier = resolve_encoding(content, 'text/html')
+        self.assertEqual((encoding, tier), ('utf-8-sig', 'bom'))
+        self.assertEqual(str(content, encoding), '<p>zażółć</p>')
+
+    def test_meta_charset(self):
+        """Test kodowania z <meta charset> i http-equiv"""
+        from articles.encoding import resolve_encoding
+
+        self.assertEqual(
+            resolve_encoding(b'<html><head><meta charset="windows-1250"></head></html>'),
+            ('cp1250', 'meta')
+        )
+        self.assertEqual(
+            resolve_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=iso-8859-2">'),
+            ('iso8859-2', 'meta')
+        )
+
+    def test_unknown_charset_falls_through(self):
+        """Test pomijania nieznanych nazw kodowań"""
+        from articles.encoding import resolve_encoding
+
+        content = '<meta charset="bogus"><p>Zażółć gęślą jaźń</p>'.encode('utf-8')
+        encoding, tier = resolve_encoding(content, 'text/html; charset=bogus')
+        self.assertEqual(tier, 'detect')
+        self.assertEqual(encoding, 'utf-8')
+
+    def test_ascii_sample_detected_as_utf8(self):
+        """Test strony z samym ASCII w próbce detekcji i polskim tekstem dalej"""
+        from articles.encoding import DETECT_SAMPLE_BYTES, resolve_encoding
+
+        script = '<script>var x = 1;</script>\n' * (DETECT_SAMPLE_BYTES // 27 + 100)
+        content = f'<html><head>{script}</head><body><p>Zażółć gęślą jaźń</p></body></html>'.encode('utf-8')
+        self.assertTrue(content[:DETECT_SAMPLE_BYTES].isascii())
+
+        encoding, tier = resolve_encoding(content, 'text/html')
+        self.assertEqual((encoding, tier), ('utf-8', 'detect'))
+        self.assertIn('Zażółć gęślą jaźń', str(content, encoding, errors='replace'))
+
+
+class ExtractionTest(TestCase):
+    """Testy jednoprzebiegowej ekstrakcji treści"""
+
+    HTML = (
+        '<html><head><title> Test <b>Article</b> </title>'
+        '<link rel="alternate" href="/feed"><link rel="Canonical" href="/article">'
+        '<meta name="date" content="2025-10-27">'
+        '<meta property="article:published_time" content="2025-10-28T12:00:00Z">'
+        '<script>var tracking = 1;</script></head><body>'
+        '<div class="sidebar post-content"><p>Sidebar</p></div>'
+        '<article><h1>Heading</h1><p>First <!-- ad --> paragraph</p>'
+        '<div class="entry-content">Body</div></article>'
+        '<time datetime="2025-10-26">26.10.2025</time></body></html>'
+    )
+
+    def test_extract_matches_beautifulsoup_lookups(self):
+        """Test zgodności wyników z wcześniejszym wyszukiwaniem BeautifulSoup"""
+        from bs4 import BeautifulSoup
+        from articles.extraction import extract, find_date_strings
+
+        soup = BeautifulSoup(self.HTML, 'html.parser')
+        page = extract(self.HTML)
+
+        self.assertEqual(page.title, soup.find('title').get_text(strip=True))
+        self.assertEqual(page.content_html, str(soup.find('article')))
+        self.assertEqual(page.content_text, soup.find('article').get_text(separator=' ', strip=True))
+        self.assertEqual(page.text, soup.get_text(separator=' ', strip=True))
+        self.assertEqual(page.date_strings, find_date_strings(soup))
+        self.assertEqual(page.date_strings, ['2025-10-28T12:00:00Z', '2025-10-27', '2025-10-26'])
+        self.assertEqual(page.canonical, '/article')
+
+    def test_extract_without_content_element(self):
+        """Test strony bez elementu treści"""
+        from articles.extraction import extract
+
+        html = '<p>Plain <span>page</span></p>'
+        page = extract(html)
+
+        self.assertEqual(page.title, 'No title')
+        self.assertEqual(page.content_html, html)
+        self.assertEqual(page.content_text, 'Plain page')
+        self.assertEqual(page.date_strings, [])
+        self.assertIsNone(page.canonical)
+
+    def test_alternative_backends(self):
+        """Test zgodności alternatywnych parserów na poprawnym HTML"""
+        from articles.extraction import available_backends, extract
+
+        html = self.HTML.replace('<b>Article</b>', 'Article')
+        expected = extract(html)
+        for backend in available_backends()[1:]:
+            with self.subTest(backend=backend):
+                page = extract(html, backend)
+                self.assertEqual(page.title, expected.title)
+                self.assertEqual(page.content_text, expected.content_text)
+                self.assertEqual(page.text, expected.text)
+                self.assertEqual(page.date_strings, expected.date_strings)
+                self.assertEqual(page.canonical, expected.canonical)
+
+
+class HeadMetadataTest(TestCase):
+    """Testy odczytu metadanych z sekcji <head>"""
+
+    HTML = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        '<title> Tytuł &amp; <b>portal</b> </title>'
+        '<noscript><img src="/pixel.gif"></noscript>'
+        '<meta property="og:title" content="Tytuł">'
+        '<link rel="Canonical" href="/artykul">'
+        '<script type="application/ld+json">{"@graph": ['
+        '{"@type": "WebPage", "datePublished": "2020-01-01"},'
+        '{"@type": ["NewsArticle"], "datePublished": "2025-10-27T08:00:00Z", "headline": "Nagłówek"}'
+        ']}</script>'
+        '<script>var html = "</head><body>";</script>'
+        '<meta name="date" content="2025-10-26">'
+        '</head><body><time datetime="2025-10-25">25.10.2025</time>'
+        '<meta property="article:published_time" content="2025-10-24T12:00:00Z">'
+        '<article><p>Opublikowano 3 marca 2025</p></article></body></html>'
+    )
+
+    def test_read_head(self):
+        """Test odczytu tytułu, dat i adresu kanonicznego z <head>"""
+        from articles.metadata import read_head
+
+        head = read_head(self.HTML)
+
+        self.assertEqual(head.title, 'Tytuł & portal')
+        self.assertEqual(head.og_title, 'Tytuł')
+        self.assertEqual(head.headline, 'Nagłówek')
+        self.assertEqual(head.date_strings, ['2025-10-27T08:00:00Z', '2025-10-26'])
+        self.assertEqual(head.canonical, '/artykul')
+        self.assertTrue(head.complete)
+
+    def test_read_head_stops_at_body(self):
+        """Test zakończenia odczytu na początku treści strony"""
+        from html.parser import HTMLParser
+        from articles.metadata import CHUNK_SIZE, HeadParser, read_head
+
+        html = (
+            '<title>Bez head</title><meta name="publish-date" content="2025-10-28">'
+            '<p>Treść</p>' + '<p>Akapit</p>' * CHUNK_SIZE
+        )
+        with patch.object(HeadParser, 'feed', autospec=True, side_effect=HTMLParser.feed) as feed:
+            head = read_head(html)
+
+        self.assertEqual(feed.call_count, 1)
+        self.assertEqual(head.title, 'Bez head')
+        self.assertEqual(head.date_strings, ['2025-10-28'])
+
+        head = read_head('<head><meta property="og:title" content="Tylko OG">')
+        self.assertFalse(head.complete)
+        self.assertEqual(head.best_title(), 'Tylko OG')
+        self.assertEqual(head.date_strings, [])
+
+    def test_parse_record_prefers_head_metadata(self):
+        """Test pierwszeństwa metadanych z <head> przy parsowaniu strony"""
+        command = Command()
+        record = command.parse_record('https://example.com/a', self.HTML)
+
+        self.assertEqual(record['title'], 'Tytuł & portal')
+        self.assertEqual(record['published_date'].isoformat(), '2025-10-27T08:00:00+00:00')
+        self.assertEqual(record['canonical_url'], 'https://example.com/artykul')
+
+        # Bez dat w <head>: daty z całego dokumentu, potem tekst strony.
+        html = '<html><head><title>T</title></head><body><time datetime="2025-10-25">x</time></body></html>'
+        self.assertEqual(command.parse_record('https://example.com/b', html)['published_date'].day, 25)
+        html = '<html><head></head><body><p>Opublikowano 3 marca 2025</p></body></html>'
+        record = command.parse_record('https://example.com/c', html)
+        self.assertEqual((record['published_date'].month, record['published_date'].day), (3, 3))
+        self.assertEqual(record['title'], 'No title')
+
+        # <head> bez końca (niezamknięty <title>): daty z całego dokumentu mają pierwszeństwo.
+        html = (
+            '<head><meta name="date" content="2025-10-20"><title>T'
+            '<meta property="article:published_time" content="2025-10-24T12:00:00Z">'
+        )
+        self.assertEqual(command.parse_record('https://example.com/d', html)['published_date'].day, 24)
+
+
+class DateParsingTest(TestCase):
+    """Testy modułu parsowania dat"""
+
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2025, 10, 28, 15, 30))
+
+    def test_polish_date_wins_over_earlier_iso_date(self):
+        """Test priorytetu polskiej daty niezależnie od pozycji w tekście"""
+        from articles.dates import parse_text_date
+
+        result = parse_text_date("Aktualizacja 2024-01-05. Opublikowano 3 marca 2025", self.now)
+        self.assertEqual((result.year, result.month, result.day), (2025, 3, 3))
+
+    def test_invalid_date_falls_back_to_next_pattern(self):
+        """Test przejścia do kolejnego formatu przy niepoprawnej dacie"""
+        from articles.dates import parse_text_date
+
+        result = parse_text_date("31 lutego 2025, October 28, 2025", self.now)
+        self.assertEqual((result.year, result.month, result.day), (2025, 10, 28))
+        self.assertEqual((result.hour, result.minute), (0, 0))
+
+    def test_relative_and_missing_dates(self):
+        """Test dat względnych i braku daty w tekście"""
+        from articles.dates import parse_date, parse_text_date
+
+        self.assertEqual(parse_text_date("3 hours ago", self.now), self.now - timedelta(hours=3))
+        self.assertIsNone(parse_text_date("brak daty", self.now))
+        self.assertEqual(
+            parse_date([], "brak daty", self.now),
+            self.now.replace(hour=0, minute=0, second=0, microsecond=0)
+        )
+
+    def test_meta_date_strings_are_cached(self):
+        """Test pamięci podręcznej dla dat z meta tagów"""
+        from articles.dates import _parse_date_string, parse_date
+
+        _parse_date_string.cache_clear()
+        for _ in range(3):
+            result = parse_date(['not a date', '2025-10-28T12:00:00Z'], "", self.now)
+        self.assertEqual(result.hour, 12)
+        info = _parse_date_string.cache_info()
+        self.assertEqual((info.misses, info.hits), (2, 4))
+
+
+class UrlSourcesTest(TestCase):
+    """Testy źródeł URL-i (pliki, stdin, sitemapy)"""
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, data):
+        import os
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_urls_file_plain_and_jsonl(self):
+        """Test odczytu URL-i z pliku tekstowego i JSONL"""
+        from articles.sources import iter_urls_file
+
+        path = self.write('urls.txt', (
+            b'# comment\n'
+            b'https://example.com/a\n'
+            b'\n'
+            b'{"url": "https://example.com/b", "source": "export"}\n'
+        ))
+        self.assertEqual(list(iter_urls_file(path)), ['https://example.com/a', 'https://example.com/b'])
+
+    def test_urls_file_stdin(self):
+        """Test odczytu URL-i ze standardowego wejścia"""
+        from io import StringIO
+        from articles.sources import iter_urls_file
+
+        with patch('sys.stdin', StringIO('https://example.com/a\nhttps://example.com/b\n')):
+            self.assertEqual(list(iter_urls_file('-')), ['https://example.com/a', 'https://example.com/b'])
+
+    def test_gzipped_sitemap_index(self):
+        """Test odczytu indeksu sitemap ze skompresowanymi sitemapami"""
+        import gzip
+        from articles.sources import iter_sitemap
+
+        urlset = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            '<url><loc>https://example.com/a</loc></url>'
+            '<url><loc> https://example.com/b </loc><lastmod>2025-10-28</lastmod></url>'
+            '</urlset>'
+        )
+        child = self.write('sitemap-1.xml.gz', gzip.compress(urlset.encode()))
+        index = self.write('sitemap.xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f'<sitemap><loc>{child}</loc></sitemap>'
+            '</sitemapindex>'
+        ).encode())
+
+        self.assertEqual(list(iter_sitemap(index)), ['https://example.com/a', 'https://example.com/b'])
+
+
 class ArticleIntegrationTest(TestCase):
     """Testy integracyjne end-to-end"""
 
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import ArticleList, ArticleDetail
+from .views import ArticleList, ArticleDetail, ArticleExport
 
 urlpatterns = [
     path('', ArticleList.as_view(), name='article-list'),
     path('<int:pk>/', ArticleDetail.as_view(), name='article-detail'),
+    path('export/', ArticleExport.as_view(), name='article-export'),
 ]
\ No newline at end of file
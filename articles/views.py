@@ -1,21 +1,112 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import generics
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .caching import CachedResponseMixin
+from .export import CONTENT_TYPES, iter_export
+from .metrics import API_STAGE_SECONDS
 from .models import Article
-from .serializers import ArticleSerializer
+from .pagination import KeysetPagination
+from .query import filter_articles, parse_fields
+from .renderers import FastJSONRenderer
+from .search import search
+from .serializers import LIST_FIELDS, ArticleSerializer, article_rows
 
-class ArticleList(generics.ListAPIView):
+
+class SparseFieldsMixin:
+    """
+    Lets clients choose the returned fields with ?fields=id,title,...
+
+    Responses are built by the fast read path: rows come from .values()
+    with only the needed columns (never the unrequested content columns)
+    and are formatted by article_rows() instead of ArticleSerializer,
+    which gives the same output.
+    """
+
+    default_fields = ArticleSerializer.Meta.fields
+    required_columns = ()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get_fields(self):
+        if not hasattr(self, '_fields'):
+            self._fields = parse_fields(self.request.query_params, self.default_fields)
+        return self._fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['fields'] = self.get_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def get_columns(self):
+        ordering = [name.lstrip('-') for name in getattr(self, 'keyset_ordering', ())]
+        return list(dict.fromkeys([*self.get_fields(), *self.required_columns, *ordering]))
+
+    def get_rows(self):
+        return self.filter_queryset(self.get_queryset()).values_for(*self.get_columns())
+
+
+class ArticleList(CachedResponseMixin, SparseFieldsMixin, generics.ListAPIView):
 
     serializer_class = ArticleSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('published_date', 'id')
+    default_fields = LIST_FIELDS
+    required_columns = ('published_date',)
 
     def get_queryset(self):
         queryset = Article.objects.all()
-        source = self.request.query_params.get('source')
-        if source:
-            queryset = queryset.filter(source__icontains=source)
-        return queryset
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            # Search results are ranked, best match first.
+            queryset = search(queryset, q)
+            self.keyset_ordering = ('-rank', '-id')
+        return filter_articles(queryset, self.request.query_params)
 
-class ArticleDetail(generics.RetrieveAPIView):
+    def list(self, request, *args, **kwargs):
+        with API_STAGE_SECONDS.time(view='article-list', stage='query'):
+            rows = self.paginate_queryset(self.get_rows())
+        with API_STAGE_SECONDS.time(view='article-list', stage='format'):
+            data = article_rows(rows, self.get_fields())
+        return self.get_paginated_response(data)
+
+class ArticleDetail(CachedResponseMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        with API_STAGE_SECONDS.time(view='article-detail', stage='query'):
+            row = generics.get_object_or_404(self.get_rows(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        with API_STAGE_SECONDS.time(view='article-detail', stage='format'):
+            data = article_rows([row], self.get_fields())[0]
+        return Response(data)
+
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    """Always the first renderer: ?format= selects the export format instead."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+class ArticleExport(APIView):
+    """
+    Streams all articles matching the list filters (and since_id / since)
+    as NDJSON (default) or CSV, see articles.export. Errors are JSON.
+    """
+
+    renderer_classes = [FastJSONRenderer]
+    content_negotiation_class = ExportContentNegotiation
+
+    def get(self, request, *args, **kwargs):
+        format = request.query_params.get('format') or 'ndjson'
+        chunks = iter_export(request.query_params, format)
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[format])
+        response['Content-Disposition'] = f'attachment; filename="articles.{format}"'
+        return response
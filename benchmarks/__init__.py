@@ -0,0 +1,104 @@
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'corpus'
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scrape_articles.settings')
+    import django
+    django.setup()
+
+
+def create_database(name, keepdb=False):
+    """
+    Creates (or with keepdb reuses) a migrated database `name` on the
+    configured server, like the test runner does, and switches the default
+    connection to it. Benchmarks never write to the configured database.
+    """
+    from django.db import connection
+
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+
+
+def destroy_database(name, keepdb=False):
+    from django.db import connection
+
+    connection.creation.destroy_test_db(name, verbosity=0, keepdb=keepdb)
+
+
+def environment():
+    """Where the results were measured; stored with them for comparisons."""
+    import django
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument('--save', metavar='PATH', help='Write the results (with parameters and environment) as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results with a file written by --save')
+
+
+def numbers(results, prefix=''):
+    """Flattens nested results to {"a.b.c": number}."""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(numbers(value, f'{name}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def comparison(results, baseline):
+    """(name, baseline value, value, relative change) for every number in both."""
+    old = numbers(baseline['results'])
+    new = numbers(results)
+    return [
+        (name, old[name], new[name], (new[name] - old[name]) / old[name] if old[name] else None)
+        for name in new if name in old
+    ]
+
+
+def _format(value):
+    return f'{value:,.0f}' if abs(value) >= 1000 else f'{value:.4g}'
+
+
+def report(benchmark, parameters, results, args):
+    """Handles --save and --compare for `results` of `benchmark`."""
+    if args.save:
+        document = {
+            'benchmark': benchmark,
+            'measured_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'environment': environment(),
+            'parameters': parameters,
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('benchmark') != benchmark:
+            sys.exit(f"{args.compare} has results of {baseline.get('benchmark')!r}, not {benchmark!r}")
+        sys.stdout.flush()
+        if baseline.get('parameters') != parameters:
+            print(f"Warning: parameters differ from the baseline: {baseline.get('parameters')}", file=sys.stderr)
+        print(f"\nCompared with {args.compare} ({baseline.get('measured_at', '?')}):", file=sys.stderr)
+        for name, old, new, change in comparison(results, baseline):
+            change = f'{change:+.1%}' if change is not None else ''
+            print(f'{name:<50} {_format(old):>14} -> {_format(new):>14} {change:>8}', file=sys.stderr)
@@ -0,0 +1,188 @@
+"""
+Latency benchmark of the /articles/ API at growing table sizes.
+
+    python -m benchmarks.api [--rows 10000,100000,1000000] [--requests 200]
+                             [--keepdb] [--json] [--save PATH] [--compare PATH]
+
+A benchmark database (bench_api_<DB_NAME>) is seeded up to each row count
+in turn with generated articles (INSERT ... SELECT generate_series, search
+vectors included) and the API is then requested in-process through the
+Django test client, so the numbers are view + database time without the
+network. Endpoints:
+
+    list         first page of /articles/
+    list-next    the page after it (keyset cursor from the Link header)
+    list-source  /articles/?source=<one of 50 sources> (20 random ones)
+    search       /articles/?q=<word>
+    detail       /articles/<id> (20 random ids)
+
+Each one is measured with a local memory response cache, once with a zero
+timeout ("uncached": every request is a miss and renders the response)
+and once with the default one ("cached": the URLs are requested once
+before measuring, so every measured request is a hit). With --keepdb the
+seeded database is kept and reused, so re-runs skip the seeding (1M rows
+take minutes).
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks import add_baseline_arguments, create_database, destroy_database, report, setup_django
+
+
+SOURCES = 50
+SEARCH_WORDS = ('silnik', 'przepis', 'stadion', 'budżet')
+
+# Generated rows: a title and ~1 KB of text made of words picked by the row
+# number, 50 sources and dates spread over three years.
+SEED_ARTICLES = """
+    INSERT INTO articles_article (
+        id, title, url, canonical_url, source, normalized_source, published_date, created_at,
+        etag, last_modified, page_hash
+    )
+    SELECT
+        i,
+        'Artykuł ' || i || ' ' || (ARRAY['silnik', 'przepis', 'stadion', 'budżet', 'pogoda'])[i %% 5 + 1],
+        'https://source' || i %% {sources} || '.example/artykul-' || i,
+        'https://source' || i %% {sources} || '.example/artykul-' || i,
+        'source' || i %% {sources} || '.example',
+        'source' || i %% {sources} || '.example',
+        timestamptz '2023-01-01' + (i::bigint * 7919 %% 94608000) * interval '1 second',
+        now(), '', '', ''
+    FROM generate_series(%s, %s) AS i
+"""
+SEED_CONTENT = """
+    INSERT INTO articles_articlecontent (article_id, content_html, content_text)
+    SELECT id, '<article><p>' || body || '</p></article>', body
+    FROM (
+        SELECT i AS id, repeat(
+            (ARRAY['Silnik benzynowy zużywa mniej paliwa w mieście. ',
+                   'Przepis na obiad z piekarnika dla całej rodziny. ',
+                   'Na stadionie zebrało się kilka tysięcy kibiców. ',
+                   'Radni przyjęli budżet gminy na przyszły rok. '])[i %% 4 + 1]
+            || 'Numer ' || i || '. ', 20) AS body
+        FROM generate_series(%s, %s) AS i
+    ) AS rows
+"""
+SEED_CHUNK = 100000
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def seed(rows):
+    """Adds generated articles until the table has `rows` of them."""
+    from django.db import connection, transaction
+    from articles.models import Article
+    from articles.search import update_search_vectors
+
+    start = (Article.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    for first in range(start, rows + 1, SEED_CHUNK):
+        last = min(first + SEED_CHUNK - 1, rows)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(SEED_ARTICLES.format(sources=SOURCES), [first, last])
+            cursor.execute(SEED_CONTENT, [first, last])
+            update_search_vectors(Article.objects.filter(id__range=(first, last)))
+    if start <= rows:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setval(pg_get_serial_sequence('articles_article', 'id'), %s)", [rows])
+            cursor.execute('ANALYZE articles_article')
+            cursor.execute('ANALYZE articles_articlecontent')
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(client, paths, requests):
+    """Latency summary (ms) of `requests` GETs cycling through `paths`."""
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        response = client.get(paths[i % len(paths)])
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise AssertionError(f'{paths[i % len(paths)]} returned {response.status_code}')
+    latencies.sort()
+    return {
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+def endpoints(client, rows, samples):
+    rng = random.Random(rows)
+    first_page = client.get('/articles/')
+    next_url = first_page.headers['Link'].split(';')[0].strip('<>')
+    return {
+        'list': ['/articles/'],
+        'list-next': [next_url],
+        'list-source': [f'/articles/?source=source{rng.randrange(SOURCES)}.example' for _ in range(samples)],
+        'search': [f'/articles/?q={word}' for word in SEARCH_WORDS],
+        'detail': [f'/articles/{rng.randint(1, rows)}/' for _ in range(samples)],
+    }
+
+
+def run(row_counts=(10000, 100000, 1000000), requests=200, keepdb=False):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    database = create_database(f"bench_api_{settings.DATABASES['default']['NAME']}", keepdb=keepdb)
+    results = {}
+    # DEBUG would record every query; the test client's host must be allowed.
+    environment = override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'])
+    environment.enable()
+    try:
+        for rows in sorted(row_counts):
+            started = time.perf_counter()
+            seed(rows)
+            seconds = time.perf_counter() - started
+            print(f'{rows:,} rows seeded ({seconds:.1f} s)', file=sys.stderr)
+            client = Client()
+            results[str(rows)] = {}
+            paths = endpoints(client, rows, samples=20)
+            for mode, timeout in (('uncached', 0), ('cached', 3600)):
+                with override_settings(CACHES=LOCMEM_CACHE, ARTICLES_CACHE_TIMEOUT=timeout):
+                    # The seeding bypasses the cache invalidation.
+                    cache.clear()
+                    for name, urls in paths.items():
+                        for url in urls:
+                            client.get(url)
+                        results[str(rows)].setdefault(name, {})[mode] = measure(client, urls, requests)
+    finally:
+        environment.disable()
+        destroy_database(database, keepdb=keepdb)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10000,100000,1000000', help='Comma-separated table sizes')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint, table size and mode')
+    parser.add_argument('--keepdb', action='store_true', help='Keep the seeded database for the next run')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    row_counts = sorted(int(value) for value in args.rows.split(',') if value.strip())
+    setup_django()
+    results = run(row_counts, args.requests, args.keepdb)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'rows':>10} {'endpoint':<12} {'uncached p50':>13} {'p95 ms':>9} {'cached p50':>11} {'p95 ms':>9}")
+        for rows, by_endpoint in results.items():
+            for name, modes in by_endpoint.items():
+                uncached, cached = modes['uncached'], modes['cached']
+                print(
+                    f"{int(rows):>10,} {name:<12} {uncached['p50_ms']:>13.2f} {uncached['p95_ms']:>9.2f}"
+                    f" {cached['p50_ms']:>11.2f} {cached['p95_ms']:>9.2f}"
+                )
+    report('api', {'rows': row_counts, 'requests': args.requests}, results, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Dates-per-second benchmark for articles.dates.
+
+    python -m benchmarks.dates [--seconds 1.0] [--json] [--save PATH] [--compare PATH]
+
+Every corpus sample is also measured with ~20 KB of article text in front
+of it ("long-*" kinds), which is where the cost of scanning shows up.
+"""
+import argparse
+import json
+import time
+from collections import defaultdict
+
+from benchmarks import CORPUS_DIR, add_baseline_arguments, report, setup_django
+
+
+FILLER = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit 42. ' * 350
+
+
+def load_corpus():
+    samples = defaultdict(list)
+    with open(CORPUS_DIR / 'dates.jsonl', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            date_strings = record.get('date_strings', [])
+            text = record.get('text', '')
+            samples[record['kind']].append((date_strings, text))
+            if text:
+                samples[f"long-{record['kind']}"].append((date_strings, FILLER + text))
+    return samples
+
+
+def measure(parse_date, samples, seconds):
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for date_strings, text in samples:
+            parse_date(date_strings, text)
+        count += len(samples)
+        elapsed = time.perf_counter() - started
+    return count / elapsed
+
+
+def run(seconds=1.0):
+    from articles.dates import parse_date
+
+    return {
+        kind: round(measure(parse_date, samples, seconds))
+        for kind, samples in sorted(load_corpus().items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each kind of sample')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.seconds)
+    if args.json:
+        print(json.dumps({'dates_per_second': results}, indent=2))
+    else:
+        for kind, rate in results.items():
+            print(f"{kind:<16} {rate:>12,} dates/s")
+    report('dates', {'seconds': args.seconds}, {'dates_per_second': results}, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Pages-per-second benchmark of the page metadata (title, date, canonical).
+
+    python -m benchmarks.metadata [--seconds 1.0] [--json] [--save PATH] [--compare PATH]
+
+"head" is articles.metadata.read_head(), which stops at the end of
+<head>; "full" is the whole-document path: extract() and parse_date()
+over its date candidates and page text. Measured for every page kind of
+the benchmark corpus (benchmarks/corpus/pages), from a 646-byte SPA shell
+to a ~1.3 MB live-blog page.
+"""
+import argparse
+import json
+import time
+
+from benchmarks import add_baseline_arguments, report, setup_django
+from benchmarks.server import PAGE_KINDS, render_page
+
+
+def measure(function, html, seconds):
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        function(html)
+        count += 1
+        elapsed = time.perf_counter() - started
+    return count / elapsed
+
+
+def run(seconds=1.0):
+    from articles.dates import parse_date
+    from articles.extraction import extract
+    from articles.metadata import read_head
+
+    def full(html):
+        page = extract(html)
+        return parse_date(page.date_strings, page.text)
+
+    results = {}
+    for kind, page_kind in PAGE_KINDS.items():
+        html = render_page(kind, 1, f'https://example.com/{kind}/1').decode(page_kind.encoding)
+        results[kind] = {
+            'kb': round(len(html) / 1024, 1),
+            'head': round(measure(read_head, html, seconds)),
+            'full': round(measure(full, html, seconds), 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each page and path')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.seconds)
+    if args.json:
+        print(json.dumps({'pages_per_second': results}, indent=2))
+    else:
+        for kind, result in results.items():
+            print(
+                f"{kind:<10} {result['kb']:>8} KB   head {result['head']:>10,} pages/s"
+                f"   full {result['full']:>10,} pages/s"
+            )
+    report('metadata', {'seconds': args.seconds}, {'pages_per_second': results}, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+End-to-end benchmark of scrape_articles against the local corpus server.
+
+    python -m benchmarks.scrape [--pages 500] [--latency 0.05] [--concurrency 8]
+                                [--parse-workers 0] [--kinds wordpress,article,...]
+                                [--json] [--save PATH] [--compare PATH]
+                                [-- extra scrape_articles options]
+
+The pages of benchmarks/corpus/pages are served by benchmarks.server and
+scraped by the real command, run as a child process on a freshly migrated
+benchmark database (bench_<DB_NAME>, dropped afterwards). Reported are
+pages per second, the per-stage times from the command's JSON summary
+and the peak RSS of the largest process of the run (the command or one of
+its parse workers).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import add_baseline_arguments, create_database, destroy_database, report, setup_django
+from benchmarks.server import PAGE_KINDS, page_urls, serve
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def peak_rss_mb():
+    """Largest max RSS among the waited-for child processes, in MB."""
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_command(urls_file, database, options):
+    # With DEBUG on, Django keeps every query of the run in memory.
+    env = dict(os.environ, DB_NAME=database, DEBUG='0')
+    command = [sys.executable, 'manage.py', 'scrape_articles', '--urls-file', urls_file, *options]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f'scrape_articles exited with {completed.returncode}')
+    # The last line of the output is the JSON summary of the run.
+    return json.loads(completed.stdout.strip().splitlines()[-1]), elapsed
+
+
+def run(pages=500, latency=0.0, jitter=0.0, kinds=tuple(PAGE_KINDS), concurrency=8, parse_workers=0,
+        batch_size=100, parser_backend='html.parser', extra=()):
+    from django.conf import settings
+
+    database = create_database(f"bench_{settings.DATABASES['default']['NAME']}")
+    server = serve(latency=latency, jitter=jitter)
+    try:
+        host, port = server.server_address[:2]
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.writelines(f'{url}\n' for url in page_urls(f'http://{host}:{port}', pages, kinds))
+        try:
+            options = [
+                '--concurrency', str(concurrency),
+                # Every page is on the one local host.
+                '--host-concurrency', str(concurrency),
+                '--parse-workers', str(parse_workers),
+                '--batch-size', str(batch_size),
+                '--parser', parser_backend,
+                *extra,
+            ]
+            summary, wall = run_command(f.name, database, options)
+        finally:
+            os.unlink(f.name)
+    finally:
+        server.shutdown()
+        server.server_close()
+        destroy_database(database)
+
+    return {
+        'pages': summary['pages'],
+        'pages_per_second': summary['pages_per_second'],
+        # Including the interpreter and Django start-up.
+        'wall_seconds': round(wall, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'downloaded_mb': round(summary['downloaded_bytes'] / 1024 / 1024, 2),
+        'statuses': summary['statuses'],
+        'stages': {
+            stage: {key: values[key] for key in ('count', 'sum', 'mean', 'p50', 'p95')}
+            for stage, values in summary['stages'].items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=500, help='Number of URLs to scrape')
+    parser.add_argument('--latency', type=float, default=0.0, help='Server latency per response, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra latency, up to this many seconds')
+    parser.add_argument('--kinds', default=','.join(PAGE_KINDS), help='Page kinds to scrape, cycled through')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--parser', default='html.parser', help='scrape_articles --parser backend')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    add_baseline_arguments(parser)
+    parser.add_argument('extra', nargs=argparse.REMAINDER, help='Options passed on to scrape_articles (after --)')
+    args = parser.parse_args()
+
+    kinds = tuple(kind.strip() for kind in args.kinds.split(',') if kind.strip())
+    unknown = set(kinds) - set(PAGE_KINDS)
+    if unknown or not kinds:
+        parser.error(f"--kinds must be some of {', '.join(PAGE_KINDS)}")
+    extra = args.extra[1:] if args.extra[:1] == ['--'] else args.extra
+
+    setup_django()
+    parameters = {
+        'pages': args.pages,
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'kinds': list(kinds),
+        'concurrency': args.concurrency,
+        'parse_workers': args.parse_workers,
+        'batch_size': args.batch_size,
+        'parser': args.parser,
+        'extra': extra,
+    }
+    results = run(
+        args.pages, args.latency, args.jitter, kinds, args.concurrency, args.parse_workers,
+        args.batch_size, args.parser, extra,
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{results['pages']} pages in {results['wall_seconds']} s: {results['pages_per_second']} pages/s, "
+            f"peak RSS {results['peak_rss_mb']} MB, {results['downloaded_mb']} MB downloaded"
+        )
+        print('statuses: ' + ', '.join(f'{status}={count}' for status, count in results['statuses'].items()))
+        print(f"{'stage':<10} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for stage, values in results['stages'].items():
+            print(
+                f"{stage:<10} {values['count']:>7} {values['sum']:>9.3f} {values['mean'] * 1000:>9.2f}"
+                f" {values['p50'] * 1000:>9.2f} {values['p95'] * 1000:>9.2f}"
+            )
+    report('scrape', parameters, results, args)
+
+
+if __name__ == '__main__':
+    main()
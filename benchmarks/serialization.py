@@ -0,0 +1,102 @@
+"""
+Rows-per-second benchmark of the article API serialization paths.
+
+    python -m benchmarks.serialization [--rows 1000] [--seconds 1.0] [--json]
+                                       [--save PATH] [--compare PATH]
+
+"serializer" is ArticleSerializer + JSONRenderer over model instances,
+"fast" is article_rows() + FastJSONRenderer over .values() dicts (orjson
+is used when installed). Both render the same rows, built in memory, so
+database time is not included; the two outputs are checked to be equal.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+
+TEXT = 'Zażółć gęślą jaźń. Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 40
+
+
+def build_rows(count):
+    base = datetime(2025, 10, 1, 12, 0, tzinfo=timezone.utc)
+    return [
+        {
+            'id': i,
+            'title': f'Artykuł numer {i} o samochodach elektrycznych',
+            'content_html': f'<article><p>{TEXT}</p></article>',
+            'content_text': TEXT,
+            'url': f'https://example.com/artykul-{i}',
+            'source': 'example.com',
+            'published_date': base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def measure(render, rows, seconds):
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        render()
+        count += rows
+        elapsed = time.perf_counter() - started
+    return count / elapsed
+
+
+def run(rows=1000, seconds=1.0):
+    from rest_framework.renderers import JSONRenderer
+    from articles.models import Article
+    from articles.renderers import FastJSONRenderer, orjson
+    from articles.serializers import LIST_FIELDS, ArticleSerializer, article_rows
+
+    values = build_rows(rows)
+    instances = [Article(**row) for row in values]
+    results = {'orjson': orjson is not None}
+    for name, fields in (('list', LIST_FIELDS), ('full', ArticleSerializer.Meta.fields)):
+        def serializer_path():
+            return JSONRenderer().render(ArticleSerializer(instances, many=True, fields=fields).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(article_rows(values, fields))
+
+        if serializer_path() != fast_path():
+            raise AssertionError(f'Outputs differ for {name} fields')
+        slow = measure(serializer_path, rows, seconds)
+        fast = measure(fast_path, rows, seconds)
+        results[name] = {
+            'serializer': round(slow),
+            'fast': round(fast),
+            'speedup': round(fast / slow, 1),
+        }
+    return results
+
+
+def main():
+    from benchmarks import add_baseline_arguments, report, setup_django
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='Rows rendered per response')
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each path')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.seconds)
+    if args.json:
+        print(json.dumps({'rows_per_second': results}, indent=2))
+    else:
+        print(f"orjson: {'yes' if results['orjson'] else 'no'}")
+        for name in ('list', 'full'):
+            result = results[name]
+            print(
+                f"{name:<6} serializer {result['serializer']:>10,} rows/s"
+                f"   fast {result['fast']:>10,} rows/s   x{result['speedup']}"
+            )
+    report('serialization', {'rows': args.rows, 'seconds': args.seconds}, {'rows_per_second': results}, args)
+
+
+if __name__ == '__main__':
+    main()
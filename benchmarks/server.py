@@ -0,0 +1,174 @@
+"""
+Local HTTP stand-in for article sites, serving the page templates from
+benchmarks/corpus/pages with a configurable latency.
+
+    python -m benchmarks.server [--port 8000] [--latency 0.05] [--jitter 0.02]
+
+Pages are served at /<kind>/<n>, e.g. /wordpress/17. Every n gets its own
+deterministic title, date and body text, so a scrape over many URLs sees
+distinct articles (and no near-duplicates), except for the SPA shells,
+which have no server-rendered content.
+"""
+import argparse
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+from benchmarks import CORPUS_DIR
+
+
+PAGES_DIR = CORPUS_DIR / 'pages'
+
+ROBOTS_TXT = b'User-agent: *\nAllow: /\n'
+
+WORDS = (
+    'samochód silnik paliwo benzyna diesel hybryda akumulator ładowanie zasięg kierowca droga '
+    'miasto trasa serwis przegląd opony hamulce zawieszenie skrzynia biegów moc moment spalanie '
+    'cena koszt ubezpieczenie rejestracja gmina powiat radni budżet inwestycja remont szkoła '
+    'przepis kurczak schab piekarnik marynata przyprawy obiad kolacja warzywa sos mięso '
+    'mecz drużyna trener bramka sezon kibice stadion wynik relacja konferencja rząd ustawa '
+    'wiosna lato jesień zima pogoda deszcz śnieg mieszkańcy ulica most dworzec pociąg autobus'
+).split()
+
+MONTHS = (
+    'stycznia', 'lutego', 'marca', 'kwietnia', 'maja', 'czerwca',
+    'lipca', 'sierpnia', 'września', 'października', 'listopada', 'grudnia',
+)
+
+
+@dataclass
+class PageKind:
+    template: str
+    # Number of generated body paragraphs and the markup of one of them
+    # ($text, $time).
+    paragraphs: int
+    paragraph: str = '<p>$text</p>'
+    encoding: str = 'utf-8'
+    # Whether the Content-Type header names the charset (legacy sites
+    # often only declare it in a <meta> tag).
+    charset_header: bool = True
+
+
+PAGE_KINDS = {
+    # WordPress theme: content in div.entry-content, lots of chrome around it.
+    'wordpress': PageKind('wordpress.html', 12, '<p>$text</p>\n<h2>$heading</h2>'),
+    # News site with the content in <article>.
+    'article': PageKind('article.html', 8),
+    # Client-rendered blog (like take-group.github.io/example-blog-without-ssr):
+    # an empty <div id="root">, no content and no date in the HTML.
+    'spa': PageKind('spa-shell.html', 0),
+    # Live-blog page of ~1.5 MB without a content container.
+    'huge': PageKind('huge.html', 2500, '<div class="entry"><time>$time</time><p>$text</p></div>'),
+    # ISO-8859-2 page declaring its charset in <meta http-equiv> only.
+    'legacy': PageKind('legacy-iso-8859-2.html', 6, encoding='iso-8859-2', charset_header=False),
+}
+
+
+def sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def render_page(kind, n, url=''):
+    """Body bytes of page `n` of `kind`."""
+    page_kind = PAGE_KINDS[kind]
+    rng = random.Random(f'{kind}:{n}')
+    published = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc) + timedelta(hours=7 * n + rng.randrange(7))
+    paragraph = Template(page_kind.paragraph)
+    paragraphs = '\n'.join(
+        paragraph.substitute(
+            text=' '.join(sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(3, 6))),
+            heading=sentence(rng, 5)[:-1],
+            time=f'{(23 - i * 24 // max(page_kind.paragraphs, 1)) % 24:02d}:{rng.randrange(60):02d}',
+        )
+        for i in range(page_kind.paragraphs)
+    )
+    template = Template((PAGES_DIR / page_kind.template).read_text(encoding='utf-8'))
+    html = template.substitute(
+        n=n,
+        url=url,
+        title=sentence(rng, 7)[:-1],
+        lead=sentence(rng, 18),
+        date_iso=published.isoformat(),
+        date_pl=f'{published.day} {MONTHS[published.month - 1]} {published.year}, {published:%H:%M}',
+        paragraphs=paragraphs,
+    )
+    return html.encode(page_kind.encoding)
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    jitter = 0.0
+
+    def do_GET(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if self.path == '/robots.txt':
+            return self.respond(200, ROBOTS_TXT, 'text/plain')
+        kind, _, n = self.path.strip('/').partition('/')
+        if kind not in PAGE_KINDS or not n.isdigit():
+            return self.respond(404, b'Not found', 'text/plain')
+        page_kind = PAGE_KINDS[kind]
+        host = self.headers.get('Host', '')
+        body = render_page(kind, int(n), f'http://{host}{self.path}')
+        content_type = 'text/html'
+        if page_kind.charset_header:
+            content_type += f'; charset={page_kind.encoding}'
+        self.respond(200, body, content_type)
+
+    def respond(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, latency=0.0, jitter=0.0, host='127.0.0.1'):
+    """
+    Starts the corpus server in a daemon thread; port 0 picks a free port
+    (see server.server_address). Call shutdown() to stop it.
+    """
+    handler = type('Handler', (CorpusHandler,), {'latency': latency, 'jitter': jitter})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def page_urls(base_url, count, kinds=tuple(PAGE_KINDS)):
+    """`count` distinct page URLs, cycling through `kinds`."""
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        yield f'{base_url}/{kind}/{i // len(kinds)}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds, at random')
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.jitter, args.host)
+    host, port = server.server_address[:2]
+    print(f'Serving {", ".join(PAGE_KINDS)} pages at http://{host}:{port}/<kind>/<n> (Ctrl+C stops)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()